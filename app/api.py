@@ -0,0 +1,200 @@
+from typing import Optional, Literal
+
+from fastapi import APIRouter, Request, HTTPException, Query
+from fastapi.responses import ORJSONResponse
+from pydantic import BaseModel, Field
+
+from .binance_client import AsyncBinanceClient, api_error
+from .execution import ExecutionScheduler
+from .logger import get_logger, log_trade_attempt, log_trade_result
+
+logger = get_logger('api')
+
+# Handlers build ORJSONResponse themselves so FastAPI skips jsonable_encoder on the way out
+router = APIRouter(prefix='/api/v1', default_response_class=ORJSONResponse, tags=['api'])
+
+
+class OrderRequest(BaseModel):
+    """Order fields, named as in the /place_order form"""
+    symbol: str = Field(..., pattern=r'^[A-Z0-9]+$')
+    quantity: float = Field(..., gt=0)
+    order_type: Literal['MARKET', 'LIMIT', 'STOP_LIMIT']
+    side: Literal['BUY', 'SELL']
+    price: Optional[float] = Field(None, gt=0)
+    stop_price: Optional[float] = Field(None, gt=0)
+
+
+class ExecutionRequest(BaseModel):
+    """A parent order to work as TWAP slices or iceberg children"""
+    strategy: Literal['TWAP', 'ICEBERG']
+    symbol: str = Field(..., pattern=r'^[A-Z0-9]+$')
+    side: Literal['BUY', 'SELL']
+    quantity: float = Field(..., gt=0)
+    # TWAP: child order type, number of slices and the seconds they are spread over
+    order_type: Literal['MARKET', 'LIMIT'] = 'MARKET'
+    slices: int = Field(10, ge=1, le=1000)
+    duration: float = Field(60.0, gt=0)
+    # LIMIT children and every ICEBERG child use this price
+    price: Optional[float] = Field(None, gt=0)
+    visible_quantity: Optional[float] = Field(None, gt=0)
+
+
+async def exchange_client(request: Request) -> AsyncBinanceClient:
+    """Return the app's Binance client once its warm-up has finished"""
+    client = getattr(request.app.state, 'binance_client', None)
+    if client is None or not await client.wait_ready():
+        raise HTTPException(status_code=503, detail="Exchange connection is still warming up")
+    return client
+
+
+def exchange_error(e: Exception) -> HTTPException:
+    """Map a client error to an HTTP error, keeping Binance's error code"""
+    error = api_error(e)
+    if error is not None:
+        status_code = error.status_code if 400 <= error.status_code < 500 else 502
+        return HTTPException(status_code=status_code, detail={'code': error.code, 'msg': error.message})
+    if isinstance(e, ValueError):
+        return HTTPException(status_code=400, detail=str(e))
+    return HTTPException(status_code=502, detail=str(e))
+
+
+@router.post('/orders', status_code=201)
+async def create_order(order: OrderRequest, request: Request):
+    """Place an order and return Binance's order response"""
+    client = await exchange_client(request)
+    trade_data = order.model_dump()
+    log_trade_attempt(logger, trade_data)
+    try:
+        response = await client.place_order(**trade_data)
+    except Exception as e:
+        log_trade_result(logger, False, e)
+        raise exchange_error(e)
+    log_trade_result(logger, True, response)
+    return ORJSONResponse(response, status_code=201)
+
+
+@router.get('/orders/open')
+async def open_orders(request: Request, symbol: Optional[str] = None):
+    """Open orders, for one symbol or all of them"""
+    client = await exchange_client(request)
+    try:
+        return ORJSONResponse(await client.get_open_orders(symbol))
+    except Exception as e:
+        raise exchange_error(e)
+
+
+@router.get('/orders/{symbol}/{order_id}')
+async def get_order(symbol: str, order_id: int, request: Request):
+    """One order's current state"""
+    client = await exchange_client(request)
+    try:
+        return ORJSONResponse(await client.get_order(symbol, order_id))
+    except Exception as e:
+        raise exchange_error(e)
+
+
+@router.delete('/orders/{symbol}/{order_id}')
+async def cancel_order(symbol: str, order_id: int, request: Request):
+    """Cancel an open order"""
+    client = await exchange_client(request)
+    try:
+        return ORJSONResponse(await client.cancel_order(symbol, order_id))
+    except Exception as e:
+        raise exchange_error(e)
+
+
+@router.delete('/orders')
+async def cancel_orders(
+    request: Request,
+    symbol: Optional[str] = None,
+    side: Optional[Literal['BUY', 'SELL']] = None,
+    min_price: Optional[float] = None,
+    max_price: Optional[float] = None,
+    older_than: Optional[float] = Query(None, ge=0)
+):
+    """
+    Cancel open orders in bulk
+
+    With only a symbol (or nothing), each symbol is cleared with a single
+    request; side, price range and age (seconds) filters cancel the
+    matching orders concurrently.
+    """
+    client = await exchange_client(request)
+    try:
+        result = await client.cancel_orders(symbol, side, min_price, max_price, older_than)
+    except Exception as e:
+        raise exchange_error(e)
+    logger.info("Bulk cancel: %d cancelled, %d failed", len(result['canceled']), len(result['failed']))
+    return ORJSONResponse(result)
+
+
+def execution_scheduler(request: Request) -> ExecutionScheduler:
+    return request.app.state.executions
+
+
+@router.post('/executions', status_code=202)
+async def create_execution(execution: ExecutionRequest, request: Request):
+    """Start working a parent order in the background and return its progress"""
+    await exchange_client(request)
+    options = execution.model_dump(exclude={'strategy', 'symbol', 'side', 'quantity'})
+    if execution.strategy == 'ICEBERG':
+        options = {key: options[key] for key in ('price', 'visible_quantity')}
+    else:
+        del options['visible_quantity']
+    try:
+        started = execution_scheduler(request).start(
+            execution.strategy, execution.symbol, execution.side, execution.quantity, **options
+        )
+    except Exception as e:
+        raise exchange_error(e)
+    return ORJSONResponse(started.progress(), status_code=202)
+
+
+@router.get('/executions')
+async def list_executions(request: Request):
+    """Progress of running and recently finished executions, without their children"""
+    return ORJSONResponse([
+        {key: value for key, value in execution.progress().items() if key != 'children'}
+        for execution in execution_scheduler(request).all()
+    ])
+
+
+@router.get('/executions/{execution_id}')
+async def get_execution(execution_id: str, request: Request):
+    """Progress of one execution, with every child order"""
+    execution = execution_scheduler(request).get(execution_id)
+    if execution is None:
+        raise HTTPException(status_code=404, detail="Execution not found")
+    return ORJSONResponse(execution.progress())
+
+
+@router.delete('/executions/{execution_id}')
+async def cancel_execution(execution_id: str, request: Request):
+    """Stop an execution and cancel its child orders still on the book"""
+    execution = await execution_scheduler(request).cancel(execution_id)
+    if execution is None:
+        raise HTTPException(status_code=404, detail="Execution not found")
+    return ORJSONResponse(execution.progress())
+
+
+@router.get('/balances')
+async def balances(request: Request, asset: Optional[str] = None, include_zero: bool = False):
+    """Balance of one asset, or every asset with a non-zero balance unless include_zero is set"""
+    client = await exchange_client(request)
+    try:
+        result = await client.get_balance(asset)
+    except Exception as e:
+        raise exchange_error(e)
+    if asset is None and not include_zero:
+        result = [balance for balance in result if float(balance['free']) or float(balance['locked'])]
+    return ORJSONResponse(result)
+
+
+@router.get('/ticker')
+async def ticker(request: Request, symbol: Optional[str] = None):
+    """Last price for one symbol, or for every symbol"""
+    client = await exchange_client(request)
+    try:
+        return ORJSONResponse(await client.get_ticker_price(symbol))
+    except Exception as e:
+        raise exchange_error(e)
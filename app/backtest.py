@@ -0,0 +1,252 @@
+from typing import Optional, Dict, Any, List
+
+import numpy as np
+
+from .binance_client import build_order_params
+from .exchange_info import SymbolFilters
+from .klines import Klines
+
+# Taker fee charged on the notional of every fill, in the quote asset
+DEFAULT_COMMISSION = 0.001
+
+NOT_FOUND = -1
+
+
+class FirstHit:
+    """
+    Index of the first value at or below a threshold, from any start index
+
+    Keeps the running minimum over every power-of-two block (a sparse
+    table), then finds the first hit for all queries at once by jumping
+    over blocks that have none, largest block first: log2(n) vectorised
+    steps instead of a scan of the candles per order.
+    """
+
+    def __init__(self, values: np.ndarray):
+        self.n = len(values)
+        self.levels = [np.asarray(values, dtype=np.float64)]
+        size = 1
+        while size * 2 <= self.n:
+            previous = self.levels[-1]
+            self.levels.append(np.minimum(previous[:-size], previous[size:]))
+            size *= 2
+
+    def find(self, start: np.ndarray, threshold: np.ndarray) -> np.ndarray:
+        """First index >= start whose value <= threshold, or NOT_FOUND"""
+        position = np.asarray(start, dtype=np.int64).copy()
+        threshold = np.asarray(threshold, dtype=np.float64)
+        for level in range(len(self.levels) - 1, -1, -1):
+            size = 1 << level
+            inside = position + size <= self.n
+            block_min = self.levels[level][np.where(inside, position, 0)]
+            # Every index in [position, position + size) misses, so skip them
+            position = np.where(inside & (block_min > threshold), position + size, position)
+        hit = position < self.n
+        hit[hit] = self.levels[0][position[hit]] <= threshold[hit]
+        return np.where(hit, position, NOT_FOUND)
+
+
+class Orders:
+    """
+    Orders of a strategy as parallel arrays
+
+    Built from the same inputs as BinanceClient.place_order, each checked
+    with build_order_params and the symbol's filters, so an order the
+    exchange would reject is rejected here too, and quantities and prices
+    are rounded the same way.
+    """
+
+    def __init__(self, klines: Klines, orders: List[Dict[str, Any]], filters: Optional[SymbolFilters] = None):
+        count = len(orders)
+        self.time = np.zeros(count, dtype=np.int64)
+        self.buy = np.zeros(count, dtype=bool)
+        self.type = np.empty(count, dtype=object)
+        self.quantity = np.zeros(count)
+        self.price = np.full(count, np.nan)
+        self.stop_price = np.full(count, np.nan)
+        self.error: List[Optional[str]] = [None] * count
+
+        # The close before each order is the reference for MARKET notional checks
+        reference = np.searchsorted(klines.open_time, [order['time'] for order in orders], side='left') - 1
+        for i, order in enumerate(orders):
+            self.time[i] = order['time']
+            try:
+                params = build_order_params(
+                    klines.symbol, order['quantity'], order['order_type'], order['side'],
+                    order.get('price'), order.get('stop_price')
+                )
+                if filters is not None:
+                    reference_price = float(klines.close[reference[i]]) if reference[i] >= 0 else None
+                    params = filters.apply(params, reference_price)
+            except ValueError as e:
+                self.error[i] = str(e)
+                continue
+            self.buy[i] = params['side'] == 'BUY'
+            self.type[i] = params['type']
+            self.quantity[i] = float(params['quantity'])
+            if params.get('price') is not None:
+                self.price[i] = float(params['price'])
+            if params.get('stopPrice') is not None:
+                self.stop_price[i] = float(params['stopPrice'])
+
+    def __len__(self) -> int:
+        return len(self.time)
+
+    @property
+    def accepted(self) -> np.ndarray:
+        return np.array([error is None for error in self.error], dtype=bool)
+
+
+class Backtest:
+    """
+    Replays orders against stored candles
+
+    An order is active from the first candle that opens at or after its
+    time, so a strategy that decides on a candle's close sends at the
+    next candle's open time. Fills follow the order types BinanceClient
+    sends:
+
+    - MARKET fills at the open of its first candle.
+    - LIMIT fills at the open of its first candle when it is marketable
+      there, and otherwise at its price in the first candle that trades
+      through it (low <= price for BUY, high >= price for SELL).
+    - STOP_LIMIT (STOP_LOSS_LIMIT) triggers in the first candle that
+      reaches the stop (high >= stop for BUY, low <= stop for SELL). It
+      fills at the trigger price in that candle when the limit allows,
+      and otherwise rests as a LIMIT order from the next candle.
+
+    Every fill is for the whole quantity and pays commission on its
+    notional. Balances are not checked, so positions can go negative.
+    """
+
+    def __init__(self, klines: Klines, commission: float = DEFAULT_COMMISSION):
+        self.klines = klines
+        self.commission = commission
+        self.open = np.asarray(klines.open, dtype=np.float64)
+        self.high = np.asarray(klines.high, dtype=np.float64)
+        self.low = np.asarray(klines.low, dtype=np.float64)
+        self.close = np.asarray(klines.close, dtype=np.float64)
+        # Both searches are "first value <= threshold"; highs are negated for the >= side
+        self._low_hits = FirstHit(self.low)
+        self._high_hits = FirstHit(-self.high)
+
+    def _trades_through(self, start: np.ndarray, buy: np.ndarray, price: np.ndarray) -> np.ndarray:
+        """First candle from start whose range reaches price from the side that fills a resting order"""
+        found = np.full(len(start), NOT_FOUND, dtype=np.int64)
+        if buy.any():
+            found[buy] = self._low_hits.find(start[buy], price[buy])
+        if (~buy).any():
+            found[~buy] = self._high_hits.find(start[~buy], -price[~buy])
+        return found
+
+    def run(self, orders: Orders) -> 'BacktestResult':
+        count = len(orders)
+        candles = len(self.klines)
+        active = np.searchsorted(self.klines.open_time, orders.time, side='left')
+        live = orders.accepted & (active < candles)
+        buy = orders.buy
+        fill_index = np.full(count, NOT_FOUND, dtype=np.int64)
+        fill_price = np.full(count, np.nan)
+        if not candles:
+            return BacktestResult(self, orders, fill_index, fill_price)
+        start = np.minimum(active, candles - 1)
+
+        market = live & (orders.type == 'MARKET')
+        fill_index[market] = active[market]
+        fill_price[market] = self.open[start[market]]
+
+        limit = live & (orders.type == 'LIMIT')
+        first_open = self.open[start]
+        marketable = limit & np.where(buy, first_open <= orders.price, first_open >= orders.price)
+        fill_index[marketable] = active[marketable]
+        fill_price[marketable] = first_open[marketable]
+        resting = limit & ~marketable
+        fill_index[resting] = self._trades_through(active[resting], buy[resting], orders.price[resting])
+        fill_price[resting] = orders.price[resting]
+
+        stop = live & (orders.type == 'STOP_LOSS_LIMIT')
+        # A BUY stop triggers on the way up, a SELL stop on the way down
+        triggered = np.full(count, NOT_FOUND, dtype=np.int64)
+        triggered[stop] = self._trades_through(active[stop], ~buy[stop], orders.stop_price[stop])
+        stop &= triggered != NOT_FOUND
+        at = np.where(stop, triggered, 0)
+        trigger_price = np.where(buy, np.maximum(self.open[at], orders.stop_price), np.minimum(self.open[at], orders.stop_price))
+        immediate = stop & np.where(buy, trigger_price <= orders.price, trigger_price >= orders.price)
+        fill_index[immediate] = triggered[immediate]
+        fill_price[immediate] = trigger_price[immediate]
+        later = stop & ~immediate
+        next_candle = triggered[later] + 1
+        in_range = next_candle < candles
+        later_index = np.full(len(next_candle), NOT_FOUND, dtype=np.int64)
+        later_index[in_range] = self._trades_through(
+            next_candle[in_range], buy[later][in_range], orders.price[later][in_range]
+        )
+        fill_index[later] = later_index
+        fill_price[later] = orders.price[later]
+
+        filled = fill_index != NOT_FOUND
+        fill_price[~filled] = np.nan
+        return BacktestResult(self, orders, fill_index, fill_price)
+
+
+class BacktestResult:
+    """Fills of a backtest and the account they produce, marked to each candle's close"""
+
+    def __init__(self, backtest: Backtest, orders: Orders, fill_index: np.ndarray, fill_price: np.ndarray):
+        self.orders = orders
+        self.fill_index = fill_index
+        self.fill_price = fill_price
+        self.filled = fill_index != NOT_FOUND
+        self.open_time = backtest.klines.open_time
+
+        index = fill_index[self.filled]
+        signed_quantity = np.where(orders.buy, orders.quantity, -orders.quantity)[self.filled]
+        notional = orders.quantity[self.filled] * fill_price[self.filled]
+        self.fees = notional * backtest.commission
+
+        candles = len(backtest.klines)
+        position_change = np.zeros(candles)
+        cash_change = np.zeros(candles)
+        np.add.at(position_change, index, signed_quantity)
+        np.add.at(cash_change, index, -signed_quantity * fill_price[self.filled] - self.fees)
+        # Base and quote held after each candle, starting flat
+        self.position = np.cumsum(position_change)
+        self.cash = np.cumsum(cash_change)
+        self.equity = self.cash + self.position * backtest.close
+
+    def statuses(self) -> List[str]:
+        return [
+            'REJECTED' if error is not None else ('FILLED' if filled else 'NEW')
+            for error, filled in zip(self.orders.error, self.filled)
+        ]
+
+    def summary(self) -> Dict[str, Any]:
+        """Totals in the quote asset; max_drawdown is the largest fall of equity from a previous high"""
+        drawdown = np.maximum.accumulate(self.equity) - self.equity if len(self.equity) else np.zeros(1)
+        statuses = self.statuses()
+        return {
+            'orders': len(self.orders),
+            'filled': statuses.count('FILLED'),
+            'unfilled': statuses.count('NEW'),
+            'rejected': statuses.count('REJECTED'),
+            'fees': float(self.fees.sum()),
+            'final_position': float(self.position[-1]) if len(self.position) else 0.0,
+            'pnl': float(self.equity[-1]) if len(self.equity) else 0.0,
+            'max_drawdown': float(drawdown.max()),
+        }
+
+    def fills(self) -> List[Dict[str, Any]]:
+        """One row per order, in the order they were given"""
+        rows = []
+        for i, status in enumerate(self.statuses()):
+            row = {
+                'time': int(self.orders.time[i]), 'status': status,
+                'side': 'BUY' if self.orders.buy[i] else 'SELL', 'type': self.orders.type[i],
+                'quantity': float(self.orders.quantity[i]), 'error': self.orders.error[i],
+                'fill_time': None, 'fill_price': None,
+            }
+            if self.filled[i]:
+                row['fill_time'] = int(self.open_time[self.fill_index[i]])
+                row['fill_price'] = float(self.fill_price[i])
+            rows.append(row)
+        return rows
@@ -0,0 +1,161 @@
+import os
+import threading
+from decimal import Decimal
+from typing import Dict, Any, List, Tuple
+
+from .logger import get_logger
+
+# Seconds between comparisons of the ledger with a REST account snapshot
+BALANCE_DRIFT_CHECK_INTERVAL = float(os.getenv('BALANCE_DRIFT_CHECK_INTERVAL', '300'))
+
+ZERO = Decimal(0)
+
+logger = get_logger('balances')
+
+
+def _format(value: Decimal) -> str:
+    return f"{value:.8f}"
+
+
+class BalanceLedger:
+    """
+    Free and locked balance per asset, kept current from the user-data stream
+
+    Seeded from one GET /account snapshot, then updated by
+    outboundAccountPosition (absolute balances of the assets that changed)
+    and balanceUpdate (deposit/withdrawal deltas). Each asset remembers the
+    event time of its last update, so events that are older than the
+    snapshot or than a newer position are ignored. Lookups are a single
+    dict access.
+
+    Orders that have passed the local balance check but not yet reached
+    the exchange hold a reservation against their asset, so a batch
+    checked before any of it is sent cannot spend the same free balance
+    twice.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # asset -> (free, locked, updated at in ms)
+        self._balances: Dict[str, Tuple[Decimal, Decimal, int]] = {}
+        # client order id -> (asset, amount), and the total reserved per asset
+        self._reservations: Dict[str, Tuple[str, Decimal]] = {}
+        self._reserved: Dict[str, Decimal] = {}
+        self.seeded = False
+
+    def seed(self, account: Dict[str, Any]):
+        """Replace every balance with those of a GET /account response"""
+        update_time = account.get('updateTime', 0)
+        balances = {
+            balance['asset']: (Decimal(balance['free']), Decimal(balance['locked']), update_time)
+            for balance in account['balances']
+        }
+        with self._lock:
+            self._balances = balances
+            self.seeded = True
+
+    def apply_account_position(self, event: Dict[str, Any]):
+        """Apply an outboundAccountPosition event"""
+        updated_at = event.get('u') or event['E']
+        with self._lock:
+            for balance in event['B']:
+                current = self._balances.get(balance['a'])
+                if current is not None and current[2] > updated_at:
+                    continue
+                self._balances[balance['a']] = (Decimal(balance['f']), Decimal(balance['l']), updated_at)
+
+    def apply_balance_update(self, event: Dict[str, Any]):
+        """Apply a balanceUpdate event"""
+        updated_at = event.get('T') or event['E']
+        with self._lock:
+            free, locked, last = self._balances.get(event['a'], (ZERO, ZERO, 0))
+            # Already included in the snapshot or a later position
+            if last >= updated_at:
+                return
+            self._balances[event['a']] = (free + Decimal(event['d']), locked, updated_at)
+
+    def get(self, asset: str) -> Dict[str, str]:
+        """Balance of one asset in the shape of GET /account balances"""
+        free, locked, _ = self._balances.get(asset, (ZERO, ZERO, 0))
+        return {'asset': asset, 'free': _format(free), 'locked': _format(locked)}
+
+    def free(self, asset: str) -> Decimal:
+        return self._balances.get(asset, (ZERO, ZERO, 0))[0]
+
+    def available(self, asset: str) -> Decimal:
+        """Free balance not yet reserved for orders being submitted"""
+        with self._lock:
+            return self.free(asset) - self._reserved.get(asset, ZERO)
+
+    def reserve(self, client_order_id: str, asset: str, amount: Decimal) -> bool:
+        """Set amount of asset aside for an order about to be sent; False if that much is not available"""
+        with self._lock:
+            reserved = self._reserved.get(asset, ZERO)
+            if self.free(asset) - reserved < amount:
+                return False
+            self._reservations[client_order_id] = (asset, amount)
+            self._reserved[asset] = reserved + amount
+            return True
+
+    def release(self, client_order_id: str):
+        """Drop an order's reservation once the exchange has answered it or it will not be sent"""
+        with self._lock:
+            reservation = self._reservations.pop(client_order_id, None)
+            if reservation is None:
+                return
+            asset, amount = reservation
+            remaining = self._reserved[asset] - amount
+            if remaining:
+                self._reserved[asset] = remaining
+            else:
+                del self._reserved[asset]
+
+    def total(self, asset: str) -> Decimal:
+        """Free plus locked balance"""
+        free, locked, _ = self._balances.get(asset, (ZERO, ZERO, 0))
+        return free + locked
+
+    def all(self) -> List[Dict[str, str]]:
+        with self._lock:
+            balances = list(self._balances.items())
+        return [
+            {'asset': asset, 'free': _format(free), 'locked': _format(locked)}
+            for asset, (free, locked, _) in balances
+        ]
+
+    def reconcile(self, account: Dict[str, Any], requested_at: int) -> Dict[str, Dict[str, str]]:
+        """
+        Compare the ledger with a REST snapshot and adopt the snapshot where they differ
+
+        Assets updated by the stream after requested_at (ms) are skipped,
+        since the snapshot may predate that update.
+
+        Returns:
+            The drifted assets, with the ledger and exchange balances
+        """
+        drifted = {}
+        update_time = account.get('updateTime', 0)
+        with self._lock:
+            exchange_assets = set()
+            for balance in account['balances']:
+                asset = balance['asset']
+                exchange_assets.add(asset)
+                free, locked = Decimal(balance['free']), Decimal(balance['locked'])
+                current_free, current_locked, updated_at = self._balances.get(asset, (ZERO, ZERO, 0))
+                if updated_at > requested_at:
+                    continue
+                if (free, locked) != (current_free, current_locked):
+                    drifted[asset] = {
+                        'ledger_free': _format(current_free), 'ledger_locked': _format(current_locked),
+                        'exchange_free': balance['free'], 'exchange_locked': balance['locked'],
+                    }
+                self._balances[asset] = (free, locked, max(updated_at, update_time))
+            for asset in set(self._balances) - exchange_assets:
+                free, locked, updated_at = self._balances[asset]
+                if updated_at <= requested_at and (free or locked):
+                    drifted[asset] = {
+                        'ledger_free': _format(free), 'ledger_locked': _format(locked),
+                        'exchange_free': _format(ZERO), 'exchange_locked': _format(ZERO),
+                    }
+                    del self._balances[asset]
+        return drifted
@@ -1,67 +1,250 @@
-from binance.client import Client
-from binance.exceptions import BinanceAPIException, BinanceOrderException
+from binance.client import Client, AsyncClient
+from binance.exceptions import BinanceAPIException
+import aiohttp
+import asyncio
 import os
+import re
 from dotenv import load_dotenv
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
 import time
+import uuid
+from decimal import Decimal
+from .balances import BalanceLedger, BALANCE_DRIFT_CHECK_INTERVAL
+from .clock import clock, CLOCK_BURST_SAMPLES
+from .coalescing import ReadCoalescer
+from .exchange_info import SymbolInfoCache
+from .logger import get_logger
+from .metrics import STAGE_SECONDS, BINANCE_REQUEST_SECONDS, BINANCE_ERRORS, ORDERS, RETRIES, BALANCE_DRIFTS
+from .order_book import OrderBookManager, ORDER_BOOK_SNAPSHOT_LIMIT
+from .order_store import OrderStore, as_api_order
+from .ticker_cache import TickerTable, TickerStream, TICKER_STREAM_ENABLED
+from .user_stream import UserDataStream, USER_STREAM_ENABLED
+from .ws_api import WebSocketAPIClient, ORDER_TRANSPORT
+from .rate_limiter import rate_limiter, api_path
+from .risk import RiskEngine, PendingOrders
+from .shared_state import shared_state
 
 # Load environment variables
-print("Current working directory:", os.getcwd())
-print("Looking for .env file...")
 load_dotenv()
 
+logger = get_logger('client')
+
+# REST base URL; point it at a local mock exchange for benchmarks and tests
+BINANCE_API_URL = os.getenv('BINANCE_API_URL', 'https://testnet.binance.vision/api')
+
+ORDER_TYPES = ['MARKET', 'LIMIT', 'STOP_LIMIT']
+ORDER_SIDES = ['BUY', 'SELL']
+SYMBOL_PATTERN = re.compile(r'^[A-Z0-9]+$')
+
+
+def build_order_params(
+    symbol: str,
+    quantity: float,
+    order_type: str,
+    side: str,
+    price: Optional[float] = None,
+    stop_price: Optional[float] = None
+) -> Dict[str, Any]:
+    """
+    Validate order inputs and build the parameters for Client.create_order
+    
+    Shared by the sync and async clients so that both send exactly the
+    same order to the exchange.
+    
+    Raises:
+        ValueError: If invalid parameters provided
+    """
+    if not symbol or not quantity or not order_type or not side:
+        raise ValueError("All parameters are required")
+    
+    if not SYMBOL_PATTERN.match(symbol):
+        raise ValueError("Invalid symbol format")
+    
+    if quantity <= 0:
+        raise ValueError("Quantity must be positive")
+    
+    if order_type not in ORDER_TYPES:
+        raise ValueError("Order type must be 'MARKET', 'LIMIT', or 'STOP_LIMIT'")
+    
+    if side not in ORDER_SIDES:
+        raise ValueError("Side must be 'BUY' or 'SELL'")
+    
+    if order_type in ['LIMIT', 'STOP_LIMIT'] and not price:
+        raise ValueError("Price is required for LIMIT and STOP_LIMIT orders")
+    
+    if order_type == 'STOP_LIMIT' and not stop_price:
+        raise ValueError("Stop price is required for STOP_LIMIT orders")
+    
+    if (price is not None and price < 0) or (stop_price is not None and stop_price < 0):
+        raise ValueError("Prices must be positive")
+    
+    order_params = {
+        'symbol': symbol,
+        'side': side,
+        'quantity': quantity,
+        # Our own id lets the order be journaled before the exchange assigns one
+        'newClientOrderId': uuid.uuid4().hex,
+    }
+    if order_type == 'MARKET':
+        order_params['type'] = 'MARKET'
+    elif order_type == 'LIMIT':
+        order_params['type'] = 'LIMIT'
+        order_params['price'] = price
+        order_params['timeInForce'] = 'GTC'
+    else:
+        # Spot names stop-limit orders STOP_LOSS_LIMIT
+        order_params['type'] = 'STOP_LOSS_LIMIT'
+        order_params['price'] = price
+        order_params['stopPrice'] = stop_price
+        order_params['timeInForce'] = 'GTC'
+    
+    return order_params
+
+
+def canceled_orders(responses: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Flatten a DELETE openOrders response; order lists (OCO) carry their orders in orderReports"""
+    orders = []
+    for response in responses:
+        orders.extend(response.get('orderReports') or [response])
+    return orders
+
+
+def api_error(e: Exception) -> Optional[BinanceAPIException]:
+    """The Binance API error behind an exception, looking through the client's plain Exception wrappers"""
+    error = e if isinstance(e, BinanceAPIException) else e.__context__
+    return error if isinstance(error, BinanceAPIException) else None
+
+
+def api_error_code(e: Exception) -> Optional[int]:
+    """Binance error code of an exception, or None if it is not an API error"""
+    error = api_error(e)
+    return error.code if error is not None else None
+
+
+def apply_clock(client, signed: bool, data: Optional[Dict[str, Any]]):
+    """Stamp a signed request with the disciplined clock offset and recvWindow"""
+    if signed and clock.synced:
+        client.timestamp_offset = clock.offset_ms
+        if data is not None:
+            data.setdefault('recvWindow', clock.recv_window)
+
+
+class RateLimitedClient(Client):
+    """python-binance Client that waits for rate-limit budget before each request"""
+    
+    API_TESTNET_URL = BINANCE_API_URL
+    
+    def _request(self, method, uri: str, signed: bool, force_params: bool = False, **kwargs):
+        # Wait before signing so the timestamp is taken when the request is sent
+        with STAGE_SECONDS.time('rate_limit_wait'):
+            rate_limiter.acquire_blocking(method, uri, kwargs.get('data'))
+        with STAGE_SECONDS.time('sign'):
+            apply_clock(self, signed, kwargs.get('data'))
+            kwargs = self._get_request_kwargs(method, signed, force_params, **kwargs)
+        
+        with BINANCE_REQUEST_SECONDS.time(method, api_path(uri) or 'other'):
+            response = getattr(self.session, method)(uri, **kwargs)
+        self.response = response
+        rate_limiter.update_from_response(response.headers, response.status_code)
+        try:
+            return self._handle_response(response)
+        except BinanceAPIException as e:
+            BINANCE_ERRORS.inc(str(e.code))
+            raise
+
+
+class RateLimitedAsyncClient(AsyncClient):
+    """python-binance AsyncClient that waits for rate-limit budget before each request"""
+    
+    API_TESTNET_URL = BINANCE_API_URL
+    
+    async def _request(self, method, uri: str, signed: bool, force_params: bool = False, **kwargs):
+        with STAGE_SECONDS.time('rate_limit_wait'):
+            await rate_limiter.acquire(method, uri, kwargs.get('data'))
+        with STAGE_SECONDS.time('sign'):
+            apply_clock(self, signed, kwargs.get('data'))
+            kwargs = self._get_request_kwargs(method, signed, force_params, **kwargs)
+        
+        with BINANCE_REQUEST_SECONDS.time(method, api_path(uri) or 'other'):
+            async with getattr(self.session, method)(uri, **kwargs) as response:
+                self.response = response
+                rate_limiter.update_from_response(response.headers, response.status)
+                try:
+                    return await self._handle_response(response)
+                except BinanceAPIException as e:
+                    BINANCE_ERRORS.inc(str(e.code))
+                    raise
+
+
 class BinanceClient:
     def __init__(self):
         """Initialize Binance client with Vision testnet configuration"""
         self.api_key = os.getenv('API_KEY')
         self.api_secret = os.getenv('API_SECRET')
         
-        print(f"API_KEY loaded: {self.api_key[:10] if self.api_key else 'None'}...")
-        print(f"API_SECRET loaded: {self.api_secret[:10] if self.api_secret else 'None'}...")
-        
         if not self.api_key or not self.api_secret:
             raise ValueError("API_KEY and API_SECRET must be set in .env file")
         
         # Initialize client for Vision testnet (spot trading)
-        self.client = Client(
+        self.client = RateLimitedClient(
             api_key=self.api_key,
             api_secret=self.api_secret,
             testnet=True
         )
         
         # Set to Vision testnet API URL
-        self.client.API_URL = 'https://testnet.binance.vision/api'
+        self.client.API_URL = BINANCE_API_URL
+        
+        logger.debug("Using API URL %s (testnet=%s)", self.client.API_URL, self.client.testnet)
+        
+        # exchangeInfo is loaded lazily on first use and then kept fresh
+        self.symbol_cache = SymbolInfoCache()
+        
+        # Identical concurrent reads share one request
+        self.reads = ReadCoalescer()
         
-        print(f"Using API URL: {self.client.API_URL}")
-        print(f"Testnet mode: {self.client.testnet}")
+        # Local order journal shared with the web app
+        self.orders = OrderStore()
         
-        # Sync time with Binance server
+        # Pre-trade limits; without streamed prices and balances only the notional of priced orders is checked
+        self.risk = RiskEngine()
+        
+        # Sync time with Binance server and keep it disciplined in the background
         self._sync_time()
+        clock.start_thread(self.client.get_server_time)
     
     def _sync_time(self):
         """Synchronize local time with Binance server time"""
         try:
-            server_time = self.client.get_server_time()
-            local_time = int(time.time() * 1000)
-            time_offset = server_time['serverTime'] - local_time
-            
-            print(f"Local time: {local_time}")
-            print(f"Server time: {server_time['serverTime']}")
-            print(f"Time offset: {time_offset}ms")
-            
-            # Set the time offset for future requests
-            self.client.timestamp_offset = time_offset
-            
-            # Also set the timestamp directly on the client
-            if hasattr(self.client, '_timestamp'):
-                self.client._timestamp = time_offset
-            
-            print(f"Time synchronized. Offset set to: {time_offset}ms")
+            clock.sample(self.client.get_server_time, CLOCK_BURST_SAMPLES)
+            self.client.timestamp_offset = clock.offset_ms
+            logger.info("Time synchronized", extra={'fields': clock.state()})
             
         except Exception as e:
-            print(f"Warning: Could not sync time with Binance server: {e}")
+            logger.warning("Could not sync time with Binance server: %s", e)
             # Continue without time sync
     
+    def _symbols(self) -> SymbolInfoCache:
+        """Return the symbol cache, loading it on first use and refreshing it in the background once stale"""
+        if not self.symbol_cache.loaded:
+            try:
+                # Threads arriving during the first load wait for it rather than finding the cache empty
+                self.reads.get_blocking('exchange_info', None, lambda: self.symbol_cache.update(self._fetch_exchange_info()))
+            except Exception as e:
+                logger.warning("Could not load exchange info: %s", e)
+        elif self.symbol_cache.is_stale():
+            self.symbol_cache.refresh_in_background(self._fetch_exchange_info)
+        return self.symbol_cache
+    
+    def _fetch_exchange_info(self) -> Dict[str, Any]:
+        """Download exchangeInfo (or take another worker's copy) and apply its rate limits to the limiter"""
+        if shared_state is not None:
+            exchange_info = shared_state.exchange_info(self.client.get_exchange_info, self.symbol_cache.ttl)
+        else:
+            exchange_info = self.client.get_exchange_info()
+        rate_limiter.configure(exchange_info.get('rateLimits', []))
+        return exchange_info
+    
     def place_order(
         self, 
         symbol: str, 
@@ -89,133 +272,51 @@ class BinanceClient:
             BinanceAPIException: If API call fails
             ValueError: If invalid parameters provided
         """
-        print(f"Placing order with API_KEY: {self.api_key[:10]}...")
-        print(f"Order details: {symbol}, {quantity}, {order_type}, {side}, price={price}, stop_price={stop_price}")
-        
+        submitted = False
         try:
-            # Validate inputs
-            if not symbol or not quantity or not order_type or not side:
-                raise ValueError("All parameters are required")
-            
-            if order_type not in ['MARKET', 'LIMIT', 'STOP_LIMIT']:
-                raise ValueError("Order type must be 'MARKET', 'LIMIT', or 'STOP_LIMIT'")
-            
-            if side not in ['BUY', 'SELL']:
-                raise ValueError("Side must be 'BUY' or 'SELL'")
-            
-            if order_type in ['LIMIT', 'STOP_LIMIT'] and not price:
-                raise ValueError("Price is required for LIMIT and STOP_LIMIT orders")
-            
-            if order_type == 'STOP_LIMIT' and not stop_price:
-                raise ValueError("Stop price is required for STOP_LIMIT orders")
-            
-            # Use the correct Spot trading methods
-            if order_type == "MARKET":
-                if side == "BUY":
-                    response = self.client.order_market_buy(
-                        symbol=symbol,
-                        quantity=quantity
-                    )
-                else:  # SELL
-                    response = self.client.order_market_sell(
-                        symbol=symbol,
-                        quantity=quantity
-                    )
-            elif order_type == "LIMIT":
-                if price is None:
-                    raise ValueError("Price is required for limit orders")
-                
-                if side == "BUY":
-                    response = self.client.order_limit_buy(
-                        symbol=symbol,
-                        quantity=quantity,
-                        price=price,
-                        timeInForce='GTC'
-                    )
-                else:  # SELL
-                    response = self.client.order_limit_sell(
-                        symbol=symbol,
-                        quantity=quantity,
-                        price=price,
-                        timeInForce='GTC'
-                    )
-            elif order_type == "STOP_LIMIT":
-                if price is None or stop_price is None:
-                    raise ValueError("Both price and stop_price are required for stop-limit orders")
-                
-                # For Stop-Limit orders, we use the generic order method
-                order_params = {
-                    'symbol': symbol,
-                    'side': side,
-                    'type': 'STOP_LOSS_LIMIT',
-                    'quantity': quantity,
-                    'price': price,
-                    'stopPrice': stop_price,
-                    'timeInForce': 'GTC'
-                }
-                
-                response = self.client.create_order(**order_params)
-            else:
-                raise ValueError("Invalid order type. Must be 'MARKET', 'LIMIT', or 'STOP_LIMIT'")
-            
-            print(f"Order placed successfully: {response}")
+            with STAGE_SECONDS.time('validate_order'):
+                order_params = build_order_params(symbol, quantity, order_type, side, price, stop_price)
+                # Reject orders that break LOT_SIZE/PRICE_FILTER/NOTIONAL or a risk limit before any network I/O
+                order_params = self._symbols().validate_order(order_params)
+                self.risk.check(order_params)
+            self.orders.record_submission(order_params)
+            submitted = True
+            response = self.client.create_order(**order_params)
+            ORDERS.inc(order_params['type'], order_params['side'], 'success')
+            self.reads.invalidate('open_orders')
+            self.orders.record_response(response)
+            logger.debug("Order placed: %s", response)
             return response
             
         except BinanceAPIException as e:
             # Handle timestamp errors specifically
             if e.code == -1021:  # Timestamp error
                 # Try to resync time and retry once
+                RETRIES.inc('timestamp')
                 try:
                     self._sync_time()
-                    # Retry the order with synced time
-                    if order_type == "MARKET":
-                        if side == "BUY":
-                            response = self.client.order_market_buy(
-                                symbol=symbol,
-                                quantity=quantity
-                            )
-                        else:  # SELL
-                            response = self.client.order_market_sell(
-                                symbol=symbol,
-                                quantity=quantity
-                            )
-                    elif order_type == "LIMIT":
-                        if side == "BUY":
-                            response = self.client.order_limit_buy(
-                                symbol=symbol,
-                                quantity=quantity,
-                                price=price,
-                                timeInForce='GTC'
-                            )
-                        else:  # SELL
-                            response = self.client.order_limit_sell(
-                                symbol=symbol,
-                                quantity=quantity,
-                                price=price,
-                                timeInForce='GTC'
-                            )
-                    elif order_type == "STOP_LIMIT":
-                        order_params = {
-                            'symbol': symbol,
-                            'side': side,
-                            'type': 'STOP_LOSS_LIMIT',
-                            'quantity': quantity,
-                            'price': price,
-                            'stopPrice': stop_price,
-                            'timeInForce': 'GTC'
-                        }
-                        response = self.client.create_order(**order_params)
-                    
-                    print(f"Order placed successfully after time sync: {response}")
+                    response = self.client.create_order(**order_params)
+                    ORDERS.inc(order_params['type'], order_params['side'], 'success')
+                    self.reads.invalidate('open_orders')
+                    self.orders.record_response(response)
+                    logger.debug("Order placed after time sync: %s", response)
                     return response
-                except BinanceAPIException as retry_e:
-                    print(f"Order failed after time sync retry: {retry_e}")
+                except Exception as retry_e:
+                    logger.warning("Order failed after time sync retry: %s", retry_e)
+                    ORDERS.inc(order_params['type'], order_params['side'], 'error')
+                    self.orders.record_failure(order_params['newClientOrderId'], str(retry_e))
                     raise retry_e
             else:
-                print(f"Order failed: {e}")
+                logger.warning("Order failed: %s", e)
+                ORDERS.inc(order_params['type'], order_params['side'], 'error')
+                self.orders.record_failure(order_params['newClientOrderId'], str(e))
                 raise e
         except Exception as e:
-            print(f"Unexpected error placing order: {e}")
+            logger.warning("Unexpected error placing order: %s", e)
+            # Timeouts and connection errors leave the journaled order PENDING_NEW otherwise
+            if submitted:
+                ORDERS.inc(order_params['type'], order_params['side'], 'error')
+                self.orders.record_failure(order_params['newClientOrderId'], str(e))
             raise e
     
     def get_account_info(self) -> Dict[str, Any]:
@@ -226,13 +327,12 @@ class BinanceClient:
             raise Exception(f"Failed to get account info: {str(e)}")
     
     def get_symbol_info(self, symbol: str) -> Dict[str, Any]:
-        """Get symbol information"""
+        """Get symbol information from the cached exchangeInfo"""
         try:
-            exchange_info = self.client.get_exchange_info()
-            for s in exchange_info['symbols']:
-                if s['symbol'] == symbol:
-                    return s
-            raise Exception(f"Symbol {symbol} not found")
+            symbol_info = self._symbols().get(symbol)
+            if symbol_info is None:
+                raise Exception(f"Symbol {symbol} not found")
+            return symbol_info
         except Exception as e:
             raise Exception(f"Failed to get symbol info: {str(e)}")
     
@@ -261,30 +361,749 @@ class BinanceClient:
         """Get current price for symbol or all symbols"""
         try:
             if symbol:
-                return self.client.get_symbol_ticker(symbol=symbol)
-            return self.client.get_all_tickers()
+                return self.reads.get_blocking('ticker', symbol, lambda: self.client.get_symbol_ticker(symbol=symbol))
+            return self.reads.get_blocking('ticker', None, self.client.get_all_tickers)
         except Exception as e:
             raise Exception(f"Failed to get ticker price: {str(e)}")
     
     def get_order_book(self, symbol: str, limit: int = 100) -> Dict[str, Any]:
         """Get order book for a symbol"""
         try:
-            return self.client.get_order_book(symbol=symbol, limit=limit)
+            return self.reads.get_blocking(
+                'order_book', (symbol, limit), lambda: self.client.get_order_book(symbol=symbol, limit=limit)
+            )
         except Exception as e:
             raise Exception(f"Failed to get order book: {str(e)}")
     
     def cancel_order(self, symbol: str, order_id: int) -> Dict[str, Any]:
         """Cancel an existing order"""
         try:
-            return self.client.cancel_order(symbol=symbol, orderId=order_id)
+            response = self.client.cancel_order(symbol=symbol, orderId=order_id)
+            self.reads.invalidate('open_orders')
+            self.orders.record_response(response)
+            return response
         except Exception as e:
             raise Exception(f"Failed to cancel order: {str(e)}")
     
+    def cancel_open_orders(self, symbol: str) -> List[Dict[str, Any]]:
+        """Cancel every open order of a symbol in one request (DELETE openOrders)"""
+        try:
+            responses = self.client._delete('openOrders', True, data={'symbol': symbol})
+            self.reads.invalidate('open_orders')
+            self.orders.record_orders(canceled_orders(responses))
+            return responses
+        except Exception as e:
+            raise Exception(f"Failed to cancel open orders: {str(e)}")
+    
     def get_open_orders(self, symbol: str = None) -> Dict[str, Any]:
         """Get all open orders or open orders for a specific symbol"""
         try:
             if symbol:
-                return self.client.get_open_orders(symbol=symbol)
-            return self.client.get_open_orders()
+                return self.reads.get_blocking('open_orders', symbol, lambda: self.client.get_open_orders(symbol=symbol))
+            return self.reads.get_blocking('open_orders', None, self.client.get_open_orders)
+        except Exception as e:
+            raise Exception(f"Failed to get open orders: {str(e)}")
+    
+    def get_order(self, symbol: str, order_id: int) -> Dict[str, Any]:
+        """Query one order's current state"""
+        try:
+            return self.client.get_order(symbol=symbol, orderId=order_id)
         except Exception as e:
-            raise Exception(f"Failed to get open orders: {str(e)}")
\ No newline at end of file
+            raise Exception(f"Failed to get order: {str(e)}")
+    
+    def get_all_orders(
+        self,
+        symbol: str,
+        order_id: Optional[int] = None,
+        start_time: Optional[int] = None,
+        limit: int = 1000
+    ) -> List[Dict[str, Any]]:
+        """
+        Get order history for a symbol
+        
+        Args:
+            symbol: Trading pair
+            order_id: Return orders with orderId >= this value
+            start_time: Return orders created at or after this time (ms)
+            limit: Page size, at most 1000
+        """
+        try:
+            return self.client.get_all_orders(symbol=symbol, orderId=order_id, startTime=start_time, limit=limit)
+        except Exception as e:
+            raise Exception(f"Failed to get order history: {str(e)}")
+    
+    def get_klines(
+        self,
+        symbol: str,
+        interval: str,
+        start_time: Optional[int] = None,
+        end_time: Optional[int] = None,
+        limit: int = 1000
+    ) -> List[List[Any]]:
+        """
+        Get candles for a symbol
+        
+        Args:
+            symbol: Trading pair
+            interval: Candle interval, e.g. 1m or 1h
+            start_time: Return candles opening at or after this time (ms)
+            end_time: Return candles opening at or before this time (ms)
+            limit: Page size, at most 1000
+        """
+        try:
+            return self.client.get_klines(symbol=symbol, interval=interval, startTime=start_time, endTime=end_time, limit=limit)
+        except Exception as e:
+            raise Exception(f"Failed to get klines: {str(e)}")
+
+
+class AsyncBinanceClient:
+    """
+    Asyncio counterpart of BinanceClient for use inside FastAPI handlers
+    
+    Requests go through a single aiohttp session whose connector keeps
+    connections to the exchange alive and pooled, so concurrent orders
+    do not block the event loop or pay a TLS handshake each time.
+    """
+    
+    POOL_SIZE = int(os.getenv('HTTP_POOL_SIZE', '100'))
+    KEEPALIVE_TIMEOUT = 30
+    # How long a request waits for warm-up before giving up
+    WARM_UP_TIMEOUT = float(os.getenv('WARM_UP_TIMEOUT', '10'))
+    
+    def __init__(self, client: AsyncClient):
+        self.client = client
+        self.symbol_cache = SymbolInfoCache()
+        self._symbol_refresh_task: Optional[asyncio.Task] = None
+        self._clock_task: Optional[asyncio.Task] = None
+        self.order_books = OrderBookManager(self._fetch_order_book_snapshot)
+        self.tickers = TickerTable()
+        self.ticker_stream = TickerStream(self.tickers)
+        # Identical concurrent REST reads share one request
+        self.reads = ReadCoalescer()
+        self._ready = asyncio.Event()
+        self.warm_up_seconds: Optional[float] = None
+        self.orders = OrderStore()
+        self.user_stream = UserDataStream(self.client)
+        self.user_stream.on('executionReport', self.orders.apply_execution_report)
+        self.user_stream.on_connect(self._reconcile_open_orders)
+        self._open_orders_synced = False
+        # Balances are read from the ledger while the stream keeps it current
+        self.balances = BalanceLedger()
+        self.user_stream.on('outboundAccountPosition', self.balances.apply_account_position)
+        self.user_stream.on('balanceUpdate', self.balances.apply_balance_update)
+        self.user_stream.on_connect(self._seed_balances)
+        self._balances_synced = False
+        self._balance_check_task: Optional[asyncio.Task] = None
+        # Pre-trade limits, checked against the streamed last price, ledger and journal
+        self.risk = RiskEngine()
+        # Orders go over the WebSocket API when selected and connected, otherwise REST
+        self.ws_api: Optional[WebSocketAPIClient] = None
+        if ORDER_TRANSPORT == 'ws':
+            self.ws_api = WebSocketAPIClient(client.API_KEY, client.API_SECRET)
+    
+    @classmethod
+    def connect(cls) -> 'AsyncBinanceClient':
+        """
+        Build the client and its pooled session without any network I/O
+        
+        Call warm_up() afterwards to sync time and load exchange metadata.
+        Must be called with a running event loop.
+        """
+        api_key = os.getenv('API_KEY')
+        api_secret = os.getenv('API_SECRET')
+        
+        if not api_key or not api_secret:
+            raise ValueError("API_KEY and API_SECRET must be set in .env file")
+        
+        connector = aiohttp.TCPConnector(
+            limit=cls.POOL_SIZE,
+            keepalive_timeout=cls.KEEPALIVE_TIMEOUT,
+            ttl_dns_cache=300
+        )
+        client = RateLimitedAsyncClient(
+            api_key=api_key,
+            api_secret=api_secret,
+            testnet=True,
+            session_params={'connector': connector}
+        )
+        return cls(client)
+    
+    @classmethod
+    async def create(cls) -> 'AsyncBinanceClient':
+        """Connect and wait for warm-up to finish"""
+        self = cls.connect()
+        await self.warm_up()
+        return self
+    
+    async def warm_up(self):
+        """
+        Sync time and load exchangeInfo concurrently, then start the
+        background clock, metadata and ticker tasks
+        
+        Failures are logged rather than raised so the client still becomes
+        ready; the exchange then validates what could not be checked locally.
+        """
+        started = time.perf_counter()
+        warm_ups = [self._sync_time(samples=1), self._load_symbols()]
+        if self.ws_api is not None:
+            self.ws_api.start()
+            warm_ups.append(self.ws_api.wait_connected(self.ws_api.timeout))
+        # One clock sample is enough to start; the discipline task refines it
+        await asyncio.gather(*warm_ups)
+        self._clock_task = asyncio.create_task(clock.discipline(self.client.get_server_time))
+        self._symbol_refresh_task = asyncio.create_task(self._refresh_symbols_periodically())
+        if TICKER_STREAM_ENABLED:
+            self.ticker_stream.start()
+        if USER_STREAM_ENABLED:
+            self.user_stream.start()
+            self._balance_check_task = asyncio.create_task(self._check_balance_drift_periodically())
+        self.warm_up_seconds = time.perf_counter() - started
+        self._ready.set()
+        logger.info("Exchange connection warmed up", extra={'fields': {
+            'warm_up_ms': round(self.warm_up_seconds * 1000, 1),
+            'symbols_loaded': self.symbol_cache.loaded,
+            'clock_synced': clock.synced,
+        }})
+    
+    @property
+    def ready(self) -> bool:
+        return self._ready.is_set()
+    
+    async def wait_ready(self, timeout: Optional[float] = None) -> bool:
+        """Wait up to timeout (default WARM_UP_TIMEOUT) seconds for warm-up; return whether it finished"""
+        try:
+            await asyncio.wait_for(self._ready.wait(), self.WARM_UP_TIMEOUT if timeout is None else timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+    
+    async def close(self):
+        """Stop background tasks and close the pooled HTTP session"""
+        for task in (self._symbol_refresh_task, self._clock_task, self._balance_check_task):
+            if task:
+                task.cancel()
+        await self.order_books.close()
+        await self.ticker_stream.close()
+        await self.user_stream.close()
+        if self.ws_api is not None:
+            await self.ws_api.close()
+        await self.client.close_connection()
+        self.orders.close()
+    
+    async def _load_symbols(self):
+        """Load exchangeInfo into the symbol cache, downloading it only if no other worker has a fresh copy"""
+        try:
+            if shared_state is not None:
+                exchange_info = await shared_state.exchange_info_async(self.client.get_exchange_info, self.symbol_cache.ttl)
+            else:
+                exchange_info = await self.client.get_exchange_info()
+            rate_limiter.configure(exchange_info.get('rateLimits', []))
+            self.symbol_cache.update(exchange_info)
+        except Exception as e:
+            logger.warning("Could not load exchange info: %s", e)
+    
+    async def _refresh_symbols_periodically(self):
+        """Reload exchangeInfo every TTL so readers never wait on it"""
+        while True:
+            await asyncio.sleep(self.symbol_cache.ttl)
+            await self._load_symbols()
+    
+    async def _sync_time(self, samples: int = CLOCK_BURST_SAMPLES):
+        """Synchronize local time with Binance server time"""
+        try:
+            await clock.sample_async(self.client.get_server_time, samples)
+            self.client.timestamp_offset = clock.offset_ms
+        except Exception as e:
+            logger.warning("Could not sync time with Binance server: %s", e)
+    
+    async def place_order(
+        self, 
+        symbol: str, 
+        quantity: float, 
+        order_type: str, 
+        side: str, 
+        price: Optional[float] = None,
+        stop_price: Optional[float] = None
+    ) -> Dict[str, Any]:
+        """Place an order without blocking the event loop (see BinanceClient.place_order)"""
+        order_params = self.prepare_order(symbol, quantity, order_type, side, price, stop_price)
+        return await self.submit_order(order_params)
+    
+    def prepare_order(
+        self, 
+        symbol: str, 
+        quantity: float, 
+        order_type: str, 
+        side: str, 
+        price: Optional[float] = None,
+        stop_price: Optional[float] = None,
+        pending: Optional[PendingOrders] = None
+    ) -> Dict[str, Any]:
+        """
+        Validate an order locally and return the parameters to submit
+        
+        Orders of a batch share `pending`, so each is checked against the
+        risk limits together with the ones prepared before it.
+        
+        Raises:
+            ValueError: If the order is malformed or breaks a symbol filter or risk limit
+        """
+        with STAGE_SECONDS.time('validate_order'):
+            order_params = build_order_params(symbol, quantity, order_type, side, price, stop_price)
+            last_price = self.tickers.last_price(symbol)
+            # MARKET orders are checked against MIN_NOTIONAL at the streamed last price
+            order_params = self.symbol_cache.validate_order(order_params, last_price)
+            # Position and open-order limits need the ledger and journal to be current
+            self.risk.check(
+                order_params, last_price,
+                position=(lambda: self._position(symbol)) if self.balances_live else None,
+                open_orders=(lambda: self.orders.open_order_count(symbol)) if self.orders_live else None,
+                open_notional=(lambda: self.orders.open_notional(symbol)) if self.orders_live else None,
+                pending=pending
+            )
+            if self.balances_live:
+                self._check_balance(order_params)
+            if pending is not None:
+                pending.add(order_params, last_price)
+            return order_params
+    
+    def _position(self, symbol: str) -> Optional[float]:
+        """Base asset held, free and locked, according to the balance ledger"""
+        symbol_info = self.symbol_cache.get(symbol)
+        if symbol_info is None:
+            return None
+        return float(self.balances.total(symbol_info['baseAsset']))
+    
+    def _check_balance(self, order_params: Dict[str, Any]):
+        """
+        Reject an order the ledger says the account cannot pay for
+        
+        SELL orders need the base asset; BUY orders need the quote asset at
+        the order price, or at the streamed last price for MARKET orders.
+        The amount is reserved until submit_order gets the exchange's answer
+        or the order is discarded.
+        
+        Raises:
+            ValueError: If the free balance not already reserved is too small
+        """
+        symbol_info = self.symbol_cache.get(order_params['symbol'])
+        if symbol_info is None:
+            return
+        quantity = Decimal(str(order_params['quantity']))
+        if order_params['side'] == 'SELL':
+            asset, needed = symbol_info['baseAsset'], quantity
+        else:
+            price = order_params.get('price') or self.tickers.last_price(order_params['symbol'])
+            if price is None:
+                return
+            asset, needed = symbol_info['quoteAsset'], quantity * Decimal(str(price))
+        if not self.balances.reserve(order_params['newClientOrderId'], asset, needed):
+            available = self.balances.available(asset)
+            raise ValueError(f"Insufficient {asset} balance: order needs {needed}, {available} is available")
+    
+    def discard_order(self, order_params: Dict[str, Any]):
+        """Give up an order from prepare_order that will not be submitted, releasing its balance reservation"""
+        self.balances.release(order_params['newClientOrderId'])
+    
+    async def submit_order(self, order_params: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Send an order prepared by prepare_order
+        
+        The disciplined clock makes -1021 timestamp rejections rare; if one
+        still happens the clock is resampled and the order retried once.
+        """
+        self.orders.record_submission(order_params)
+        try:
+            try:
+                response = await self._create_order(order_params)
+            except BinanceAPIException as e:
+                if e.code != -1021:
+                    raise
+                RETRIES.inc('timestamp')
+                await self._sync_time()
+                response = await self._create_order(order_params)
+        except Exception as e:
+            ORDERS.inc(order_params['type'], order_params['side'], 'error')
+            self.orders.record_failure(order_params['newClientOrderId'], str(e))
+            raise
+        finally:
+            # From here the exchange holds the funds of an accepted order
+            self.balances.release(order_params['newClientOrderId'])
+        ORDERS.inc(order_params['type'], order_params['side'], 'success')
+        self.reads.invalidate('open_orders')
+        self.orders.record_response(response)
+        return response
+    
+    def _ws_api_ready(self) -> bool:
+        return self.ws_api is not None and self.ws_api.connected
+    
+    async def _create_order(self, order_params: Dict[str, Any]) -> Dict[str, Any]:
+        if self._ws_api_ready():
+            return await self.ws_api.place_order(**order_params)
+        return await self.client.create_order(**order_params)
+    
+    async def place_orders(self, orders: List[Dict[str, Any]], concurrency: int = 10) -> List[Dict[str, Any]]:
+        """
+        Submit prepared orders concurrently, at most `concurrency` in flight
+        
+        Args:
+            orders: Order parameters from prepare_order
+            concurrency: Maximum number of simultaneous exchange calls
+        
+        Returns:
+            One result per order, in input order, with 'success' and either
+            'order' (the exchange response) or 'error'
+        """
+        semaphore = asyncio.Semaphore(concurrency)
+        
+        async def submit(order_params: Dict[str, Any]) -> Dict[str, Any]:
+            async with semaphore:
+                try:
+                    return {'success': True, 'order': await self.submit_order(order_params)}
+                except Exception as e:
+                    return {'success': False, 'error': str(e)}
+        
+        return await asyncio.gather(*(submit(order_params) for order_params in orders))
+    
+    async def get_account_info(self) -> Dict[str, Any]:
+        """Get spot account information"""
+        try:
+            return await self.client.get_account()
+        except Exception as e:
+            raise Exception(f"Failed to get account info: {str(e)}")
+    
+    async def get_symbol_info(self, symbol: str) -> Dict[str, Any]:
+        """Get symbol information from the cached exchangeInfo"""
+        try:
+            if not self.symbol_cache.loaded:
+                await self.reads.get('exchange_info', None, self._load_symbols)
+            symbol_info = self.symbol_cache.get(symbol)
+            if symbol_info is None:
+                raise Exception(f"Symbol {symbol} not found")
+            return symbol_info
+        except Exception as e:
+            raise Exception(f"Failed to get symbol info: {str(e)}")
+    
+    async def test_connectivity(self) -> bool:
+        """Test connection to Binance API"""
+        try:
+            await self.client.ping()
+            return True
+        except Exception:
+            return False
+    
+    async def get_balance(self, asset: str = None) -> Dict[str, Any]:
+        """
+        Get account balance for specific asset or all assets
+        
+        Answered from the balance ledger while the user-data stream is
+        live, otherwise from REST.
+        """
+        if self.balances_live:
+            return self.balances.get(asset) if asset else self.balances.all()
+        try:
+            account_info = await self.client.get_account()
+            if asset:
+                for balance in account_info['balances']:
+                    if balance['asset'] == asset:
+                        return balance
+                return {'asset': asset, 'free': '0.00000000', 'locked': '0.00000000'}
+            return account_info['balances']
+        except Exception as e:
+            raise Exception(f"Failed to get balance: {str(e)}")
+    
+    async def get_ticker_price(self, symbol: str = None) -> Dict[str, Any]:
+        """
+        Get current price for symbol or all symbols
+        
+        Prices come from the streamed ticker table. REST answers a symbol
+        the stream has not sent since it connected, and the all-symbols
+        request until every trading symbol has been seen; those answers
+        are filled into the table, so each symbol goes to REST once.
+        """
+        if symbol:
+            price = self.tickers.last_price(symbol)
+            if price is not None:
+                return {'symbol': symbol, 'price': repr(price)}
+        elif self.symbol_cache.loaded and self.tickers.has_prices(self.symbol_cache.trading_symbols()):
+            return self.tickers.all_prices()
+        try:
+            if symbol:
+                return await self.reads.get('ticker', symbol, lambda: self._fetch_ticker(symbol))
+            return await self.reads.get('ticker', None, self._fetch_all_tickers)
+        except Exception as e:
+            raise Exception(f"Failed to get ticker price: {str(e)}")
+    
+    async def _fetch_ticker(self, symbol: str) -> Dict[str, Any]:
+        requested_at = time.monotonic()
+        ticker = await self.client.get_symbol_ticker(symbol=symbol)
+        self.tickers.seed_last(symbol, float(ticker['price']), requested_at)
+        return ticker
+    
+    async def _fetch_all_tickers(self) -> List[Dict[str, Any]]:
+        requested_at = time.monotonic()
+        tickers = await self.client.get_all_tickers()
+        for ticker in tickers:
+            self.tickers.seed_last(ticker['symbol'], float(ticker['price']), requested_at)
+        return tickers
+    
+    async def get_book_ticker(self, symbol: str) -> Dict[str, Any]:
+        """Get best bid/ask for a symbol, subscribing to its bookTicker stream"""
+        book = self.tickers.book(symbol)
+        if book is not None:
+            return {'symbol': symbol, 'bidPrice': repr(book['bidPrice']), 'askPrice': repr(book['askPrice'])}
+        if TICKER_STREAM_ENABLED:
+            # Subscribed before the REST answer is filled in, so no later change is missed
+            await self.ticker_stream.track_book(symbol)
+        try:
+            return await self.reads.get('book_ticker', symbol, lambda: self._fetch_book_ticker(symbol))
+        except Exception as e:
+            raise Exception(f"Failed to get book ticker: {str(e)}")
+    
+    async def _fetch_book_ticker(self, symbol: str) -> Dict[str, Any]:
+        requested_at = time.monotonic()
+        ticker = await self.client.get_orderbook_ticker(symbol=symbol)
+        self.tickers.seed_book(symbol, float(ticker['bidPrice']), float(ticker['askPrice']), requested_at)
+        return ticker
+    
+    async def _fetch_order_book_snapshot(self, symbol: str) -> Dict[str, Any]:
+        return await self.client.get_order_book(symbol=symbol, limit=ORDER_BOOK_SNAPSHOT_LIMIT)
+    
+    async def get_order_book(self, symbol: str, limit: int = 100) -> Dict[str, Any]:
+        """
+        Get order book for a symbol
+        
+        Served from the locally maintained book once it is in sync; the
+        first request for a symbol starts its depth stream and falls back
+        to REST until the book is ready.
+        """
+        book = self.order_books.get(symbol)
+        if book is not None:
+            return book.snapshot(limit)
+        try:
+            order_book = await self.reads.get(
+                'order_book', (symbol, limit), lambda: self.client.get_order_book(symbol=symbol, limit=limit)
+            )
+        except Exception as e:
+            raise Exception(f"Failed to get order book: {str(e)}")
+        self.order_books.track(symbol)
+        return order_book
+    
+    async def cancel_order(
+        self, symbol: str, order_id: Optional[int] = None, client_order_id: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Cancel an existing order by orderId, or by clientOrderId before its orderId is known"""
+        if order_id is None and client_order_id is None:
+            raise ValueError("Either order_id or client_order_id is required")
+        try:
+            if self._ws_api_ready():
+                response = await self.ws_api.cancel_order(symbol, order_id, client_order_id)
+            elif order_id is not None:
+                response = await self.client.cancel_order(symbol=symbol, orderId=order_id)
+            else:
+                response = await self.client.cancel_order(symbol=symbol, origClientOrderId=client_order_id)
+        except Exception as e:
+            raise Exception(f"Failed to cancel order: {str(e)}")
+        self.reads.invalidate('open_orders')
+        self.orders.record_response(response)
+        return response
+    
+    async def cancel_open_orders(self, symbol: str) -> List[Dict[str, Any]]:
+        """
+        Cancel every open order of a symbol in one request (DELETE openOrders)
+        
+        Returns:
+            Binance's cancel responses, one per order or order list
+        """
+        try:
+            if self._ws_api_ready():
+                responses = await self.ws_api.cancel_open_orders(symbol)
+            else:
+                responses = await self.client._delete('openOrders', True, data={'symbol': symbol})
+        except Exception as e:
+            raise Exception(f"Failed to cancel open orders: {str(e)}")
+        self.reads.invalidate('open_orders')
+        self.orders.record_orders(canceled_orders(responses))
+        return responses
+    
+    async def cancel_orders(
+        self,
+        symbol: Optional[str] = None,
+        side: Optional[str] = None,
+        min_price: Optional[float] = None,
+        max_price: Optional[float] = None,
+        older_than: Optional[float] = None,
+        concurrency: int = 10
+    ) -> Dict[str, Any]:
+        """
+        Cancel the open orders that match every given filter
+        
+        Without side, price or age filters each symbol is cleared with one
+        DELETE openOrders. Otherwise the matching orders are cancelled one
+        by one, at most `concurrency` at a time; cancels take priority over
+        reads in the rate limiter.
+        
+        Args:
+            symbol: Only this symbol (default every symbol)
+            side: Only BUY or SELL orders
+            min_price: Only orders priced at or above this
+            max_price: Only orders priced at or below this
+            older_than: Only orders placed more than this many seconds ago
+        
+        Returns:
+            'canceled' with the cancel responses and 'failed' with the
+            symbol, orderId and clientOrderId (only the symbol, for a bulk
+            cancel) and error of each failure
+        """
+        canceled: List[Dict[str, Any]] = []
+        failed: List[Dict[str, Any]] = []
+        semaphore = asyncio.Semaphore(concurrency)
+        
+        if side is None and min_price is None and max_price is None and older_than is None:
+            # A named symbol is cleared straight away, without listing its orders first
+            symbols = [symbol] if symbol else sorted({order['symbol'] for order in await self.get_open_orders()})
+            
+            async def clear(name: str):
+                async with semaphore:
+                    try:
+                        canceled.extend(canceled_orders(await self.cancel_open_orders(name)))
+                    except Exception as e:
+                        # -2011: the symbol had no open orders left
+                        if api_error_code(e) != -2011:
+                            failed.append({'symbol': name, 'error': str(e)})
+            
+            await asyncio.gather(*(clear(name) for name in symbols))
+            return {'canceled': canceled, 'failed': failed}
+        
+        open_orders = await self.get_open_orders(symbol)
+        # Order times are server times
+        cutoff = None if older_than is None else int(time.time() * 1000) + clock.offset_ms - older_than * 1000
+        # Journaled orders still being submitted may have no price (MARKET) and no orderId yet
+        price_filter = min_price is not None or max_price is not None
+        matching = [
+            order for order in open_orders
+            if (side is None or order['side'] == side)
+            and (not price_filter or order.get('price') is not None)
+            and (min_price is None or float(order['price']) >= min_price)
+            and (max_price is None or float(order['price']) <= max_price)
+            and (cutoff is None or (order.get('time') or 0) <= cutoff)
+        ]
+        
+        async def cancel(order: Dict[str, Any]):
+            async with semaphore:
+                try:
+                    if order.get('orderId') is not None:
+                        canceled.append(await self.cancel_order(order['symbol'], order['orderId']))
+                    else:
+                        canceled.append(await self.cancel_order(order['symbol'], client_order_id=order['clientOrderId']))
+                except Exception as e:
+                    failed.append({
+                        'symbol': order['symbol'], 'orderId': order.get('orderId'),
+                        'clientOrderId': order.get('clientOrderId'), 'error': str(e),
+                    })
+        
+        await asyncio.gather(*(cancel(order) for order in matching))
+        return {'canceled': canceled, 'failed': failed}
+    
+    @property
+    def orders_live(self) -> bool:
+        """Whether the order journal is being kept current by the user-data stream"""
+        return self.user_stream.connected and self._open_orders_synced
+    
+    @property
+    def balances_live(self) -> bool:
+        """Whether the balance ledger is being kept current by the user-data stream"""
+        return self.user_stream.connected and self._balances_synced
+    
+    async def _seed_balances(self):
+        """Reload the balance ledger from REST after the user stream (re)connects"""
+        self._balances_synced = False
+        self.balances.seed(await self.client.get_account())
+        self._balances_synced = True
+    
+    async def _check_balance_drift_periodically(self):
+        """Compare the ledger with a REST snapshot every BALANCE_DRIFT_CHECK_INTERVAL and correct it"""
+        while True:
+            await asyncio.sleep(BALANCE_DRIFT_CHECK_INTERVAL)
+            if not self.balances_live:
+                continue
+            try:
+                # Event times are server times, so the cut-off is too
+                requested_at = int(time.time() * 1000) + clock.offset_ms
+                drifted = self.balances.reconcile(await self.client.get_account(), requested_at)
+            except Exception as e:
+                logger.warning("Balance drift check failed: %s", e)
+                continue
+            for asset, balances in drifted.items():
+                BALANCE_DRIFTS.inc(asset)
+                logger.warning("Balance ledger drifted from the exchange", extra={'fields': {'asset': asset, **balances}})
+    
+    async def _reconcile_open_orders(self):
+        """
+        Bring the journal up to date after the user stream (re)connects
+        
+        Open orders are loaded from REST, and journaled orders that are no
+        longer open are queried once for their final status. Orders whose
+        response never arrived (a crash or timeout after they were
+        journaled) are queried by clientOrderId, and marked REJECTED when
+        the exchange does not know them (-2013).
+        """
+        self._open_orders_synced = False
+        open_orders = await self.client.get_open_orders()
+        open_ids = {(order['symbol'], order['orderId']) for order in open_orders}
+        for order in open_orders:
+            self.orders.record_order(order)
+        
+        stale = [row for row in self.orders.open_orders() if (row['symbol'], row['order_id']) not in open_ids]
+        results = await asyncio.gather(
+            *(
+                self.client.get_order(symbol=row['symbol'], orderId=row['order_id']) if row['order_id'] is not None
+                else self.client.get_order(symbol=row['symbol'], origClientOrderId=row['client_order_id'])
+                for row in stale
+            ),
+            return_exceptions=True
+        )
+        for row, result in zip(stale, results):
+            if isinstance(result, dict):
+                self.orders.record_order(result)
+            elif row['order_id'] is None and api_error_code(result) == -2013:
+                self.orders.record_failure(row['client_order_id'], 'Order never reached the exchange')
+        self._open_orders_synced = True
+    
+    async def get_open_orders(self, symbol: str = None) -> Dict[str, Any]:
+        """
+        Get all open orders or open orders for a specific symbol
+        
+        Answered from the local journal while the user-data stream is live,
+        otherwise from REST.
+        """
+        if self.orders_live:
+            return [as_api_order(row) for row in self.orders.open_orders(symbol)]
+        try:
+            return await self.reads.get('open_orders', symbol, lambda: self._fetch_open_orders(symbol))
+        except Exception as e:
+            raise Exception(f"Failed to get open orders: {str(e)}")
+    
+    async def _fetch_open_orders(self, symbol: Optional[str]) -> List[Dict[str, Any]]:
+        if self._ws_api_ready():
+            return await self.ws_api.get_open_orders(symbol)
+        if symbol:
+            return await self.client.get_open_orders(symbol=symbol)
+        return await self.client.get_open_orders()
+    
+    async def get_order(self, symbol: str, order_id: int) -> Dict[str, Any]:
+        """Get one order, from the local journal when it is live"""
+        if self.orders_live:
+            row = self.orders.get_order(symbol, order_id)
+            if row is not None:
+                return as_api_order(row)
+        try:
+            order = await self.client.get_order(symbol=symbol, orderId=order_id)
+        except Exception as e:
+            raise Exception(f"Failed to get order: {str(e)}")
+        self.orders.record_order(order)
+        return order
+    
+    def get_fills(self, symbol: str, order_id: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Fills recorded in the local journal for a symbol or one order"""
+        return self.orders.fills(symbol, order_id)
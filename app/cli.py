@@ -0,0 +1,12 @@
+"""Argument helpers shared by the command line scripts"""
+from datetime import datetime, timezone
+
+
+def parse_since(value: str) -> int:
+    """Accept epoch milliseconds or an ISO date/datetime (UTC if no zone given)"""
+    if value.isdigit():
+        return int(value)
+    moment = datetime.fromisoformat(value)
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return int(moment.timestamp() * 1000)
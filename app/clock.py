@@ -0,0 +1,168 @@
+import asyncio
+import math
+import os
+import statistics
+import threading
+import time
+from collections import deque
+from typing import Optional, Dict, Any, Callable, Awaitable
+
+from .logger import get_logger
+from .shared_state import SharedState, shared_state, SHARED_CLOCK_POLL
+
+CLOCK_SYNC_INTERVAL = float(os.getenv('CLOCK_SYNC_INTERVAL', '30'))
+CLOCK_BURST_SAMPLES = int(os.getenv('CLOCK_BURST_SAMPLES', '4'))
+RECV_WINDOW_MIN = int(os.getenv('RECV_WINDOW_MIN', '2000'))
+RECV_WINDOW_MAX = 60000
+RECV_WINDOW_MARGIN = int(os.getenv('RECV_WINDOW_MARGIN', '500'))
+
+logger = get_logger('clock')
+
+
+class ClockEstimator:
+    """
+    Estimates the offset between the local clock and Binance server time
+
+    Each sample records when a GET /time request left and came back; the
+    server timestamp is assumed to fall half way, so the offset of a
+    sample is only uncertain by half its round trip. The estimate uses
+    the sample with the smallest round trip in the recent window, shifted
+    back by that uncertainty plus observed jitter so requests are never
+    stamped ahead of the server. recvWindow is sized from the same
+    round-trip and jitter figures.
+
+    With shared state attached, only the worker holding the leader lock
+    samples; it publishes each estimate and the other workers adopt it.
+    """
+
+    def __init__(self, window: int = 16, shared: Optional[SharedState] = None):
+        self._lock = threading.Lock()
+        self.shared = shared
+        self.samples = deque(maxlen=window)
+        self.offset_ms = 0
+        self.recv_window = 5000
+        self.jitter_ms = 0.0
+        self.min_rtt_ms = 0.0
+        self.synced_at = 0.0
+        self._thread: Optional[threading.Thread] = None
+
+    def add_sample(self, sent: float, server_time_ms: int, received: float):
+        """
+        Record one GET /time round trip
+
+        Args:
+            sent: time.time() just before the request
+            server_time_ms: serverTime from the response
+            received: time.time() just after the response
+        """
+        rtt = (received - sent) * 1000
+        offset = server_time_ms - (sent + received) * 500
+        with self._lock:
+            self.samples.append((rtt, offset))
+            self._recompute()
+        if self.shared is not None and self.shared.leading:
+            self.shared.publish_clock(self.offset_ms, self.recv_window, self.jitter_ms, self.min_rtt_ms)
+
+    def _recompute(self):
+        rtts = sorted(rtt for rtt, _ in self.samples)
+        min_rtt, best_offset = min(self.samples)
+        offsets = [offset for _, offset in self.samples]
+        jitter = statistics.pstdev(offsets) if len(offsets) > 1 else min_rtt / 2
+
+        uncertainty = min_rtt / 2 + 2 * jitter
+        p95_rtt = rtts[min(len(rtts) - 1, int(len(rtts) * 0.95))]
+        recv_window = math.ceil(p95_rtt + 2 * uncertainty + RECV_WINDOW_MARGIN)
+
+        self.offset_ms = int(best_offset - uncertainty)
+        self.recv_window = max(RECV_WINDOW_MIN, min(RECV_WINDOW_MAX, recv_window))
+        self.jitter_ms = jitter
+        self.min_rtt_ms = min_rtt
+        self.synced_at = time.monotonic()
+
+    def adopt_shared(self) -> bool:
+        """Take over the estimate published by the leading worker; return whether there was one"""
+        published = self.shared.clock()
+        if published is None:
+            return False
+        with self._lock:
+            self.offset_ms = published['offset_ms']
+            self.recv_window = published['recv_window']
+            self.jitter_ms = published['jitter_ms']
+            self.min_rtt_ms = published['min_rtt_ms']
+            self.synced_at = time.monotonic()
+        return True
+
+    def _following(self) -> bool:
+        """Whether another worker samples for this one"""
+        return self.shared is not None and not self.shared.try_lead()
+
+    @property
+    def synced(self) -> bool:
+        return self.synced_at > 0
+
+    def state(self) -> Dict[str, Any]:
+        """Current estimate for monitoring"""
+        with self._lock:
+            return {
+                'offset_ms': self.offset_ms,
+                'recv_window': self.recv_window,
+                'jitter_ms': round(self.jitter_ms, 3),
+                'min_rtt_ms': round(self.min_rtt_ms, 3),
+                'samples': len(self.samples),
+                'leader': None if self.shared is None else self.shared.leading,
+            }
+
+    def sample(self, get_server_time: Callable[[], Dict[str, Any]], count: int = 1):
+        """Take samples with a blocking get_server_time call"""
+        for _ in range(count):
+            sent = time.time()
+            server_time = get_server_time()
+            self.add_sample(sent, server_time['serverTime'], time.time())
+
+    async def sample_async(self, get_server_time: Callable[[], Awaitable[Dict[str, Any]]], count: int = 1):
+        """Take samples with an awaitable get_server_time call"""
+        for _ in range(count):
+            sent = time.time()
+            server_time = await get_server_time()
+            self.add_sample(sent, server_time['serverTime'], time.time())
+
+    async def discipline(self, get_server_time: Callable[[], Awaitable[Dict[str, Any]]]):
+        """Sample a burst now and every CLOCK_SYNC_INTERVAL seconds until cancelled"""
+        while True:
+            if self._following():
+                self.adopt_shared()
+                await asyncio.sleep(SHARED_CLOCK_POLL)
+                continue
+            try:
+                await self.sample_async(get_server_time, CLOCK_BURST_SAMPLES)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning("Could not sample Binance server time: %s", e)
+            await asyncio.sleep(CLOCK_SYNC_INTERVAL)
+
+    def start_thread(self, get_server_time: Callable[[], Dict[str, Any]]) -> threading.Thread:
+        """Run the sampling loop on a daemon thread for synchronous clients"""
+        if self._thread is not None and self._thread.is_alive():
+            return self._thread
+
+        def run():
+            while True:
+                if self._following():
+                    time.sleep(SHARED_CLOCK_POLL)
+                    self.adopt_shared()
+                    continue
+                time.sleep(CLOCK_SYNC_INTERVAL)
+                try:
+                    self.sample(get_server_time, CLOCK_BURST_SAMPLES)
+                except Exception as e:
+                    logger.warning("Could not sample Binance server time: %s", e)
+
+        self._thread = threading.Thread(target=run, name='clock-discipline', daemon=True)
+        self._thread.start()
+        return self._thread
+
+
+# Clock offset is a property of the host, so the whole process (and, with
+# SHARED_STATE_DIR set, every worker) shares one estimate
+clock = ClockEstimator(shared=shared_state)
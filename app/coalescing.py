@@ -0,0 +1,122 @@
+import asyncio
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Optional, Dict, Any, Callable, Awaitable, Hashable, Tuple
+
+from .metrics import READ_REQUESTS
+
+# Seconds a read result is reused after it arrives; 0 only shares calls that are in flight
+READ_CACHE_TTLS = {
+    'ticker': float(os.getenv('TICKER_CACHE_TTL', '0.5')),
+    'book_ticker': float(os.getenv('TICKER_CACHE_TTL', '0.5')),
+    'order_book': float(os.getenv('ORDER_BOOK_CACHE_TTL', '0.25')),
+    'exchange_info': 0.0,
+    'open_orders': 0.0,
+}
+READ_CACHE_MAX_ENTRIES = int(os.getenv('READ_CACHE_MAX_ENTRIES', '1024'))
+
+
+class ReadCoalescer:
+    """
+    Single-flight reads with a short-lived LRU cache
+
+    Concurrent calls for the same (endpoint, key) share one in-flight
+    request: the first caller fetches and the rest wait for its result or
+    exception. Results of endpoints with a TTL are kept that long in a
+    cache bounded at max_entries, evicting the least recently used entry.
+    Shared results are the same object for every caller and must not be
+    modified. Async callers and threads can both use it.
+    """
+
+    def __init__(self, ttls: Optional[Dict[str, float]] = None, max_entries: int = READ_CACHE_MAX_ENTRIES):
+        self.ttls = dict(READ_CACHE_TTLS if ttls is None else ttls)
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        # (endpoint, key) -> (expires at, result), least recently used first
+        self._cache: 'OrderedDict[Tuple[str, Hashable], Tuple[float, Any]]' = OrderedDict()
+        self._in_flight: Dict[Tuple[str, Hashable], Future] = {}
+
+    def _lookup(self, endpoint: str, key: Hashable) -> Tuple[bool, Any, Optional[Future], bool]:
+        """Return (cached, result, future, leader); the leader must fetch and resolve the future"""
+        cache_key = (endpoint, key)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._cache.get(cache_key)
+            if entry is not None:
+                if entry[0] > now:
+                    self._cache.move_to_end(cache_key)
+                    READ_REQUESTS.inc(endpoint, 'cache')
+                    return True, entry[1], None, False
+                del self._cache[cache_key]
+            future = self._in_flight.get(cache_key)
+            if future is not None:
+                READ_REQUESTS.inc(endpoint, 'shared')
+                return False, None, future, False
+            future = self._in_flight[cache_key] = Future()
+            READ_REQUESTS.inc(endpoint, 'exchange')
+            return False, None, future, True
+
+    def _finish(self, endpoint: str, key: Hashable, future: Future, result: Any = None, error: Optional[BaseException] = None):
+        cache_key = (endpoint, key)
+        with self._lock:
+            # invalidate() may already have detached this call
+            if self._in_flight.get(cache_key) is future:
+                del self._in_flight[cache_key]
+                ttl = self.ttls.get(endpoint, 0.0)
+                if error is None and ttl > 0:
+                    self._cache[cache_key] = (time.monotonic() + ttl, result)
+                    self._cache.move_to_end(cache_key)
+                    while len(self._cache) > self.max_entries:
+                        self._cache.popitem(last=False)
+        if future.done():
+            return
+        if error is None:
+            future.set_result(result)
+        else:
+            future.set_exception(error)
+
+    async def get(self, endpoint: str, key: Hashable, fetch: Callable[[], Awaitable[Any]]) -> Any:
+        """Return the result of await fetch(), shared with identical concurrent calls"""
+        cached, result, future, leader = self._lookup(endpoint, key)
+        if cached:
+            return result
+        if leader:
+            # The fetch runs as its own task so a cancelled leader does not fail the others
+            task = asyncio.ensure_future(fetch())
+            task.add_done_callback(lambda done: self._finish_task(endpoint, key, future, done))
+        # Shielded, so a caller that is cancelled does not cancel the future the others wait on
+        return await asyncio.shield(asyncio.wrap_future(future))
+
+    def _finish_task(self, endpoint: str, key: Hashable, future: Future, task: asyncio.Future):
+        if task.cancelled():
+            self._finish(endpoint, key, future, error=asyncio.CancelledError())
+        elif task.exception() is not None:
+            self._finish(endpoint, key, future, error=task.exception())
+        else:
+            self._finish(endpoint, key, future, task.result())
+
+    def get_blocking(self, endpoint: str, key: Hashable, fetch: Callable[[], Any]) -> Any:
+        """Thread version of get for the synchronous client"""
+        cached, result, future, leader = self._lookup(endpoint, key)
+        if cached:
+            return result
+        if not leader:
+            return future.result()
+        try:
+            result = fetch()
+        except BaseException as e:
+            self._finish(endpoint, key, future, error=e)
+            raise
+        self._finish(endpoint, key, future, result)
+        return result
+
+    def invalidate(self, endpoint: str):
+        """Forget cached and in-flight results of an endpoint, e.g. after an order changes"""
+        with self._lock:
+            for cache_key in [k for k in self._cache if k[0] == endpoint]:
+                del self._cache[cache_key]
+            for cache_key in [k for k in self._in_flight if k[0] == endpoint]:
+                del self._in_flight[cache_key]
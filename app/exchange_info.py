@@ -0,0 +1,232 @@
+import os
+import threading
+import time
+from decimal import Decimal, ROUND_DOWN, ROUND_HALF_UP
+from typing import Optional, Dict, Any, List
+
+from .logger import get_logger
+
+EXCHANGE_INFO_TTL = float(os.getenv('EXCHANGE_INFO_TTL', '900'))
+# Seconds between refresh attempts while the cache is stale, so a failing
+# exchangeInfo call (weight 20) is not retried on every lookup
+EXCHANGE_INFO_RETRY = float(os.getenv('EXCHANGE_INFO_RETRY', '60'))
+
+logger = get_logger('exchange_info')
+
+
+class SymbolFilters:
+    """
+    LOT_SIZE, PRICE_FILTER and (MIN_)NOTIONAL limits for one symbol
+
+    Filter strings are parsed to Decimal once when exchangeInfo is loaded
+    so that checking an order is pure arithmetic.
+    """
+
+    __slots__ = (
+        'symbol', 'status', 'min_qty', 'max_qty', 'step_size',
+        'min_price', 'max_price', 'tick_size',
+        'min_notional', 'max_notional', 'notional_applies_to_market',
+    )
+
+    def __init__(self, symbol_info: Dict[str, Any]):
+        self.symbol = symbol_info['symbol']
+        self.status = symbol_info.get('status', 'TRADING')
+        self.min_qty = self.max_qty = self.step_size = None
+        self.min_price = self.max_price = self.tick_size = None
+        self.min_notional = self.max_notional = None
+        self.notional_applies_to_market = True
+
+        for f in symbol_info.get('filters', []):
+            filter_type = f.get('filterType')
+            if filter_type == 'LOT_SIZE':
+                self.min_qty = _decimal_or_none(f.get('minQty'))
+                self.max_qty = _decimal_or_none(f.get('maxQty'))
+                self.step_size = _decimal_or_none(f.get('stepSize'))
+            elif filter_type == 'PRICE_FILTER':
+                self.min_price = _decimal_or_none(f.get('minPrice'))
+                self.max_price = _decimal_or_none(f.get('maxPrice'))
+                self.tick_size = _decimal_or_none(f.get('tickSize'))
+            elif filter_type == 'MIN_NOTIONAL':
+                self.min_notional = _decimal_or_none(f.get('minNotional'))
+                self.notional_applies_to_market = bool(f.get('applyToMarket', True))
+            elif filter_type == 'NOTIONAL':
+                self.min_notional = _decimal_or_none(f.get('minNotional'))
+                self.max_notional = _decimal_or_none(f.get('maxNotional'))
+                self.notional_applies_to_market = bool(f.get('applyMinToMarket', True))
+
+    def round_quantity(self, quantity) -> Decimal:
+        """Round quantity down to the LOT_SIZE step"""
+        return _round_to_step(Decimal(str(quantity)), self.step_size, ROUND_DOWN)
+
+    def round_price(self, price) -> Decimal:
+        """Round price to the nearest PRICE_FILTER tick"""
+        return _round_to_step(Decimal(str(price)), self.tick_size, ROUND_HALF_UP)
+
+    def apply(self, order_params: Dict[str, Any], reference_price: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Round an order to the symbol's step/tick sizes and check its limits
+
+        Args:
+            order_params: Parameters produced by build_order_params
+            reference_price: Price used for the notional check of MARKET
+                orders; the check is skipped when it is not known
+
+        Returns:
+            A copy of order_params with quantity/price/stopPrice rounded and
+            formatted as plain decimal strings
+
+        Raises:
+            ValueError: If the order violates a symbol filter
+        """
+        if self.status != 'TRADING':
+            raise ValueError(f"Symbol {self.symbol} is not trading (status {self.status})")
+
+        params = dict(order_params)
+
+        quantity = self.round_quantity(params['quantity'])
+        if quantity <= 0:
+            raise ValueError(f"Quantity {params['quantity']} is below LOT_SIZE stepSize {self.step_size}")
+        if self.min_qty is not None and quantity < self.min_qty:
+            raise ValueError(f"Quantity {quantity} is below LOT_SIZE minQty {self.min_qty}")
+        if self.max_qty and quantity > self.max_qty:
+            raise ValueError(f"Quantity {quantity} is above LOT_SIZE maxQty {self.max_qty}")
+        params['quantity'] = _format_decimal(quantity)
+
+        for key in ('price', 'stopPrice'):
+            if params.get(key) is None:
+                continue
+            value = self.round_price(params[key])
+            if value <= 0:
+                raise ValueError(f"{key} {params[key]} is below PRICE_FILTER tickSize {self.tick_size}")
+            if self.min_price and value < self.min_price:
+                raise ValueError(f"{key} {value} is below PRICE_FILTER minPrice {self.min_price}")
+            if self.max_price and value > self.max_price:
+                raise ValueError(f"{key} {value} is above PRICE_FILTER maxPrice {self.max_price}")
+            params[key] = _format_decimal(value)
+
+        if params['type'] == 'MARKET':
+            price = None
+            if reference_price and self.notional_applies_to_market:
+                price = Decimal(str(reference_price))
+        else:
+            price = Decimal(params['price'])
+
+        if price is not None:
+            notional = quantity * price
+            if self.min_notional is not None and notional < self.min_notional:
+                raise ValueError(f"Order notional {notional} is below minNotional {self.min_notional}")
+            if self.max_notional and notional > self.max_notional:
+                raise ValueError(f"Order notional {notional} is above maxNotional {self.max_notional}")
+
+        return params
+
+
+class SymbolInfoCache:
+    """
+    exchangeInfo indexed by symbol
+
+    The payload is downloaded once and then refreshed in the background
+    when it is older than the TTL; readers always get the last good copy
+    without waiting on the network. A refresh starts at most once per
+    retry interval, whether or not the previous one succeeded.
+    """
+
+    def __init__(self, ttl: float = EXCHANGE_INFO_TTL, retry: float = EXCHANGE_INFO_RETRY):
+        self.ttl = ttl
+        self.retry = retry
+        self.loaded_at = 0.0
+        self.attempted_at = 0.0
+        self._symbols: Dict[str, Dict[str, Any]] = {}
+        self._filters: Dict[str, SymbolFilters] = {}
+        self._trading: List[str] = []
+        self._refresh_lock = threading.Lock()
+        self._attempt_lock = threading.Lock()
+
+    @property
+    def loaded(self) -> bool:
+        return self.loaded_at > 0
+
+    def is_stale(self) -> bool:
+        return time.monotonic() - self.loaded_at > self.ttl
+
+    def _start_attempt(self) -> bool:
+        """Claim a refresh attempt unless one started within the retry interval"""
+        with self._attempt_lock:
+            now = time.monotonic()
+            if self.attempted_at and now - self.attempted_at < self.retry:
+                return False
+            self.attempted_at = now
+            return True
+
+    def update(self, exchange_info: Dict[str, Any]):
+        """Replace the cached metadata with a fresh exchangeInfo payload"""
+        symbols = {s['symbol']: s for s in exchange_info['symbols']}
+        filters = {name: SymbolFilters(s) for name, s in symbols.items()}
+        # Swap whole dicts so readers never see a half-built index
+        self._symbols = symbols
+        self._filters = filters
+        self._trading = [name for name, s in symbols.items() if s.get('status', 'TRADING') == 'TRADING']
+        self.loaded_at = time.monotonic()
+
+    def refresh(self, fetch):
+        """Reload from fetch() unless another thread is already doing so"""
+        if not self._refresh_lock.acquire(blocking=False):
+            return
+        try:
+            self.update(fetch())
+        finally:
+            self._refresh_lock.release()
+
+    def refresh_in_background(self, fetch):
+        """Start a daemon thread that reloads the cache via fetch(), at most once per retry interval"""
+        if self._refresh_lock.locked() or not self._start_attempt():
+            return
+        threading.Thread(target=self._safe_refresh, args=(fetch,), daemon=True).start()
+
+    def _safe_refresh(self, fetch):
+        try:
+            self.refresh(fetch)
+        except Exception as e:
+            logger.warning("Could not refresh exchange info: %s", e)
+
+    def get(self, symbol: str) -> Optional[Dict[str, Any]]:
+        return self._symbols.get(symbol)
+
+    def filters(self, symbol: str) -> Optional[SymbolFilters]:
+        return self._filters.get(symbol)
+
+    def trading_symbols(self) -> List[str]:
+        return self._trading
+
+    def validate_order(self, order_params: Dict[str, Any], reference_price: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Apply the symbol's filters to an order before it is sent
+
+        Orders pass through unchanged while the cache has never been loaded,
+        leaving validation to the exchange.
+
+        Raises:
+            ValueError: If the symbol is unknown or a filter is violated
+        """
+        if not self.loaded:
+            return order_params
+        symbol_filters = self._filters.get(order_params['symbol'])
+        if symbol_filters is None:
+            raise ValueError(f"Symbol {order_params['symbol']} not found")
+        return symbol_filters.apply(order_params, reference_price)
+
+
+def _decimal_or_none(value) -> Optional[Decimal]:
+    if value is None:
+        return None
+    return Decimal(value)
+
+
+def _round_to_step(value: Decimal, step: Optional[Decimal], rounding) -> Decimal:
+    if not step:
+        return value
+    return (value / step).quantize(Decimal(1), rounding=rounding) * step
+
+
+def _format_decimal(value: Decimal) -> str:
+    return format(value.normalize(), 'f')
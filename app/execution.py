@@ -0,0 +1,323 @@
+import asyncio
+import math
+import os
+import time
+import uuid
+from collections import OrderedDict
+from decimal import Decimal
+from typing import Optional, Dict, Any, List
+
+from .exchange_info import SymbolFilters
+from .logger import get_logger
+
+# Seconds between status checks of child orders that are resting on the book
+EXECUTION_POLL_INTERVAL = float(os.getenv('EXECUTION_POLL_INTERVAL', '1'))
+# Finished executions kept for progress queries
+MAX_FINISHED_EXECUTIONS = int(os.getenv('MAX_FINISHED_EXECUTIONS', '100'))
+
+STRATEGIES = ('TWAP', 'ICEBERG')
+TERMINAL_STATUSES = ('FILLED', 'CANCELED', 'REJECTED', 'EXPIRED', 'EXPIRED_IN_MATCH')
+
+logger = get_logger('execution')
+
+
+def split_quantity(total: Decimal, parts: int, filters: Optional[SymbolFilters], price: Optional[Decimal] = None) -> List[Decimal]:
+    """
+    Split total into at most `parts` child quantities on the LOT_SIZE grid
+
+    The number of children is reduced when equal slices would fall below
+    minQty, or below minNotional at price when it is known. Every child
+    but the last is the rounded-down equal share; the last takes what
+    remains, so the children add up to total rounded down to the step.
+    """
+    if filters is None:
+        share = total / parts
+        return [share] * (parts - 1) + [total - share * (parts - 1)]
+
+    minimum = filters.min_qty or filters.step_size or Decimal(0)
+    if price and filters.min_notional:
+        minimum = max(minimum, filters.min_notional / price)
+    if minimum:
+        parts = max(1, min(parts, int(total / minimum)))
+
+    share = filters.round_quantity(total / parts)
+    last = filters.round_quantity(total - share * (parts - 1))
+    return [share] * (parts - 1) + [last]
+
+
+class Execution:
+    """
+    A parent order worked as child orders
+
+    TWAP sends one child per slice at evenly spaced times over the
+    duration, each as its own task so a slow exchange call never delays
+    the next slice. ICEBERG keeps one LIMIT child of the visible size on
+    the book and sends the next once it fills. Progress is read from the
+    child responses and, for resting children, from get_order, which the
+    order journal answers while the user-data stream is live.
+    """
+
+    def __init__(
+        self,
+        client,
+        strategy: str,
+        symbol: str,
+        side: str,
+        quantity: Decimal,
+        order_type: str = 'MARKET',
+        price: Optional[float] = None,
+        duration: float = 60.0,
+        slices: int = 10,
+        visible_quantity: Optional[Decimal] = None
+    ):
+        self.client = client
+        self.id = uuid.uuid4().hex
+        self.strategy = strategy
+        self.symbol = symbol
+        self.side = side
+        self.quantity = quantity
+        self.order_type = order_type
+        self.price = price
+        self.duration = duration
+        self.status = 'RUNNING'
+        self.error: Optional[str] = None
+        self.created_at = time.time()
+        self.finished_at: Optional[float] = None
+        self.next_child_at: Optional[float] = None
+        self.children: List[Dict[str, Any]] = []
+        self._task: Optional[asyncio.Task] = None
+
+        filters = client.symbol_cache.filters(symbol)
+        reference = Decimal(str(price)) if price else None
+        if reference is None:
+            last_price = client.tickers.last_price(symbol)
+            reference = Decimal(str(last_price)) if last_price else None
+        if strategy == 'ICEBERG':
+            slices = math.ceil(quantity / visible_quantity)
+        self.child_quantities = split_quantity(quantity, slices, filters, reference)
+        if not self.child_quantities or self.child_quantities[0] <= 0:
+            raise ValueError(f"Quantity {quantity} is too small to split for {symbol}")
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    @property
+    def done(self) -> bool:
+        return self.status != 'RUNNING'
+
+    @property
+    def executed_quantity(self) -> Decimal:
+        return sum((Decimal(child['executed_qty']) for child in self.children), Decimal(0))
+
+    def progress(self) -> Dict[str, Any]:
+        executed = self.executed_quantity
+        return {
+            'id': self.id,
+            'strategy': self.strategy,
+            'symbol': self.symbol,
+            'side': self.side,
+            'order_type': self.order_type,
+            'price': self.price,
+            'status': self.status,
+            'error': self.error,
+            'quantity': str(self.quantity),
+            'executed_quantity': f"{executed:f}",
+            'percent_complete': round(float(executed / self.quantity * 100), 2) if self.quantity else 0.0,
+            'children_planned': len(self.child_quantities),
+            'children_sent': len(self.children),
+            'next_child_at': self.next_child_at,
+            'created_at': self.created_at,
+            'finished_at': self.finished_at,
+            'children': self.children,
+        }
+
+    async def _run(self):
+        try:
+            if self.strategy == 'TWAP':
+                await self._run_twap()
+            else:
+                await self._run_iceberg()
+            self.status = 'COMPLETED'
+        except asyncio.CancelledError:
+            self.status = 'CANCELED'
+            await self._cancel_open_children()
+        except Exception as e:
+            self.status = 'FAILED'
+            self.error = str(e)
+            logger.warning("Execution %s failed: %s", self.id, e)
+        finally:
+            self.next_child_at = None
+            self.finished_at = time.time()
+            logger.info("Execution finished", extra={'fields': {
+                'execution_id': self.id, 'status': self.status,
+                'executed_quantity': f"{self.executed_quantity:f}", 'children': len(self.children),
+            }})
+
+    async def _run_twap(self):
+        interval = self.duration / len(self.child_quantities)
+        started = time.monotonic()
+        sends: List[asyncio.Task] = []
+        try:
+            for index, quantity in enumerate(self.child_quantities):
+                delay = started + index * interval - time.monotonic()
+                if delay > 0:
+                    self.next_child_at = time.time() + delay
+                    await asyncio.sleep(delay)
+                sends.append(asyncio.create_task(self._send_child(quantity)))
+            self.next_child_at = None
+            # Unlike gather, wait does not cancel the sends when the execution is cancelled
+            await asyncio.wait(sends)
+            children = [send.result() for send in sends]
+            # LIMIT children may still be resting; the execution ends when they do
+            await asyncio.gather(*(self._track(child) for child in children if child is not None))
+            if all(child['status'] == 'ERROR' for child in self.children):
+                raise RuntimeError(f"Every child order failed, last error: {self.children[-1]['error']}")
+        finally:
+            # Sends already under way are let finish, so a child that reached
+            # the exchange has its orderId before the open children are cancelled
+            in_flight = [send for send in sends if not send.done()]
+            if in_flight:
+                await asyncio.wait(in_flight)
+
+    async def _run_iceberg(self):
+        for quantity in self.child_quantities:
+            child = await self._send_child(quantity)
+            if child is None:
+                raise RuntimeError(self.children[-1]['error'])
+            await self._track(child)
+            if child['status'] != 'FILLED':
+                raise RuntimeError(f"Child order {child['order_id']} ended {child['status']}")
+
+    async def _send_child(self, quantity: Decimal) -> Optional[Dict[str, Any]]:
+        """Send one child order and record it; return None if it was not accepted"""
+        child = {
+            'quantity': str(quantity), 'order_id': None, 'client_order_id': None,
+            'status': 'PENDING', 'executed_qty': '0', 'error': None, 'sent_at': time.time(),
+        }
+        self.children.append(child)
+        try:
+            order_params = self.client.prepare_order(
+                self.symbol, quantity, self.order_type, self.side, price=self.price
+            )
+            child['client_order_id'] = order_params['newClientOrderId']
+            response = await self.client.submit_order(order_params)
+        except Exception as e:
+            child['status'] = 'ERROR'
+            child['error'] = str(e)
+            logger.warning("Execution %s child order failed: %s", self.id, e)
+            return None
+        self._update_child(child, response)
+        return child
+
+    @staticmethod
+    def _update_child(child: Dict[str, Any], order: Dict[str, Any]):
+        child['order_id'] = order.get('orderId', child['order_id'])
+        child['status'] = order.get('status', child['status'])
+        child['executed_qty'] = order.get('executedQty', child['executed_qty'])
+
+    async def _track(self, child: Dict[str, Any]):
+        """Poll a child until it reaches a terminal status"""
+        while child['status'] not in TERMINAL_STATUSES:
+            await asyncio.sleep(EXECUTION_POLL_INTERVAL)
+            try:
+                self._update_child(child, await self.client.get_order(self.symbol, child['order_id']))
+            except Exception as e:
+                logger.warning("Could not check child order %s: %s", child['order_id'], e)
+
+    async def _cancel_open_children(self):
+        # A child whose response never arrived is cancelled by its clientOrderId
+        open_children = [
+            child for child in self.children
+            if (child['order_id'] is not None or child['client_order_id'] is not None)
+            and child['status'] not in TERMINAL_STATUSES + ('ERROR',)
+        ]
+        results = await asyncio.gather(
+            *(self.client.cancel_order(
+                self.symbol, child['order_id'],
+                child['client_order_id'] if child['order_id'] is None else None
+            ) for child in open_children),
+            return_exceptions=True
+        )
+        for child, result in zip(open_children, results):
+            if isinstance(result, Exception):
+                logger.warning("Could not cancel child order %s: %s",
+                               child['order_id'] or child['client_order_id'], result)
+            else:
+                self._update_child(child, result)
+
+    async def cancel(self):
+        """Stop sending children and cancel those still on the book"""
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+
+
+class ExecutionScheduler:
+    """
+    Runs TWAP and iceberg executions in the background
+
+    Each execution is an asyncio task, so request handlers return as soon
+    as it is scheduled. Child orders go through the client's
+    prepare_order/submit_order, which round them to the symbol filters,
+    journal them and wait on the shared rate limiter.
+    """
+
+    def __init__(self, client):
+        self.client = client
+        self._executions: 'OrderedDict[str, Execution]' = OrderedDict()
+
+    def start(self, strategy: str, symbol: str, side: str, quantity: float, **options) -> Execution:
+        """
+        Validate and start an execution
+
+        Raises:
+            ValueError: If the parameters or the child order size are invalid
+        """
+        if strategy not in STRATEGIES:
+            raise ValueError(f"Strategy must be one of {', '.join(STRATEGIES)}")
+        if quantity <= 0:
+            raise ValueError("Quantity must be positive")
+        if strategy == 'ICEBERG':
+            if not options.get('price'):
+                raise ValueError("Price is required for ICEBERG executions")
+            if not options.get('visible_quantity') or options['visible_quantity'] <= 0:
+                raise ValueError("Visible quantity is required for ICEBERG executions")
+            options['order_type'] = 'LIMIT'
+            options['visible_quantity'] = Decimal(str(options['visible_quantity']))
+        elif options.get('order_type', 'MARKET') == 'LIMIT' and not options.get('price'):
+            raise ValueError("Price is required for LIMIT children")
+
+        execution = Execution(self.client, strategy, symbol, side, Decimal(str(quantity)), **options)
+        # Validate the first child before anything is sent
+        self.client.discard_order(self.client.prepare_order(
+            symbol, execution.child_quantities[0], execution.order_type, side, price=execution.price
+        ))
+        self._executions[execution.id] = execution
+        self._prune()
+        execution.start()
+        logger.info("Execution started", extra={'fields': {
+            'execution_id': execution.id, 'strategy': strategy, 'symbol': symbol, 'side': side,
+            'quantity': str(quantity), 'children': len(execution.child_quantities),
+        }})
+        return execution
+
+    def _prune(self):
+        finished = [execution_id for execution_id, execution in self._executions.items() if execution.done]
+        for execution_id in finished[:max(0, len(finished) - MAX_FINISHED_EXECUTIONS)]:
+            del self._executions[execution_id]
+
+    def get(self, execution_id: str) -> Optional[Execution]:
+        return self._executions.get(execution_id)
+
+    def all(self) -> List[Execution]:
+        return list(self._executions.values())
+
+    async def cancel(self, execution_id: str) -> Optional[Execution]:
+        execution = self._executions.get(execution_id)
+        if execution is not None:
+            await execution.cancel()
+        return execution
+
+    async def close(self):
+        """Cancel every running execution"""
+        await asyncio.gather(*(execution.cancel() for execution in self._executions.values()))
@@ -0,0 +1,274 @@
+import json
+import os
+import shutil
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Dict, Any, List, Tuple
+
+import numpy as np
+
+from .logger import get_logger
+
+# Root of the candle store; one directory per symbol and interval below it
+KLINE_DATA_DIR = os.getenv('KLINE_DATA_DIR', 'data/klines')
+
+# GET /klines returns at most this many candles per call
+KLINE_PAGE_LIMIT = 1000
+
+INTERVAL_MS = {
+    '1s': 1000,
+    '1m': 60_000, '3m': 180_000, '5m': 300_000, '15m': 900_000, '30m': 1_800_000,
+    '1h': 3_600_000, '2h': 7_200_000, '4h': 14_400_000, '6h': 21_600_000,
+    '8h': 28_800_000, '12h': 43_200_000,
+    '1d': 86_400_000, '3d': 259_200_000, '1w': 604_800_000,
+}
+
+# Column name -> (dtype, position in a GET /klines row)
+COLUMNS = {
+    'open_time': ('<i8', 0),
+    'open': ('<f8', 1),
+    'high': ('<f8', 2),
+    'low': ('<f8', 3),
+    'close': ('<f8', 4),
+    'volume': ('<f8', 5),
+    'quote_volume': ('<f8', 7),
+    'trades': ('<i8', 8),
+    'taker_buy_volume': ('<f8', 9),
+    'taker_buy_quote_volume': ('<f8', 10),
+}
+
+logger = get_logger('klines')
+
+
+def interval_ms(interval: str) -> int:
+    try:
+        return INTERVAL_MS[interval]
+    except KeyError:
+        raise ValueError(f"Interval must be one of {', '.join(INTERVAL_MS)}") from None
+
+
+class Klines:
+    """
+    Candles of one symbol and interval as NumPy columns
+
+    Columns are read-only memory maps of the store's files, so loading
+    months of candles costs no parsing and only the pages that are used
+    are read from disk.
+    """
+
+    def __init__(self, symbol: str, interval: str, columns: Dict[str, np.ndarray]):
+        self.symbol = symbol
+        self.interval = interval
+        self.columns = columns
+
+    def __len__(self) -> int:
+        return len(self.columns['open_time'])
+
+    def __getattr__(self, name: str) -> np.ndarray:
+        try:
+            return self.__dict__['columns'][name]
+        except KeyError:
+            raise AttributeError(name) from None
+
+    @property
+    def close_time(self) -> np.ndarray:
+        return self.open_time + (interval_ms(self.interval) - 1)
+
+    def between(self, start: Optional[int] = None, end: Optional[int] = None) -> 'Klines':
+        """Candles opening in [start, end), as views of the same maps"""
+        first = 0 if start is None else int(np.searchsorted(self.open_time, start, side='left'))
+        last = len(self) if end is None else int(np.searchsorted(self.open_time, end, side='left'))
+        return Klines(self.symbol, self.interval, {name: column[first:last] for name, column in self.columns.items()})
+
+
+class KlineStore:
+    """
+    Columnar candle files, one directory per symbol and interval
+
+    Each column is a raw little-endian array in its own file, sorted by
+    open time with no duplicates, and is opened with np.memmap. New
+    candles are appended to every column; a write that was interrupted
+    part way leaves some columns longer than others, and the extra rows
+    are cut off the next time the directory is opened. Candles before
+    the first stored one are merged by rewriting the directory and
+    swapping it in. The stored range is always contiguous as downloaded:
+    pages are written in time order and a failed page stops the run.
+    """
+
+    def __init__(self, directory: str = KLINE_DATA_DIR):
+        self.directory = directory
+
+    def path(self, symbol: str, interval: str) -> str:
+        interval_ms(interval)
+        return os.path.join(self.directory, symbol.upper(), interval)
+
+    def _column_path(self, path: str, name: str) -> str:
+        return os.path.join(path, f"{name}.bin")
+
+    def _recover(self, path: str) -> int:
+        """Finish an interrupted rewrite, trim columns to a common length and return the row count"""
+        if not os.path.isdir(path) and os.path.isdir(f"{path}.new"):
+            os.rename(f"{path}.new", path)
+        shutil.rmtree(f"{path}.old", ignore_errors=True)
+        if not os.path.isdir(path):
+            return 0
+        sizes = {}
+        for name in COLUMNS:
+            column_path = self._column_path(path, name)
+            sizes[name] = os.path.getsize(column_path) if os.path.exists(column_path) else 0
+        rows = min(sizes[name] // np.dtype(dtype).itemsize for name, (dtype, _) in COLUMNS.items())
+        for name, (dtype, _) in COLUMNS.items():
+            if sizes[name] != rows * np.dtype(dtype).itemsize:
+                with open(self._column_path(path, name), 'r+b') as f:
+                    f.truncate(rows * np.dtype(dtype).itemsize)
+        return rows
+
+    def load(self, symbol: str, interval: str, start: Optional[int] = None, end: Optional[int] = None) -> Klines:
+        """Map the stored candles opening in [start, end)"""
+        path = self.path(symbol, interval)
+        rows = self._recover(path)
+        columns = {}
+        for name, (dtype, _) in COLUMNS.items():
+            if rows:
+                columns[name] = np.memmap(self._column_path(path, name), dtype=dtype, mode='r', shape=(rows,))
+            else:
+                columns[name] = np.empty(0, dtype=dtype)
+        return Klines(symbol.upper(), interval, columns).between(start, end)
+
+    def span(self, symbol: str, interval: str) -> Optional[Tuple[int, int]]:
+        """Open times of the first and last stored candle, or None when there are none"""
+        open_time = self.load(symbol, interval).open_time
+        if not len(open_time):
+            return None
+        return int(open_time[0]), int(open_time[-1])
+
+    @staticmethod
+    def to_columns(rows: List[List[Any]]) -> Dict[str, np.ndarray]:
+        """Convert GET /klines rows to column arrays"""
+        return {
+            name: np.array([row[position] for row in rows], dtype=dtype)
+            for name, (dtype, position) in COLUMNS.items()
+        }
+
+    def append(self, symbol: str, interval: str, rows: List[List[Any]]) -> int:
+        """
+        Append GET /klines rows that open after the last stored candle
+
+        Rows at or before the last stored candle are skipped.
+
+        Returns:
+            The number of candles written
+        """
+        path = self.path(symbol, interval)
+        os.makedirs(path, exist_ok=True)
+        stored = self._recover(path)
+        if stored:
+            last = np.memmap(self._column_path(path, 'open_time'), dtype='<i8', mode='r', shape=(stored,))[-1]
+            rows = [row for row in rows if row[0] > last]
+        if not rows:
+            return 0
+        for name, column in self.to_columns(rows).items():
+            with open(self._column_path(path, name), 'ab') as f:
+                f.write(column.tobytes())
+        return len(rows)
+
+    def merge(self, symbol: str, interval: str, rows: List[List[Any]]) -> int:
+        """
+        Merge rows anywhere in the stored range by rewriting the directory
+
+        Stored candles win over rows with the same open time.
+
+        Returns:
+            The number of candles added
+        """
+        path = self.path(symbol, interval)
+        stored = self.load(symbol, interval)
+        new = self.to_columns(rows)
+        open_time = np.concatenate([stored.open_time, new['open_time']])
+        # Stored rows come first, so a stable unique keeps them
+        _, keep = np.unique(open_time, return_index=True)
+        added = len(keep) - len(stored)
+        if added <= 0:
+            return 0
+
+        os.makedirs(f"{path}.new", exist_ok=True)
+        for name in COLUMNS:
+            column = np.concatenate([stored.columns[name], new[name]])[keep]
+            with open(self._column_path(f"{path}.new", name), 'wb') as f:
+                f.write(column.tobytes())
+        if os.path.isdir(path):
+            os.rename(path, f"{path}.old")
+        os.rename(f"{path}.new", path)
+        shutil.rmtree(f"{path}.old", ignore_errors=True)
+        return added
+
+    def save_symbol_info(self, symbol: str, symbol_info: Dict[str, Any]):
+        """Keep the symbol's exchangeInfo entry so backtests can apply its filters offline"""
+        path = os.path.join(self.directory, symbol.upper())
+        os.makedirs(path, exist_ok=True)
+        with open(os.path.join(path, 'symbol.json'), 'w') as f:
+            json.dump(symbol_info, f)
+
+    def symbol_info(self, symbol: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(os.path.join(self.directory, symbol.upper(), 'symbol.json')) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+
+def _windows(start: int, end: int, step_ms: int) -> List[Tuple[int, int]]:
+    """Split [start, end) into ranges of at most one page of candles"""
+    page_ms = step_ms * KLINE_PAGE_LIMIT
+    first = start - start % step_ms
+    return [(t, min(t + page_ms, end) - 1) for t in range(first, end, page_ms)]
+
+
+def download(
+    bot,
+    store: KlineStore,
+    symbol: str,
+    interval: str,
+    start: int,
+    end: Optional[int] = None,
+    concurrency: int = 4
+) -> int:
+    """
+    Bring the stored candles of symbol up to [start, end)
+
+    Only what is missing is fetched: candles before the first stored one
+    (merged in one rewrite) and after the last stored one (appended page
+    by page). Pages are fetched concurrently through the client's rate
+    limiter and written in time order, so a failure leaves the store
+    contiguous and the next run resumes from where it stopped. The
+    candle that is still open is never stored.
+
+    Args:
+        bot: A BinanceClient
+        end: Exclusive end in ms (default now)
+
+    Returns:
+        The number of candles added
+    """
+    step_ms = interval_ms(interval)
+    now = int(time.time() * 1000)
+    # Only candles that have closed by now
+    end = min(end or now, now - now % step_ms)
+    span = store.span(symbol, interval)
+
+    def fetch(window: Tuple[int, int]) -> List[List[Any]]:
+        return bot.get_klines(symbol, interval, start_time=window[0], end_time=window[1], limit=KLINE_PAGE_LIMIT)
+
+    added = 0
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as pool:
+        if span is not None and start < span[0]:
+            rows = [row for page in pool.map(fetch, _windows(start, min(span[0], end), step_ms)) for row in page]
+            added += store.merge(symbol, interval, rows)
+        append_from = start if span is None else max(start, span[1] + step_ms)
+        # map yields pages in order, so each is appended before a later failure is raised
+        for page in pool.map(fetch, _windows(append_from, end, step_ms)):
+            added += store.append(symbol, interval, [row for row in page if row[0] + step_ms <= now])
+    logger.info("Klines downloaded", extra={'fields': {
+        'symbol': symbol, 'interval': interval, 'added': added, 'span': store.span(symbol, interval),
+    }})
+    return added
@@ -1,95 +1,158 @@
+import atexit
+import gzip
+import json
 import logging
 import os
-from datetime import datetime
+import queue
+import shutil
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+
+LOGGER_NAME = 'binance_trading_bot'
+LOG_DIR = os.getenv('LOG_DIR', 'logs')
+LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO').upper()
+LOG_MAX_BYTES = int(os.getenv('LOG_MAX_BYTES', str(10 * 1024 * 1024)))
+LOG_BACKUP_COUNT = int(os.getenv('LOG_BACKUP_COUNT', '5'))
+
+_listener = None
+
+
+class JsonFormatter(logging.Formatter):
+    """Render a record as one JSON object per line"""
+
+    def format(self, record):
+        entry = {
+            'time': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        fields = getattr(record, 'fields', None)
+        if fields:
+            entry.update(fields)
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class DeferredQueueHandler(QueueHandler):
+    """
+    QueueHandler that leaves formatting to the listener thread
+
+    The stock handler renders the message before enqueueing it; here the
+    record goes onto the queue untouched, so the caller only pays for
+    creating the record. Arguments must therefore not be mutated after
+    they are logged.
+    """
+
+    def prepare(self, record):
+        return record
+
+
+def _gzip_rotator(source, dest):
+    with open(source, 'rb') as src, gzip.open(dest, 'wb') as dst:
+        shutil.copyfileobj(src, dst)
+    os.remove(source)
+
 
 def setup_logger():
     """
     Setup logging configuration for the trading application
-    
+
+    The application logger only enqueues records. A background listener
+    thread formats them as JSON lines and writes them to the console and
+    to logs/trade_logs.log, which is rotated at LOG_MAX_BYTES with older
+    files gzip-compressed.
+
     Returns:
         logging.Logger: Configured logger instance
     """
-    
-    # Create logs directory if it doesn't exist
-    log_dir = "logs"
-    if not os.path.exists(log_dir):
-        os.makedirs(log_dir)
-    
-    # Create logger
-    logger = logging.getLogger('binance_trading_bot')
-    logger.setLevel(logging.INFO)
-    
+    global _listener
+
+    logger = logging.getLogger(LOGGER_NAME)
+    logger.setLevel(LOG_LEVEL)
+
     # Avoid adding multiple handlers if logger already exists
     if not logger.handlers:
-        # Create file handler
-        log_file = os.path.join(log_dir, 'trade_logs.log')
-        file_handler = logging.FileHandler(log_file)
-        file_handler.setLevel(logging.INFO)
-        
-        # Create console handler
-        console_handler = logging.StreamHandler()
-        console_handler.setLevel(logging.INFO)
-        
-        # Create formatter
-        formatter = logging.Formatter(
-            '%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-            datefmt='%Y-%m-%d %H:%M:%S'
+        os.makedirs(LOG_DIR, exist_ok=True)
+
+        formatter = JsonFormatter()
+
+        file_handler = RotatingFileHandler(
+            os.path.join(LOG_DIR, 'trade_logs.log'),
+            maxBytes=LOG_MAX_BYTES,
+            backupCount=LOG_BACKUP_COUNT
         )
-        
-        # Add formatter to handlers
+        file_handler.namer = lambda name: name + '.gz'
+        file_handler.rotator = _gzip_rotator
         file_handler.setFormatter(formatter)
+
+        console_handler = logging.StreamHandler()
         console_handler.setFormatter(formatter)
-        
-        # Add handlers to logger
-        logger.addHandler(file_handler)
-        logger.addHandler(console_handler)
-    
+
+        log_queue = queue.SimpleQueue()
+        logger.addHandler(DeferredQueueHandler(log_queue))
+        logger.propagate = False
+
+        _listener = QueueListener(log_queue, file_handler, console_handler, respect_handler_level=True)
+        _listener.start()
+        atexit.register(shutdown_logger)
+
     return logger
 
+
+def shutdown_logger():
+    """Flush queued records and stop the listener thread"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def get_logger(name):
+    """Child of the application logger for a module, e.g. get_logger('client')"""
+    return logging.getLogger(f"{LOGGER_NAME}.{name}")
+
+
 def log_trade_attempt(logger, trade_data):
-    """Log trade attempt with structured data"""
-    logger.info(f"=== TRADE ATTEMPT ===")
-    logger.info(f"Timestamp: {datetime.now().isoformat()}")
-    logger.info(f"Symbol: {trade_data.get('symbol')}")
-    logger.info(f"Side: {trade_data.get('side')}")
-    logger.info(f"Type: {trade_data.get('order_type')}")
-    logger.info(f"Quantity: {trade_data.get('quantity')}")
-    if trade_data.get('price'):
-        logger.info(f"Price: {trade_data.get('price')}")
-    logger.info("=====================")
+    """Log trade attempt as a single structured record"""
+    logger.info("trade_attempt", extra={'fields': {
+        'symbol': trade_data.get('symbol'),
+        'side': trade_data.get('side'),
+        'order_type': trade_data.get('order_type'),
+        'quantity': trade_data.get('quantity'),
+        'price': trade_data.get('price'),
+        'stop_price': trade_data.get('stop_price'),
+    }})
+
 
 def log_trade_result(logger, success, result_data):
-    """Log trade result with structured data"""
-    logger.info(f"=== TRADE RESULT ===")
-    logger.info(f"Timestamp: {datetime.now().isoformat()}")
-    logger.info(f"Success: {success}")
-    
+    """Log trade result as a single structured record"""
     if success:
-        logger.info(f"Order ID: {result_data.get('orderId')}")
-        logger.info(f"Status: {result_data.get('status')}")
-        logger.info(f"Executed Quantity: {result_data.get('executedQty')}")
-        if result_data.get('avgPrice'):
-            logger.info(f"Average Price: {result_data.get('avgPrice')}")
+        logger.info("trade_result", extra={'fields': {
+            'success': True,
+            'symbol': result_data.get('symbol'),
+            'order_id': result_data.get('orderId'),
+            'client_order_id': result_data.get('clientOrderId'),
+            'status': result_data.get('status'),
+            'executed_qty': result_data.get('executedQty'),
+            'avg_price': result_data.get('avgPrice'),
+        }})
     else:
-        logger.error(f"Error: {result_data}")
-    
-    logger.info("====================")
+        logger.error("trade_result", extra={'fields': {'success': False, 'error': str(result_data)}})
+
 
 def log_error(logger, error_message, error_details=None):
-    """Log error with details"""
-    logger.error(f"=== ERROR ===")
-    logger.error(f"Timestamp: {datetime.now().isoformat()}")
-    logger.error(f"Message: {error_message}")
-    if error_details:
-        logger.error(f"Details: {error_details}")
-    logger.error("=============")
+    """Log error with details as a single structured record"""
+    logger.error(error_message, extra={'fields': {'details': error_details}})
+
 
 # Example usage
 if __name__ == "__main__":
     # Test logger setup
     test_logger = setup_logger()
     test_logger.info("Logger setup successful")
-    
+
     # Test structured logging
     test_trade_data = {
         'symbol': 'BTCUSDT',
@@ -97,7 +160,7 @@ if __name__ == "__main__":
         'order_type': 'MARKET',
         'quantity': 0.001
     }
-    
+
     log_trade_attempt(test_logger, test_trade_data)
     log_trade_result(test_logger, True, {'orderId': '12345', 'status': 'FILLED'})
-    log_error(test_logger, "Test error message", "Additional error details")
\ No newline at end of file
+    log_error(test_logger, "Test error message", "Additional error details")
@@ -1,14 +1,107 @@
+import time
+
+# Taken before the heavy imports so first-byte time covers the whole cold start
+IMPORT_STARTED = time.perf_counter()
+
 from fastapi import FastAPI, Request, Form, HTTPException
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, JSONResponse, Response
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
+from contextlib import asynccontextmanager
 import uvicorn
-from .binance_client import BinanceClient
-from .logger import setup_logger
-import re
-from typing import Optional
+from .binance_client import AsyncBinanceClient
+from .execution import ExecutionScheduler
+from .api import router as api_router, exchange_client
+from .logger import setup_logger, log_trade_attempt, log_trade_result
+from .clock import clock
+from .rate_limiter import rate_limiter
+from .risk import PendingOrders
+from .metrics import registry, STAGE_SECONDS, HTTP_REQUEST_SECONDS, CONTENT_TYPE as METRICS_CONTENT_TYPE
+import asyncio
+import csv
+import io
+import os
+from typing import Optional, Dict, Any, List
+
+# Initialize logger; the Binance client needs a running event loop for its
+# pooled HTTP session, so it is created in the lifespan below
+logger = setup_logger()
+binance_client: Optional[AsyncBinanceClient] = None
+first_byte_ms: Optional[float] = None
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Create the Binance client and warm it up in the background
+    
+    Startup does no network I/O, so uvicorn serves the form immediately
+    while time sync and exchangeInfo loading run in parallel.
+    """
+    global binance_client
+    binance_client = AsyncBinanceClient.connect()
+    app.state.binance_client = binance_client
+    app.state.executions = ExecutionScheduler(binance_client)
+    warm_up = asyncio.create_task(binance_client.warm_up())
+    try:
+        yield
+    finally:
+        warm_up.cancel()
+        await app.state.executions.close()
+        await binance_client.close()
+
+class FirstByteTimer:
+    """ASGI middleware that logs the time from import to the first response"""
+    
+    def __init__(self, app):
+        self.app = app
+    
+    async def __call__(self, scope, receive, send):
+        if first_byte_ms is not None or scope['type'] != 'http':
+            return await self.app(scope, receive, send)
+        
+        async def timed_send(message):
+            global first_byte_ms
+            if message['type'] == 'http.response.start' and first_byte_ms is None:
+                first_byte_ms = (time.perf_counter() - IMPORT_STARTED) * 1000
+                logger.info("First response sent", extra={'fields': {'import_to_first_byte_ms': round(first_byte_ms, 1)}})
+            await send(message)
+        
+        await self.app(scope, receive, timed_send)
 
-app = FastAPI(title="Binance Futures Testnet Trading Bot")
+class RequestMetrics:
+    """
+    ASGI middleware that times every HTTP request
+    
+    The start time is also left in the request state so handlers can
+    measure how long routing and body/form parsing took before they ran.
+    """
+    
+    def __init__(self, app):
+        self.app = app
+    
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            return await self.app(scope, receive, send)
+        
+        started = time.perf_counter()
+        scope.setdefault('state', {})['request_started'] = started
+        status = 500
+        
+        async def timed_send(message):
+            nonlocal status
+            if message['type'] == 'http.response.start':
+                status = message['status']
+            await send(message)
+        
+        try:
+            await self.app(scope, receive, timed_send)
+        finally:
+            handler = getattr(scope.get('endpoint'), '__name__', 'other')
+            HTTP_REQUEST_SECONDS.observe(time.perf_counter() - started, scope['method'], handler, str(status))
+
+app = FastAPI(title="Binance Futures Testnet Trading Bot", lifespan=lifespan)
+app.add_middleware(RequestMetrics)
+app.add_middleware(FirstByteTimer)
 
 # Mount static files
 app.mount("/static", StaticFiles(directory="app/static"), name="static")
@@ -16,27 +109,12 @@ app.mount("/static", StaticFiles(directory="app/static"), name="static")
 # Setup templates
 templates = Jinja2Templates(directory="app/templates")
 
-# Initialize logger and Binance client
-logger = setup_logger()
-binance_client = BinanceClient()
-
-def validate_symbol(symbol: str) -> bool:
-    """Validate trading symbol format"""
-    if not symbol:
-        return False
-    # Check if symbol is uppercase and matches typical format
-    pattern = r'^[A-Z]{3,}USDT?$'
-    return bool(re.match(pattern, symbol.upper()))
-
-def validate_quantity(quantity: float) -> bool:
-    """Validate order quantity"""
-    return quantity > 0 and quantity >= 0.0001
-
-def validate_price(price: Optional[float], order_type: str) -> bool:
-    """Validate price for limit orders"""
-    if order_type.upper() == "LIMIT":
-        return price is not None and price > 0
-    return True
+# JSON API for programmatic clients
+app.include_router(api_router)
+
+# Batch order limits
+MAX_BATCH_SIZE = int(os.getenv('MAX_BATCH_SIZE', '500'))
+BATCH_CONCURRENCY = int(os.getenv('BATCH_CONCURRENCY', '10'))
 
 @app.get("/", response_class=HTMLResponse)
 async def home(request: Request):
@@ -55,28 +133,13 @@ async def place_order(
 ):
     """
     Place an order on Binance Vision Testnet
+    
+    Fields are checked by the client's prepare_order (required fields,
+    symbol filters and risk limits) before anything is sent.
     """
+    # Everything between the request arriving and this line is routing and form parsing
+    STAGE_SECONDS.observe(time.perf_counter() - request.state.request_started, 'parse')
     try:
-        # Validate symbol format
-        if not re.match(r'^[A-Z0-9]+$', symbol):
-            raise HTTPException(status_code=400, detail="Invalid symbol format")
-        
-        # Validate order type
-        if order_type not in ['MARKET', 'LIMIT', 'STOP_LIMIT']:
-            raise HTTPException(status_code=400, detail="Invalid order type")
-        
-        # Validate side
-        if side not in ['BUY', 'SELL']:
-            raise HTTPException(status_code=400, detail="Invalid side")
-        
-        # Validate price requirements
-        if order_type in ['LIMIT', 'STOP_LIMIT'] and price is None:
-            raise HTTPException(status_code=400, detail="Price is required for LIMIT and STOP_LIMIT orders")
-        
-        # Validate stop price for Stop-Limit orders
-        if order_type == 'STOP_LIMIT' and stop_price is None:
-            raise HTTPException(status_code=400, detail="Stop price is required for STOP_LIMIT orders")
-        
         # Log the trade attempt
         trade_data = {
             'symbol': symbol,
@@ -86,10 +149,12 @@ async def place_order(
             'price': price,
             'stop_price': stop_price
         }
-        logger.info(f"Trade attempt: {trade_data}")
+        with STAGE_SECONDS.time('log'):
+            log_trade_attempt(logger, trade_data)
         
-        # Place the order
-        order_response = binance_client.place_order(
+        # Place the order without blocking the event loop
+        client = await exchange_client(request)
+        order_response = await client.place_order(
             symbol=symbol,
             quantity=quantity,
             order_type=order_type,
@@ -99,34 +164,159 @@ async def place_order(
         )
         
         # Log successful order
-        logger.info(f"Order placed successfully: {order_response}")
+        with STAGE_SECONDS.time('log'):
+            log_trade_result(logger, True, order_response)
         
         # Return success page
-        return templates.TemplateResponse("result.html", {
-            "request": request,
-            "success": True,
-            "order_response": order_response,
-            "trade_data": trade_data
-        })
+        with STAGE_SECONDS.time('render'):
+            return templates.TemplateResponse("result.html", {
+                "request": request,
+                "success": True,
+                "order_response": order_response,
+                "trade_data": trade_data
+            })
         
     except Exception as e:
         # Log the error
-        logger.error(f"Order failed: {str(e)}")
+        with STAGE_SECONDS.time('log'):
+            log_trade_result(logger, False, e)
         
         # Return error page
-        return templates.TemplateResponse("result.html", {
-            "request": request,
-            "success": False,
-            "error_message": str(e),
-            "trade_data": {
-                'symbol': symbol,
-                'quantity': quantity,
-                'order_type': order_type,
-                'side': side,
-                'price': price,
-                'stop_price': stop_price
-            }
-        })
+        with STAGE_SECONDS.time('render'):
+            return templates.TemplateResponse("result.html", {
+                "request": request,
+                "success": False,
+                "error_message": str(e),
+                "trade_data": {
+                    'symbol': symbol,
+                    'quantity': quantity,
+                    'order_type': order_type,
+                    'side': side,
+                    'price': price,
+                    'stop_price': stop_price
+                }
+            })
+
+@app.get("/ready")
+async def ready():
+    """Readiness probe: 200 once the exchange connection is warmed up, 503 before"""
+    is_ready = binance_client is not None and binance_client.ready
+    warm_up_seconds = binance_client.warm_up_seconds if binance_client else None
+    return JSONResponse(status_code=200 if is_ready else 503, content={
+        'ready': is_ready,
+        'clock_synced': clock.synced,
+        'symbols_loaded': binance_client is not None and binance_client.symbol_cache.loaded,
+        'ticker_stream': binance_client.tickers.status() if binance_client else None,
+        'warm_up_ms': round(warm_up_seconds * 1000, 1) if warm_up_seconds is not None else None,
+        'import_to_first_byte_ms': round(first_byte_ms, 1) if first_byte_ms is not None else None,
+    })
+
+@app.get("/rate_limits")
+async def rate_limits():
+    """Current request-weight and order-count budget usage"""
+    return rate_limiter.usage()
+
+@app.get("/metrics")
+async def metrics():
+    """Stage latency histograms and order/error counters in the Prometheus text format"""
+    return Response(content=registry.render(), media_type=METRICS_CONTENT_TYPE)
+
+def read_csv(data: bytes) -> List[Dict[str, Any]]:
+    """Parse CSV rows keyed by the header line; a UTF-8 byte order mark is ignored"""
+    try:
+        text = data.decode('utf-8-sig')
+    except UnicodeDecodeError:
+        raise HTTPException(status_code=400, detail="CSV must be UTF-8 encoded")
+    return list(csv.DictReader(io.StringIO(text)))
+
+async def read_batch(request: Request) -> List[Dict[str, Any]]:
+    """Read a batch of orders from a JSON array, a CSV body or a CSV file upload"""
+    content_type = request.headers.get('content-type', '')
+    
+    if content_type.startswith('multipart/form-data'):
+        form = await request.form()
+        upload = form.get('file')
+        if upload is None or isinstance(upload, str):
+            raise HTTPException(status_code=400, detail="CSV upload must be sent in the 'file' field")
+        return read_csv(await upload.read())
+    
+    if content_type.startswith('text/csv'):
+        return read_csv(await request.body())
+    
+    try:
+        orders = await request.json()
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Body must be a JSON array of orders or CSV")
+    if not isinstance(orders, list):
+        raise HTTPException(status_code=400, detail="Body must be a JSON array of orders")
+    return orders
+
+def parse_batch_order(order: Dict[str, Any]) -> Dict[str, Any]:
+    """Convert one batch row (JSON object or CSV record) into place_order arguments"""
+    if not isinstance(order, dict):
+        raise ValueError("Each order must be an object")
+    
+    def optional_float(key: str) -> Optional[float]:
+        value = order.get(key)
+        if value is None or str(value).strip() == '':
+            return None
+        return float(value)
+    
+    return {
+        'symbol': str(order.get('symbol') or '').strip().upper(),
+        'quantity': optional_float('quantity'),
+        'order_type': str(order.get('order_type') or '').strip().upper(),
+        'side': str(order.get('side') or '').strip().upper(),
+        'price': optional_float('price'),
+        'stop_price': optional_float('stop_price'),
+    }
+
+@app.post("/place_orders")
+async def place_orders(request: Request):
+    """
+    Place a batch of orders given as a JSON array or CSV (upload or body)
+    
+    Each order uses the same fields as the /place_order form. The whole
+    batch is validated first and nothing is sent if any order is invalid;
+    valid batches are dispatched concurrently and per-order results are
+    returned in input order.
+    """
+    client = await exchange_client(request)
+    orders = await read_batch(request)
+    if not orders:
+        raise HTTPException(status_code=400, detail="Batch is empty")
+    if len(orders) > MAX_BATCH_SIZE:
+        raise HTTPException(status_code=400, detail=f"Batch exceeds {MAX_BATCH_SIZE} orders")
+    
+    prepared = []
+    errors = []
+    # Risk limits apply to the batch as a whole, not just to each order
+    pending = PendingOrders()
+    for index, order in enumerate(orders):
+        try:
+            prepared.append(client.prepare_order(**parse_batch_order(order), pending=pending))
+        except (ValueError, TypeError) as e:
+            errors.append({'index': index, 'error': str(e)})
+    
+    if errors:
+        for order_params in prepared:
+            client.discard_order(order_params)
+        logger.error("Batch rejected: %d of %d orders invalid", len(errors), len(orders))
+        return JSONResponse(status_code=400, content={'success': False, 'errors': errors})
+    
+    results = await client.place_orders(prepared, concurrency=BATCH_CONCURRENCY)
+    for index, result in enumerate(results):
+        result['index'] = index
+    
+    placed = sum(1 for result in results if result['success'])
+    logger.info("Batch placed: %d of %d orders", placed, len(results))
+    
+    return {
+        'success': placed == len(results),
+        'placed': placed,
+        'failed': len(results) - placed,
+        'results': results
+    }
 
 if __name__ == "__main__":
     uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
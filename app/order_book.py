@@ -0,0 +1,207 @@
+import asyncio
+import json
+import os
+import time
+from typing import Optional, Dict, Any, List, Callable, Awaitable
+
+import websockets
+from sortedcontainers import SortedDict
+
+from .logger import get_logger
+
+BINANCE_STREAM_URL = os.getenv('BINANCE_STREAM_URL', 'wss://stream.testnet.binance.vision')
+ORDER_BOOK_SNAPSHOT_LIMIT = int(os.getenv('ORDER_BOOK_SNAPSHOT_LIMIT', '1000'))
+ORDER_BOOK_MAX_SYMBOLS = int(os.getenv('ORDER_BOOK_MAX_SYMBOLS', '20'))
+
+logger = get_logger('order_book')
+
+
+class BookSide:
+    """
+    Price levels of one side of the book
+
+    Levels live in a SortedDict keyed by price, so adding or removing a
+    level is O(log n), updating one is a dict write, and the best price
+    is always at one end. Readers get copies of the levels, never the
+    lists stored in the book.
+    """
+
+    __slots__ = ('descending', 'levels')
+
+    def __init__(self, descending: bool):
+        self.descending = descending
+        self.levels: SortedDict = SortedDict()
+
+    def clear(self):
+        self.levels.clear()
+
+    def set(self, price: str, quantity: str):
+        """Set a level's quantity; a zero quantity removes the level"""
+        key = float(price)
+        if float(quantity) == 0:
+            self.levels.pop(key, None)
+        else:
+            self.levels[key] = [price, quantity]
+
+    def best(self) -> Optional[List[str]]:
+        if not self.levels:
+            return None
+        return list(self.levels.peekitem(-1 if self.descending else 0)[1])
+
+    def top(self, limit: int) -> List[List[str]]:
+        if self.descending:
+            keys = self.levels.islice(start=max(len(self.levels) - limit, 0), reverse=True)
+        else:
+            keys = self.levels.islice(stop=limit)
+        return [list(self.levels[key]) for key in keys]
+
+    def __len__(self) -> int:
+        return len(self.levels)
+
+
+class LocalOrderBook:
+    """Order book for one symbol, built from a REST snapshot plus depth diff events"""
+
+    def __init__(self, symbol: str):
+        self.symbol = symbol
+        self.bids = BookSide(descending=True)
+        self.asks = BookSide(descending=False)
+        self.last_update_id = 0
+        self.ready = False
+        self.updated_at = 0.0
+        self._seen_event = False
+
+    def load_snapshot(self, snapshot: Dict[str, Any]):
+        """Replace the book with a GET /depth snapshot"""
+        self.bids.clear()
+        self.asks.clear()
+        for price, quantity in snapshot['bids']:
+            self.bids.set(price, quantity)
+        for price, quantity in snapshot['asks']:
+            self.asks.set(price, quantity)
+        self.last_update_id = snapshot['lastUpdateId']
+        self.ready = True
+        self.updated_at = time.monotonic()
+        self._seen_event = False
+
+    def apply_diff(self, event: Dict[str, Any]) -> bool:
+        """
+        Apply a depthUpdate event
+
+        Follows Binance's sequencing rules: events already covered by the
+        snapshot are dropped, the first applied event must contain
+        lastUpdateId + 1, and every later event must start right after
+        the previous one.
+
+        Returns:
+            False if an update was missed and the book needs a new snapshot
+        """
+        first_id, final_id = event['U'], event['u']
+        if final_id <= self.last_update_id:
+            return True
+
+        if self._seen_event:
+            in_sequence = first_id == self.last_update_id + 1
+        else:
+            in_sequence = first_id <= self.last_update_id + 1
+        if not in_sequence:
+            self.ready = False
+            return False
+
+        for price, quantity in event['b']:
+            self.bids.set(price, quantity)
+        for price, quantity in event['a']:
+            self.asks.set(price, quantity)
+        self.last_update_id = final_id
+        self.updated_at = time.monotonic()
+        self._seen_event = True
+        return True
+
+    def best_bid(self) -> Optional[List[str]]:
+        return self.bids.best()
+
+    def best_ask(self) -> Optional[List[str]]:
+        return self.asks.best()
+
+    def snapshot(self, limit: int = 100) -> Dict[str, Any]:
+        """Return the top of the book in the same shape as GET /depth"""
+        return {
+            'lastUpdateId': self.last_update_id,
+            'bids': self.bids.top(limit),
+            'asks': self.asks.top(limit),
+        }
+
+
+class OrderBookManager:
+    """
+    Keeps LocalOrderBooks in sync with the @depth@100ms streams
+
+    Symbols are tracked on demand, up to ORDER_BOOK_MAX_SYMBOLS. Each one
+    gets a task that opens the diff stream, loads a snapshot through
+    fetch_snapshot, applies the buffered and live diffs, and reloads the
+    snapshot or reconnects when the sequence breaks. The stream URL can
+    point at a local WebSocket server for testing.
+    """
+
+    def __init__(
+        self,
+        fetch_snapshot: Callable[[str], Awaitable[Dict[str, Any]]],
+        stream_url: str = BINANCE_STREAM_URL,
+        max_symbols: int = ORDER_BOOK_MAX_SYMBOLS
+    ):
+        self.fetch_snapshot = fetch_snapshot
+        self.stream_url = stream_url.rstrip('/')
+        self.max_symbols = max_symbols
+        self.books: Dict[str, LocalOrderBook] = {}
+        self._tasks: Dict[str, asyncio.Task] = {}
+
+    def get(self, symbol: str) -> Optional[LocalOrderBook]:
+        """Return the book for symbol if it is currently in sync"""
+        book = self.books.get(symbol)
+        if book is not None and book.ready:
+            return book
+        return None
+
+    def track(self, symbol: str) -> bool:
+        """Start maintaining a book for symbol; False if the symbol limit is reached"""
+        if symbol in self._tasks:
+            return True
+        if len(self._tasks) >= self.max_symbols:
+            return False
+        self.books[symbol] = LocalOrderBook(symbol)
+        self._tasks[symbol] = asyncio.create_task(self._run(symbol))
+        return True
+
+    async def close(self):
+        """Cancel all stream tasks"""
+        for task in self._tasks.values():
+            task.cancel()
+        await asyncio.gather(*self._tasks.values(), return_exceptions=True)
+        self._tasks.clear()
+
+    async def _run(self, symbol: str):
+        url = f"{self.stream_url}/ws/{symbol.lower()}@depth@100ms"
+        backoff = 1
+        while True:
+            try:
+                async with websockets.connect(url) as ws:
+                    backoff = 1
+                    await self._consume(symbol, ws)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning("Order book stream for %s failed: %s", symbol, e)
+            self.books[symbol].ready = False
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, 30)
+
+    async def _consume(self, symbol: str, ws):
+        book = self.books[symbol]
+        # The connection buffers diffs while the snapshot is downloaded
+        book.load_snapshot(await self.fetch_snapshot(symbol))
+        async for message in ws:
+            event = json.loads(message)
+            event = event.get('data', event)
+            if not book.apply_diff(event):
+                book.load_snapshot(await self.fetch_snapshot(symbol))
+                book.apply_diff(event)
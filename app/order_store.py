@@ -0,0 +1,381 @@
+import os
+import sqlite3
+import threading
+import time
+from typing import Optional, Dict, Any, List
+
+ORDER_STORE_PATH = os.getenv('ORDER_STORE_PATH', os.path.join('data', 'orders.db'))
+
+OPEN_STATUSES = ('PENDING_NEW', 'NEW', 'PARTIALLY_FILLED')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS orders (
+    client_order_id TEXT PRIMARY KEY,
+    order_id INTEGER,
+    symbol TEXT NOT NULL,
+    side TEXT,
+    type TEXT,
+    time_in_force TEXT,
+    status TEXT NOT NULL,
+    price TEXT,
+    stop_price TEXT,
+    orig_qty TEXT,
+    executed_qty TEXT,
+    cum_quote_qty TEXT,
+    reject_reason TEXT,
+    created_at INTEGER,
+    updated_at INTEGER NOT NULL
+);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_orders_symbol_order_id ON orders (symbol, order_id);
+CREATE INDEX IF NOT EXISTS idx_orders_order_id ON orders (order_id);
+CREATE INDEX IF NOT EXISTS idx_orders_status ON orders (status);
+
+CREATE TABLE IF NOT EXISTS fills (
+    symbol TEXT NOT NULL,
+    trade_id INTEGER NOT NULL,
+    order_id INTEGER NOT NULL,
+    client_order_id TEXT,
+    side TEXT,
+    price TEXT,
+    qty TEXT,
+    quote_qty TEXT,
+    commission TEXT,
+    commission_asset TEXT,
+    is_maker INTEGER,
+    time INTEGER,
+    PRIMARY KEY (symbol, trade_id)
+);
+CREATE INDEX IF NOT EXISTS idx_fills_order_id ON fills (order_id);
+
+CREATE TABLE IF NOT EXISTS sync_checkpoints (
+    symbol TEXT PRIMARY KEY,
+    last_order_id INTEGER NOT NULL,
+    last_update_time INTEGER,
+    synced_at INTEGER NOT NULL
+);
+"""
+
+# Order of precedence between two versions of an order: the later
+# exchange timestamp, then (timestamps only have millisecond resolution, so a
+# NEW report and the FILLED one can share one and arrive in either order) the
+# later lifecycle stage, then the larger executed quantity
+VERSION_KEY = """(
+    {0}.updated_at,
+    CASE {0}.status WHEN 'PENDING_NEW' THEN 0 WHEN 'NEW' THEN 1 WHEN 'PARTIALLY_FILLED' THEN 2 ELSE 3 END,
+    CAST(COALESCE({0}.executed_qty, 0) AS REAL)
+)"""
+
+# Upsert that ignores updates that do not supersede what is already stored,
+# so replayed or out-of-order events are no-ops
+UPSERT_ORDER = """
+INSERT INTO orders (
+    client_order_id, order_id, symbol, side, type, time_in_force, status, price, stop_price,
+    orig_qty, executed_qty, cum_quote_qty, reject_reason, created_at, updated_at
+) VALUES (
+    :client_order_id, :order_id, :symbol, :side, :type, :time_in_force, :status, :price, :stop_price,
+    :orig_qty, :executed_qty, :cum_quote_qty, :reject_reason, :created_at, :updated_at
+)
+ON CONFLICT (client_order_id) DO UPDATE SET
+    order_id = COALESCE(excluded.order_id, orders.order_id),
+    status = excluded.status,
+    price = COALESCE(excluded.price, orders.price),
+    stop_price = COALESCE(excluded.stop_price, orders.stop_price),
+    orig_qty = COALESCE(excluded.orig_qty, orders.orig_qty),
+    executed_qty = COALESCE(excluded.executed_qty, orders.executed_qty),
+    cum_quote_qty = COALESCE(excluded.cum_quote_qty, orders.cum_quote_qty),
+    reject_reason = COALESCE(excluded.reject_reason, orders.reject_reason),
+    created_at = COALESCE(orders.created_at, excluded.created_at),
+    updated_at = excluded.updated_at
+WHERE {excluded} > {stored}
+""".format(excluded=VERSION_KEY.format('excluded'), stored=VERSION_KEY.format('orders'))
+
+
+class OrderStore:
+    """
+    Local journal of orders and fills in SQLite
+
+    Orders are written when they are submitted and kept current from
+    user-data stream executionReport events, so order and fill lookups
+    are local queries instead of weight-heavy REST polls. The database
+    runs in WAL mode so readers never block the writer.
+    """
+
+    def __init__(self, path: str = ORDER_STORE_PATH):
+        self.path = path
+        if path != ':memory:':
+            os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.executescript(SCHEMA)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def _upsert(self, row: Dict[str, Any]):
+        values = dict.fromkeys((
+            'order_id', 'side', 'type', 'time_in_force', 'price', 'stop_price', 'orig_qty',
+            'executed_qty', 'cum_quote_qty', 'reject_reason', 'created_at',
+        ))
+        values.update(row)
+        with self._lock:
+            self._conn.execute(UPSERT_ORDER, values)
+
+    def record_submission(self, order_params: Dict[str, Any]):
+        """Journal an order just before it is sent"""
+        self._upsert({
+            'client_order_id': order_params['newClientOrderId'],
+            'symbol': order_params['symbol'],
+            'side': order_params['side'],
+            'type': order_params['type'],
+            'time_in_force': order_params.get('timeInForce'),
+            'status': 'PENDING_NEW',
+            'price': _str_or_none(order_params.get('price')),
+            'stop_price': _str_or_none(order_params.get('stopPrice')),
+            'orig_qty': _str_or_none(order_params.get('quantity')),
+            'created_at': int(time.time() * 1000),
+            # Any exchange update supersedes the submission, whatever the local clock says
+            'updated_at': 0,
+        })
+
+    def record_response(self, response: Dict[str, Any]):
+        """Apply a REST order response (new, query or cancel)"""
+        self.record_order(response)
+        if not response.get('clientOrderId'):
+            return
+        for fill in response.get('fills', []):
+            if 'tradeId' in fill:
+                self._insert_fill({
+                    'symbol': response['symbol'],
+                    'trade_id': fill['tradeId'],
+                    'order_id': response['orderId'],
+                    'client_order_id': response.get('clientOrderId'),
+                    'side': response.get('side'),
+                    'price': fill.get('price'),
+                    'qty': fill.get('qty'),
+                    'quote_qty': None,
+                    'commission': fill.get('commission'),
+                    'commission_asset': fill.get('commissionAsset'),
+                    'is_maker': 0,
+                    'time': response.get('transactTime'),
+                })
+
+    def record_order(self, order: Dict[str, Any]):
+        """Upsert an order in the shape returned by the REST API"""
+        row = _order_row(order)
+        if row is not None:
+            self._upsert(row)
+
+    def record_orders(self, orders: List[Dict[str, Any]]):
+        """Upsert many REST orders in a single transaction"""
+        rows = [row for row in map(_order_row, orders) if row is not None]
+        with self._lock:
+            self._conn.execute('BEGIN')
+            try:
+                self._conn.executemany(UPSERT_ORDER, rows)
+            except BaseException:
+                self._conn.execute('ROLLBACK')
+                raise
+            self._conn.execute('COMMIT')
+
+    def record_failure(self, client_order_id: str, error: str):
+        """
+        Mark a submitted order as rejected before reaching the book
+
+        updated_at is left alone so a stream event for an order that did
+        reach the exchange (e.g. after a timeout) still overrides this.
+        """
+        with self._lock:
+            self._conn.execute(
+                "UPDATE orders SET status = 'REJECTED', reject_reason = ? "
+                "WHERE client_order_id = ? AND status = 'PENDING_NEW'",
+                (error, client_order_id)
+            )
+
+    def apply_execution_report(self, event: Dict[str, Any]):
+        """Apply a user-data stream executionReport event"""
+        # Cancels report the cancel request's id in c and the order's own id in C
+        client_order_id = event.get('C') or event['c']
+        self._upsert({
+            'client_order_id': client_order_id,
+            'order_id': event['i'],
+            'symbol': event['s'],
+            'side': event.get('S'),
+            'type': event.get('o'),
+            'time_in_force': event.get('f'),
+            'status': event['X'],
+            'price': event.get('p'),
+            'stop_price': event.get('P'),
+            'orig_qty': event.get('q'),
+            'executed_qty': event.get('z'),
+            'cum_quote_qty': event.get('Z'),
+            'reject_reason': None if event.get('r') in (None, 'NONE') else event['r'],
+            'created_at': event.get('O'),
+            'updated_at': event.get('T') or event['E'],
+        })
+        if event.get('x') == 'TRADE':
+            self._insert_fill({
+                'symbol': event['s'],
+                'trade_id': event['t'],
+                'order_id': event['i'],
+                'client_order_id': client_order_id,
+                'side': event.get('S'),
+                'price': event.get('L'),
+                'qty': event.get('l'),
+                'quote_qty': event.get('Y'),
+                'commission': event.get('n'),
+                'commission_asset': event.get('N'),
+                'is_maker': int(bool(event.get('m'))),
+                'time': event.get('T'),
+            })
+
+    def _insert_fill(self, fill: Dict[str, Any]):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR IGNORE INTO fills (symbol, trade_id, order_id, client_order_id, side, price, qty, "
+                "quote_qty, commission, commission_asset, is_maker, time) VALUES (:symbol, :trade_id, :order_id, "
+                ":client_order_id, :side, :price, :qty, :quote_qty, :commission, :commission_asset, :is_maker, :time)",
+                fill
+            )
+
+    def _query(self, sql: str, params=()) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [dict(row) for row in self._conn.execute(sql, params)]
+
+    def get_order(self, symbol: str, order_id: Optional[int] = None, client_order_id: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """Look up one order by orderId or clientOrderId"""
+        if client_order_id is not None:
+            rows = self._query("SELECT * FROM orders WHERE client_order_id = ?", (client_order_id,))
+        else:
+            rows = self._query("SELECT * FROM orders WHERE symbol = ? AND order_id = ?", (symbol, order_id))
+        return rows[0] if rows else None
+
+    def open_orders(self, symbol: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Orders that are still working on the book"""
+        placeholders = ', '.join('?' for _ in OPEN_STATUSES)
+        sql = f"SELECT * FROM orders WHERE status IN ({placeholders})"
+        params = list(OPEN_STATUSES)
+        if symbol:
+            sql += " AND symbol = ?"
+            params.append(symbol)
+        return self._query(sql + " ORDER BY created_at", params)
+
+    def open_order_count(self, symbol: str) -> int:
+        """Number of orders of symbol still working, including those being submitted"""
+        placeholders = ', '.join('?' for _ in OPEN_STATUSES)
+        with self._lock:
+            return self._conn.execute(
+                f"SELECT COUNT(*) FROM orders WHERE status IN ({placeholders}) AND symbol = ?",
+                (*OPEN_STATUSES, symbol)
+            ).fetchone()[0]
+
+    def open_notional(self, symbol: str) -> float:
+        """Quote value of the unfilled quantity of symbol's open priced orders"""
+        placeholders = ', '.join('?' for _ in OPEN_STATUSES)
+        with self._lock:
+            return self._conn.execute(
+                "SELECT COALESCE(SUM(CAST(price AS REAL) * (CAST(orig_qty AS REAL) - CAST(COALESCE(executed_qty, '0') AS REAL))), 0) "
+                f"FROM orders WHERE status IN ({placeholders}) AND symbol = ? AND price IS NOT NULL",
+                (*OPEN_STATUSES, symbol)
+            ).fetchone()[0]
+
+    def orders(self, symbol: Optional[str] = None, status: Optional[str] = None, limit: int = 500) -> List[Dict[str, Any]]:
+        """Most recent orders, optionally filtered by symbol and status"""
+        clauses, params = [], []
+        if symbol:
+            clauses.append("symbol = ?")
+            params.append(symbol)
+        if status:
+            clauses.append("status = ?")
+            params.append(status)
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+        params.append(limit)
+        return self._query(f"SELECT * FROM orders{where} ORDER BY updated_at DESC LIMIT ?", params)
+
+    def orders_between(self, symbol: str, first_order_id: int, last_order_id: int) -> Dict[int, Dict[str, Any]]:
+        """Orders of symbol with first_order_id <= orderId <= last_order_id, keyed by orderId"""
+        rows = self._query(
+            "SELECT * FROM orders WHERE symbol = ? AND order_id BETWEEN ? AND ?",
+            (symbol, first_order_id, last_order_id)
+        )
+        return {row['order_id']: row for row in rows}
+
+    def symbols(self) -> List[str]:
+        """Symbols that have journaled orders or a reconciliation checkpoint"""
+        rows = self._query("SELECT symbol FROM orders UNION SELECT symbol FROM sync_checkpoints ORDER BY symbol")
+        return [row['symbol'] for row in rows]
+
+    def checkpoint(self, symbol: str) -> Optional[Dict[str, Any]]:
+        """Where the last reconciliation of symbol stopped"""
+        rows = self._query("SELECT * FROM sync_checkpoints WHERE symbol = ?", (symbol,))
+        return rows[0] if rows else None
+
+    def save_checkpoint(self, symbol: str, last_order_id: int, last_update_time: Optional[int] = None):
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO sync_checkpoints (symbol, last_order_id, last_update_time, synced_at) "
+                "VALUES (?, ?, ?, ?) ON CONFLICT (symbol) DO UPDATE SET "
+                "last_order_id = MAX(sync_checkpoints.last_order_id, excluded.last_order_id), "
+                "last_update_time = COALESCE(excluded.last_update_time, sync_checkpoints.last_update_time), "
+                "synced_at = excluded.synced_at",
+                (symbol, last_order_id, last_update_time, int(time.time() * 1000))
+            )
+
+    def fills(self, symbol: Optional[str] = None, order_id: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Fills for an order or a symbol"""
+        if order_id is not None:
+            return self._query("SELECT * FROM fills WHERE symbol = ? AND order_id = ? ORDER BY time", (symbol, order_id))
+        if symbol:
+            return self._query("SELECT * FROM fills WHERE symbol = ? ORDER BY time", (symbol,))
+        return self._query("SELECT * FROM fills ORDER BY time")
+
+
+def _order_row(order: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    # A cancel response carries the original id in origClientOrderId
+    client_order_id = order.get('origClientOrderId') or order.get('clientOrderId')
+    if not client_order_id:
+        return None
+    return {
+        'client_order_id': client_order_id,
+        'order_id': order.get('orderId'),
+        'symbol': order['symbol'],
+        'side': order.get('side'),
+        'type': order.get('type'),
+        'time_in_force': order.get('timeInForce'),
+        'status': order['status'],
+        'price': order.get('price'),
+        'stop_price': order.get('stopPrice'),
+        'orig_qty': order.get('origQty'),
+        'executed_qty': order.get('executedQty'),
+        'cum_quote_qty': order.get('cummulativeQuoteQty'),
+        'reject_reason': None,
+        'created_at': order.get('time') or order.get('transactTime'),
+        'updated_at': order.get('updateTime') or order.get('transactTime') or int(time.time() * 1000),
+    }
+
+
+def _str_or_none(value) -> Optional[str]:
+    return None if value is None else str(value)
+
+
+def as_api_order(row: Dict[str, Any]) -> Dict[str, Any]:
+    """Convert a stored order to the field names used by the REST API"""
+    return {
+        'symbol': row['symbol'],
+        'orderId': row['order_id'],
+        'clientOrderId': row['client_order_id'],
+        'price': row['price'],
+        'origQty': row['orig_qty'],
+        'executedQty': row['executed_qty'],
+        'cummulativeQuoteQty': row['cum_quote_qty'],
+        'status': row['status'],
+        'timeInForce': row['time_in_force'],
+        'type': row['type'],
+        'side': row['side'],
+        'stopPrice': row['stop_price'],
+        'time': row['created_at'],
+        'updateTime': row['updated_at'],
+    }
@@ -0,0 +1,317 @@
+import asyncio
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Optional, Dict, Any, List, Tuple
+
+from .clock import clock
+from .shared_state import SharedState, shared_state
+
+# Spot API defaults; replaced by the exchangeInfo rateLimits once loaded
+REQUEST_WEIGHT_LIMIT = int(os.getenv('BINANCE_WEIGHT_LIMIT', '6000'))
+ORDER_LIMIT_10S = int(os.getenv('BINANCE_ORDER_LIMIT_10S', '100'))
+ORDER_LIMIT_1D = int(os.getenv('BINANCE_ORDER_LIMIT_1D', '200000'))
+
+# Share of the weight budget that only order placement/cancellation may use,
+# so read traffic can never starve orders
+ORDER_WEIGHT_RESERVE = float(os.getenv('ORDER_WEIGHT_RESERVE', '0.1'))
+
+# Request weight of spot endpoints, keyed by (method, path)
+ENDPOINT_WEIGHTS = {
+    ('get', 'ping'): 1,
+    ('get', 'time'): 1,
+    ('get', 'exchangeInfo'): 20,
+    ('get', 'trades'): 25,
+    ('get', 'historicalTrades'): 25,
+    ('get', 'aggTrades'): 2,
+    ('get', 'klines'): 2,
+    ('get', 'avgPrice'): 2,
+    ('post', 'order'): 1,
+    ('post', 'order/test'): 1,
+    ('delete', 'order'): 1,
+    ('get', 'order'): 4,
+    ('delete', 'openOrders'): 1,
+    ('get', 'allOrders'): 20,
+    ('get', 'account'): 20,
+    ('get', 'myTrades'): 20,
+    ('post', 'userDataStream'): 2,
+    ('put', 'userDataStream'): 2,
+    ('delete', 'userDataStream'): 2,
+}
+
+# Endpoints whose weight depends on whether a symbol is given: (with, without)
+SYMBOL_WEIGHTS = {
+    ('get', 'ticker/price'): (2, 4),
+    ('get', 'ticker/bookTicker'): (2, 4),
+    ('get', 'ticker/24hr'): (2, 80),
+    ('get', 'openOrders'): (6, 80),
+}
+
+# (method, path) pairs that take priority over reads
+ORDER_ENDPOINTS = {('post', 'order'), ('delete', 'order'), ('delete', 'openOrders')}
+
+
+def depth_weight(limit: int) -> int:
+    """Request weight of GET depth for a given limit"""
+    if limit <= 100:
+        return 5
+    if limit <= 500:
+        return 25
+    if limit <= 1000:
+        return 50
+    return 250
+
+
+def api_path(uri: str) -> Optional[str]:
+    """.../api/v3/<path> -> <path>; None for URLs outside the spot API"""
+    if '/api/' not in uri:
+        return None
+    return uri.split('/api/', 1)[1].split('/', 1)[-1]
+
+
+def endpoint_cost(method: str, uri: str, params: Optional[Dict[str, Any]] = None) -> Tuple[int, bool, bool]:
+    """
+    Work out what a spot API call costs before it is sent
+
+    Returns:
+        (weight, counts_as_order, has_priority)
+    """
+    params = params or {}
+    path = api_path(uri)
+    if path is None:
+        return 1, False, False
+    key = (method, path)
+
+    if path == 'depth':
+        weight = depth_weight(int(params.get('limit', 100)))
+    elif key in SYMBOL_WEIGHTS:
+        with_symbol, without_symbol = SYMBOL_WEIGHTS[key]
+        weight = with_symbol if params.get('symbol') or params.get('symbols') else without_symbol
+    else:
+        weight = ENDPOINT_WEIGHTS.get(key, 1)
+
+    return weight, key == ('post', 'order'), key in ORDER_ENDPOINTS
+
+
+def exchange_time() -> float:
+    """Seconds since the epoch on the exchange's clock, which decides where its windows start"""
+    return time.time() + (clock.offset_ms / 1000 if clock.synced else 0)
+
+
+class FixedWindow:
+    """
+    Usage counted in fixed windows of interval seconds, as Binance counts it
+
+    Windows start at multiples of interval since the epoch (on the minute
+    for REQUEST_WEIGHT, at midnight UTC for the daily order count), and
+    usage only returns to zero when the next one starts; nothing is given
+    back part way through a window.
+    """
+
+    def __init__(self, capacity: int, interval: float, now: Optional[float] = None):
+        self.capacity = capacity
+        self.interval = interval
+        self.window = 0.0
+        self.used = 0
+        self._roll(exchange_time() if now is None else now)
+
+    def _roll(self, now: float):
+        start = now - now % self.interval
+        if start > self.window:
+            self.window, self.used = start, 0
+
+    def wait_time(self, amount: float, now: float, reserve: float = 0) -> float:
+        """Seconds until `amount` fits under capacity minus `reserve`: zero, or until the window ends"""
+        self._roll(now)
+        if self.used + amount + reserve <= self.capacity:
+            return 0.0
+        return self.window + self.interval - now
+
+    def take(self, amount: float):
+        self.used += amount
+
+    def set_used(self, used: int, now: float):
+        """Adopt the usage the exchange reported for the current window"""
+        self._roll(now)
+        self.used = used
+
+
+class RateLimiter:
+    """
+    Client-side budget for Binance request weight and order counts
+
+    Calls wait here until their weight (and, for new orders, order count)
+    fits the budget instead of being sent and rejected with 429/418. The
+    windows follow the X-MBX-USED-WEIGHT-* and X-MBX-ORDER-COUNT-* headers
+    of every response, and the last ORDER_WEIGHT_RESERVE of the weight
+    budget is kept for order placement and cancellation. One instance is
+    shared by every client in the process; with shared state attached, the
+    windows and any ban are also shared with the other worker processes.
+    """
+
+    BUCKETS = ('weight', 'orders_10s', 'orders_1d')
+
+    def __init__(self, shared: Optional[SharedState] = None):
+        self._lock = threading.Lock()
+        self.shared = shared
+        self.weight = FixedWindow(REQUEST_WEIGHT_LIMIT, 60)
+        self.orders_10s = FixedWindow(ORDER_LIMIT_10S, 10)
+        self.orders_1d = FixedWindow(ORDER_LIMIT_1D, 86400)
+        self.blocked_until = 0.0
+        self.weight_by_endpoint: Dict[str, int] = {}
+        self.waits = 0
+        self.wait_seconds = 0.0
+        self.bans = 0
+
+    @contextmanager
+    def _locked(self):
+        """Hold the lock, and with shared state load the windows before and store them after"""
+        with self._lock:
+            if self.shared is None:
+                yield
+                return
+            with self.shared.locked():
+                self._load_shared(self.shared.read())
+                yield
+                self.shared.write(**self._shared_fields())
+
+    def _load_shared(self, state: Dict[str, float]):
+        # Capacity 0 means no worker has stored its windows yet, so the local ones seed the record
+        if not state['weight_capacity']:
+            return
+        for name in self.BUCKETS:
+            bucket = getattr(self, name)
+            capacity, interval = state[f"{name}_capacity"], state[f"{name}_interval"]
+            if bucket.capacity != capacity or bucket.interval != interval:
+                bucket = FixedWindow(int(capacity), interval)
+                setattr(self, name, bucket)
+            bucket.window, bucket.used = state[f"{name}_window"], int(state[f"{name}_used"])
+        self.blocked_until = state['blocked_until']
+
+    def _shared_fields(self) -> Dict[str, float]:
+        fields = {'blocked_until': self.blocked_until}
+        for name in self.BUCKETS:
+            bucket = getattr(self, name)
+            fields.update({
+                f"{name}_capacity": bucket.capacity, f"{name}_interval": bucket.interval,
+                f"{name}_window": bucket.window, f"{name}_used": bucket.used,
+            })
+        return fields
+
+    def configure(self, rate_limits: List[Dict[str, Any]]):
+        """Resize the windows from the rateLimits section of exchangeInfo, keeping current usage"""
+        seconds = {'SECOND': 1, 'MINUTE': 60, 'HOUR': 3600, 'DAY': 86400}
+        now = exchange_time()
+        with self._locked():
+            for limit in rate_limits:
+                interval = seconds.get(limit.get('interval'), 60) * limit.get('intervalNum', 1)
+                if limit.get('rateLimitType') == 'REQUEST_WEIGHT' and interval == 60:
+                    name = 'weight'
+                elif limit.get('rateLimitType') == 'ORDERS' and interval == 10:
+                    name = 'orders_10s'
+                elif limit.get('rateLimitType') == 'ORDERS' and interval == 86400:
+                    name = 'orders_1d'
+                else:
+                    continue
+                current = getattr(self, name)
+                current._roll(now)
+                bucket = FixedWindow(limit['limit'], interval, now)
+                bucket.set_used(min(current.used, bucket.capacity), now)
+                setattr(self, name, bucket)
+
+    def _try_acquire(self, weight: int, is_order: bool, priority: bool, endpoint: str) -> float:
+        """Take the budget and return 0, or return how long to wait before retrying"""
+        now = time.monotonic()
+        with self._locked():
+            if now < self.blocked_until:
+                return self.blocked_until - now
+
+            now = exchange_time()
+            reserve = 0 if priority else self.weight.capacity * ORDER_WEIGHT_RESERVE
+            wait = self.weight.wait_time(weight, now, reserve)
+            if is_order:
+                wait = max(wait, self.orders_10s.wait_time(1, now), self.orders_1d.wait_time(1, now))
+            if wait > 0:
+                return wait
+
+            self.weight.take(weight)
+            if is_order:
+                self.orders_10s.take(1)
+                self.orders_1d.take(1)
+            self.weight_by_endpoint[endpoint] = self.weight_by_endpoint.get(endpoint, 0) + weight
+            return 0.0
+
+    def _record_wait(self, wait: float):
+        with self._lock:
+            self.waits += 1
+            self.wait_seconds += wait
+
+    async def acquire(self, method: str, uri: str, params: Optional[Dict[str, Any]] = None):
+        """Wait without blocking the event loop until the call fits the budget"""
+        weight, is_order, priority = endpoint_cost(method, uri, params)
+        endpoint = uri.rsplit('/api/', 1)[-1]
+        while True:
+            wait = self._try_acquire(weight, is_order, priority, endpoint)
+            if wait <= 0:
+                return
+            self._record_wait(wait)
+            await asyncio.sleep(wait)
+
+    def acquire_blocking(self, method: str, uri: str, params: Optional[Dict[str, Any]] = None):
+        """Blocking version of acquire for the synchronous client"""
+        weight, is_order, priority = endpoint_cost(method, uri, params)
+        endpoint = uri.rsplit('/api/', 1)[-1]
+        while True:
+            wait = self._try_acquire(weight, is_order, priority, endpoint)
+            if wait <= 0:
+                return
+            self._record_wait(wait)
+            time.sleep(wait)
+
+    def update_from_response(self, headers, status: int):
+        """Sync the windows with the usage reported by the exchange"""
+        now = time.monotonic()
+        window_now = exchange_time()
+        with self._locked():
+            for name, value in headers.items():
+                name = name.upper()
+                if name == 'X-MBX-USED-WEIGHT-1M':
+                    self.weight.set_used(int(value), window_now)
+                elif name == 'X-MBX-ORDER-COUNT-10S':
+                    self.orders_10s.set_used(int(value), window_now)
+                elif name == 'X-MBX-ORDER-COUNT-1D':
+                    self.orders_1d.set_used(int(value), window_now)
+
+            if status in (418, 429):
+                # Back off for as long as the exchange asks before sending anything else
+                retry_after = float(headers.get('Retry-After') or 60)
+                self.blocked_until = max(self.blocked_until, now + retry_after)
+                self.bans += 1
+
+    def usage(self) -> Dict[str, Any]:
+        """Current budget usage for monitoring"""
+        now = time.monotonic()
+        window_now = exchange_time()
+        with self._locked():
+            windows = {}
+            for name, bucket in (('request_weight', self.weight), ('orders_10s', self.orders_10s), ('orders_1d', self.orders_1d)):
+                bucket._roll(window_now)
+                windows[name] = {
+                    'used': bucket.used, 'limit': bucket.capacity,
+                    'resets_in': round(bucket.window + bucket.interval - window_now, 3),
+                }
+            return {
+                **windows,
+                'blocked_for': max(0.0, self.blocked_until - now),
+                'waits': self.waits,
+                'wait_seconds': round(self.wait_seconds, 3),
+                'bans': self.bans,
+                'weight_by_endpoint': dict(self.weight_by_endpoint),
+                'shared': self.shared is not None,
+            }
+
+
+# Exchange limits apply per IP/account, so the whole process (and, with
+# SHARED_STATE_DIR set, every worker) shares one budget
+rate_limiter = RateLimiter(shared_state)
@@ -0,0 +1,174 @@
+import json
+import math
+import os
+from typing import Optional, Dict, Any, Callable, List, Tuple
+
+from .metrics import RISK_REJECTIONS
+
+# Limits for every symbol; 0 switches a limit off
+RISK_MAX_NOTIONAL = float(os.getenv('RISK_MAX_NOTIONAL', '0'))
+RISK_MAX_POSITION = float(os.getenv('RISK_MAX_POSITION', '0'))
+RISK_PRICE_BAND = float(os.getenv('RISK_PRICE_BAND', '0'))
+RISK_MAX_OPEN_ORDERS = int(os.getenv('RISK_MAX_OPEN_ORDERS', '0'))
+RISK_MAX_OPEN_NOTIONAL = float(os.getenv('RISK_MAX_OPEN_NOTIONAL', '0'))
+# Per-symbol overrides as JSON, e.g. {"BTCUSDT": {"max_notional": 50000, "price_band": 0.05}}
+RISK_LIMITS = os.getenv('RISK_LIMITS', '')
+
+LIMIT_NAMES = ('max_notional', 'max_position', 'price_band', 'max_open_orders', 'max_open_notional')
+
+INF = math.inf
+
+# (max notional, max position, lowest price factor, highest price factor, max open orders, max open notional)
+Limits = Tuple[float, float, float, float, float, float]
+
+
+def _compile(limits: Dict[str, float]) -> Limits:
+    """Turn configured limits into the table row checked on the hot path; 0 becomes no limit"""
+    unknown = set(limits) - set(LIMIT_NAMES)
+    if unknown:
+        raise ValueError(f"Unknown risk limits: {', '.join(sorted(unknown))}")
+    band = float(limits.get('price_band') or 0)
+    return (
+        float(limits.get('max_notional') or INF),
+        float(limits.get('max_position') or INF),
+        1 - band if band else 0.0,
+        1 + band if band else INF,
+        float(limits.get('max_open_orders') or INF),
+        float(limits.get('max_open_notional') or INF),
+    )
+
+
+class PendingOrders:
+    """
+    Orders of one batch that passed the risk checks but are not sent yet
+
+    Keeps, per symbol, the number of orders, the base quantity they buy
+    and their notional, so each order of a batch is checked as if the
+    ones before it were already open.
+    """
+
+    def __init__(self):
+        self._totals: Dict[str, List[float]] = {}
+
+    def get(self, symbol: str) -> Tuple[int, float, float]:
+        """Order count, quantity bought and notional pending for symbol"""
+        count, bought, notional = self._totals.get(symbol, (0, 0.0, 0.0))
+        return int(count), bought, notional
+
+    def add(self, order_params: Dict[str, Any], last_price: Optional[float] = None):
+        totals = self._totals.setdefault(order_params['symbol'], [0, 0.0, 0.0])
+        quantity = float(order_params['quantity'])
+        price = order_params.get('price')
+        price = float(price) if price is not None else last_price
+        totals[0] += 1
+        if order_params['side'] == 'BUY':
+            totals[1] += quantity
+        if price is not None:
+            totals[2] += quantity * price
+
+
+class RiskEngine:
+    """
+    Pre-trade limits checked before an order leaves the process
+
+    Limits are compiled once into a row of floats per symbol, with no
+    limit stored as infinity and the price band stored as the factors
+    either side of the last price, so a check is one dict lookup and a
+    few comparisons. Position and open-order counts are passed as
+    callables and only evaluated for symbols that limit them.
+    """
+
+    def __init__(self, defaults: Optional[Dict[str, float]] = None, overrides: Optional[Dict[str, Dict[str, float]]] = None):
+        if defaults is None:
+            defaults = {
+                'max_notional': RISK_MAX_NOTIONAL,
+                'max_position': RISK_MAX_POSITION,
+                'price_band': RISK_PRICE_BAND,
+                'max_open_orders': RISK_MAX_OPEN_ORDERS,
+                'max_open_notional': RISK_MAX_OPEN_NOTIONAL,
+            }
+        if overrides is None:
+            overrides = json.loads(RISK_LIMITS) if RISK_LIMITS else {}
+        self.configure(defaults, overrides)
+
+    def configure(self, defaults: Dict[str, float], overrides: Dict[str, Dict[str, float]]):
+        """Replace the limits; symbols inherit the defaults they do not override"""
+        default_row = _compile(defaults)
+        table = {symbol.upper(): _compile({**defaults, **limits}) for symbol, limits in overrides.items()}
+        # Swap both at once so checks never see a half-built table
+        self._default, self._table = default_row, table
+
+    def check(
+        self,
+        order_params: Dict[str, Any],
+        last_price: Optional[float] = None,
+        position: Optional[Callable[[], Optional[float]]] = None,
+        open_orders: Optional[Callable[[], int]] = None,
+        open_notional: Optional[Callable[[], float]] = None,
+        pending: Optional[PendingOrders] = None
+    ):
+        """
+        Reject an order that breaks a limit of its symbol
+
+        Args:
+            order_params: Parameters from build_order_params, after the symbol filters
+            last_price: Cached last price; the price band, and the notional of
+                MARKET orders, are only checked when it is known
+            position: Returns the base asset held, or None when unknown
+            open_orders: Returns the number of open orders of the symbol
+            open_notional: Returns the notional still open on the symbol's orders
+            pending: Earlier orders of the same batch, added to the position,
+                open-order and open-notional totals; without the callables
+                they are checked on their own. max_notional stays a limit
+                on each order.
+
+        Raises:
+            ValueError: If a limit is exceeded
+        """
+        symbol = order_params['symbol']
+        max_notional, max_position, band_low, band_high, max_open_orders, max_open_notional = self._table.get(symbol, self._default)
+        quantity = float(order_params['quantity'])
+        price = order_params.get('price')
+        price = float(price) if price is not None else last_price
+        pending_count, pending_bought, pending_notional = pending.get(symbol) if pending is not None else (0, 0.0, 0.0)
+
+        if price is not None and quantity * price > max_notional:
+            self._reject(symbol, 'max_notional', f"Order notional {quantity * price:.8f} exceeds the {symbol} limit of {max_notional:g}")
+
+        if last_price and band_high != INF:
+            for key in ('price', 'stopPrice'):
+                value = order_params.get(key)
+                if value is not None and not last_price * band_low <= float(value) <= last_price * band_high:
+                    self._reject(
+                        symbol, 'price_band',
+                        f"{key} {value} is outside the {symbol} band of "
+                        f"{last_price * band_low:.8f}-{last_price * band_high:.8f} around the last price {last_price}"
+                    )
+
+        if max_position != INF and order_params['side'] == 'BUY':
+            held = position() if position is not None else None
+            # An unknown holding is at least zero, so the batch alone can break the limit
+            if held is not None or pending_bought:
+                reached = (held or 0.0) + pending_bought + quantity
+                if reached > max_position:
+                    self._reject(symbol, 'max_position', f"Position would reach {reached:.8f}, above the {symbol} limit of {max_position:g}")
+
+        if max_open_orders != INF and (open_orders is not None or pending_count):
+            count = (open_orders() if open_orders is not None else 0) + pending_count
+            if count >= max_open_orders:
+                if pending_count:
+                    self._reject(symbol, 'max_open_orders', f"{symbol} would have more than {int(max_open_orders)} open orders with this batch")
+                self._reject(symbol, 'max_open_orders', f"{symbol} already has the maximum of {int(max_open_orders)} open orders")
+
+        if max_open_notional != INF and price is not None and (open_notional is not None or pending_notional):
+            total = (open_notional() if open_notional is not None else 0.0) + pending_notional + quantity * price
+            if total > max_open_notional:
+                self._reject(
+                    symbol, 'max_open_notional',
+                    f"Open notional would reach {total:.8f}, above the {symbol} limit of {max_open_notional:g}"
+                )
+
+    @staticmethod
+    def _reject(symbol: str, limit: str, message: str):
+        RISK_REJECTIONS.inc(symbol, limit)
+        raise ValueError(message)
@@ -0,0 +1,196 @@
+import asyncio
+import fcntl
+import json
+import mmap
+import os
+import struct
+import threading
+import time
+from contextlib import contextmanager
+from typing import Optional, Dict, Any, Callable, Awaitable
+
+from .logger import get_logger
+
+# Directory holding state shared by every worker on the host; unset means each process keeps its own
+SHARED_STATE_DIR = os.getenv('SHARED_STATE_DIR')
+
+# How often a worker that is not sampling the clock picks up the shared estimate
+SHARED_CLOCK_POLL = float(os.getenv('SHARED_CLOCK_POLL', '1'))
+
+LAYOUT_VERSION = 2
+
+# Fixed record layout of the shared file; monotonic timestamps are only
+# comparable between processes of the same boot, hence boot_time
+FIELDS = (
+    ('version', 'q'),
+    ('boot_time', 'd'),
+    ('weight_capacity', 'd'), ('weight_interval', 'd'), ('weight_window', 'd'), ('weight_used', 'd'),
+    ('orders_10s_capacity', 'd'), ('orders_10s_interval', 'd'), ('orders_10s_window', 'd'), ('orders_10s_used', 'd'),
+    ('orders_1d_capacity', 'd'), ('orders_1d_interval', 'd'), ('orders_1d_window', 'd'), ('orders_1d_used', 'd'),
+    ('blocked_until', 'd'),
+    ('clock_offset_ms', 'q'), ('clock_recv_window', 'q'),
+    ('clock_jitter_ms', 'd'), ('clock_min_rtt_ms', 'd'),
+    ('clock_published', 'd'),
+)
+FIELD_NAMES = tuple(name for name, _ in FIELDS)
+LAYOUT = struct.Struct('<' + ''.join(code for _, code in FIELDS))
+
+logger = get_logger('shared_state')
+
+
+def _boot_time() -> float:
+    return time.time() - time.monotonic()
+
+
+class SharedState:
+    """
+    State shared by the worker processes of one deployment
+
+    Rate-limit buckets and the clock estimate live in a small
+    memory-mapped record; every read-modify-write happens under an flock
+    on the same file, so workers draw on one budget the way a single
+    process does. One worker at a time holds the leader lock and samples
+    server time for everyone; the others adopt what it publishes, and the
+    lock passes on when the leader exits. exchangeInfo is cached as a JSON
+    file that at most one worker downloads per TTL.
+    """
+
+    def __init__(self, directory: str):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        # flock is held per open file, so threads of this process also need a lock
+        self._thread_lock = threading.Lock()
+        self._fd = os.open(os.path.join(directory, 'state'), os.O_RDWR | os.O_CREAT, 0o600)
+        self._leader_fd: Optional[int] = None
+        with self._flock(self._fd):
+            if os.fstat(self._fd).st_size < LAYOUT.size:
+                os.ftruncate(self._fd, LAYOUT.size)
+            self._map = mmap.mmap(self._fd, LAYOUT.size)
+            state = self.read()
+            # A different layout or a reboot leaves nothing worth keeping
+            if state['version'] != LAYOUT_VERSION or abs(state['boot_time'] - _boot_time()) > 1:
+                LAYOUT.pack_into(self._map, 0, *([0] * len(FIELDS)))
+                self.write(version=LAYOUT_VERSION, boot_time=_boot_time())
+
+    @staticmethod
+    @contextmanager
+    def _flock(fd: int):
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+
+    @contextmanager
+    def locked(self):
+        """Hold the cross-process lock around a read-modify-write"""
+        with self._thread_lock, self._flock(self._fd):
+            yield
+
+    def read(self) -> Dict[str, float]:
+        return dict(zip(FIELD_NAMES, LAYOUT.unpack_from(self._map)))
+
+    def write(self, **values):
+        """Update some fields; call inside locked()"""
+        state = self.read()
+        state.update(values)
+        LAYOUT.pack_into(self._map, 0, *(state[name] for name in FIELD_NAMES))
+
+    @property
+    def leading(self) -> bool:
+        return self._leader_fd is not None
+
+    def try_lead(self) -> bool:
+        """Become the worker that samples server time, unless another live worker already is"""
+        if self._leader_fd is not None:
+            return True
+        fd = os.open(os.path.join(self.directory, 'leader.lock'), os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            os.close(fd)
+            return False
+        self._leader_fd = fd
+        logger.info("Worker %s now samples server time for all workers", os.getpid())
+        return True
+
+    def publish_clock(self, offset_ms: int, recv_window: int, jitter_ms: float, min_rtt_ms: float):
+        with self.locked():
+            self.write(
+                clock_offset_ms=offset_ms, clock_recv_window=recv_window,
+                clock_jitter_ms=jitter_ms, clock_min_rtt_ms=min_rtt_ms,
+                clock_published=time.monotonic(),
+            )
+
+    def clock(self) -> Optional[Dict[str, float]]:
+        """The leader's last clock estimate, or None before it has published one"""
+        with self.locked():
+            state = self.read()
+        if not state['clock_published']:
+            return None
+        return {
+            'offset_ms': int(state['clock_offset_ms']),
+            'recv_window': int(state['clock_recv_window']),
+            'jitter_ms': state['clock_jitter_ms'],
+            'min_rtt_ms': state['clock_min_rtt_ms'],
+        }
+
+    @property
+    def _exchange_info_path(self) -> str:
+        return os.path.join(self.directory, 'exchange_info.json')
+
+    def cached_exchange_info(self, max_age: float) -> Optional[Dict[str, Any]]:
+        """exchangeInfo saved by any worker within the last max_age seconds"""
+        try:
+            if time.time() - os.path.getmtime(self._exchange_info_path) > max_age:
+                return None
+            with open(self._exchange_info_path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def save_exchange_info(self, exchange_info: Dict[str, Any]):
+        tmp_path = f"{self._exchange_info_path}.{os.getpid()}"
+        with open(tmp_path, 'w') as f:
+            json.dump(exchange_info, f)
+        os.replace(tmp_path, self._exchange_info_path)
+
+    def _open_exchange_info_lock(self) -> int:
+        fd = os.open(os.path.join(self.directory, 'exchange_info.lock'), os.O_RDWR | os.O_CREAT, 0o600)
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        return fd
+
+    def exchange_info(self, fetch: Callable[[], Dict[str, Any]], max_age: float) -> Dict[str, Any]:
+        """Return exchangeInfo younger than max_age, calling fetch() only if no worker has it"""
+        exchange_info = self.cached_exchange_info(max_age)
+        if exchange_info is not None:
+            return exchange_info
+        fd = self._open_exchange_info_lock()
+        try:
+            # Another worker may have saved it while this one waited for the lock
+            exchange_info = self.cached_exchange_info(max_age)
+            if exchange_info is None:
+                exchange_info = fetch()
+                self.save_exchange_info(exchange_info)
+            return exchange_info
+        finally:
+            os.close(fd)
+
+    async def exchange_info_async(self, fetch: Callable[[], Awaitable[Dict[str, Any]]], max_age: float) -> Dict[str, Any]:
+        """exchange_info for an awaitable fetch; waits for the file lock off the event loop"""
+        exchange_info = self.cached_exchange_info(max_age)
+        if exchange_info is not None:
+            return exchange_info
+        fd = await asyncio.get_running_loop().run_in_executor(None, self._open_exchange_info_lock)
+        try:
+            exchange_info = self.cached_exchange_info(max_age)
+            if exchange_info is None:
+                exchange_info = await fetch()
+                self.save_exchange_info(exchange_info)
+            return exchange_info
+        finally:
+            os.close(fd)
+
+
+# One record per deployment, attached to by the rate limiter and clock of every worker
+shared_state = SharedState(SHARED_STATE_DIR) if SHARED_STATE_DIR else None
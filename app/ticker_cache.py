@@ -0,0 +1,210 @@
+import asyncio
+import json
+import os
+import time
+from array import array
+from typing import Optional, Dict, Any, Iterable, List, Set
+
+import websockets
+
+from .logger import get_logger
+from .order_book import BINANCE_STREAM_URL
+
+TICKER_STREAM_ENABLED = os.getenv('TICKER_STREAM', '1') == '1'
+
+logger = get_logger('ticker')
+
+
+class TickerTable:
+    """
+    Last price and best bid/ask for every symbol
+
+    Each symbol is assigned a row once, and its values live in flat
+    float arrays at that row; reading a price is a dict lookup plus an
+    array index.
+
+    The streams only push symbols whose ticker changed, so a quiet symbol
+    can go minutes without an update and still be current. A value is
+    current when the stream is connected and the symbol has been seen
+    since the connection opened, from the stream or from a REST answer
+    filled in with seed_last/seed_book; the age of the last update is
+    only reported, never used to discard a price.
+    """
+
+    def __init__(self):
+        self._index: Dict[str, int] = {}
+        self.symbols: List[str] = []
+        self.last = array('d')
+        self.bid = array('d')
+        self.ask = array('d')
+        self.last_updated = array('d')
+        self.book_updated = array('d')
+        # When the current stream connection opened; None while it is down
+        self.live_since: Optional[float] = None
+
+    def _row(self, symbol: str) -> int:
+        row = self._index.get(symbol)
+        if row is None:
+            row = len(self.symbols)
+            self._index[symbol] = row
+            self.symbols.append(symbol)
+            for column in (self.last, self.bid, self.ask, self.last_updated, self.book_updated):
+                column.append(0.0)
+        return row
+
+    def update_last(self, symbol: str, price: float, now: Optional[float] = None):
+        row = self._row(symbol)
+        self.last[row] = price
+        self.last_updated[row] = now or time.monotonic()
+
+    def update_book(self, symbol: str, bid: float, ask: float, now: Optional[float] = None):
+        row = self._row(symbol)
+        self.bid[row] = bid
+        self.ask[row] = ask
+        self.book_updated[row] = now or time.monotonic()
+
+    def stream_connected(self, now: Optional[float] = None):
+        self.live_since = now or time.monotonic()
+
+    def stream_disconnected(self):
+        self.live_since = None
+
+    def _current(self, updated: array, row: Optional[int]) -> bool:
+        return row is not None and self.live_since is not None and updated[row] >= self.live_since
+
+    def seed_last(self, symbol: str, price: float, requested_at: float):
+        """
+        Fill in a REST price for a symbol the stream has not sent yet
+
+        requested_at is when the REST request was sent; an answer to a
+        request older than the connection, or for a symbol the stream has
+        updated since, is ignored.
+        """
+        if self.live_since is None or requested_at < self.live_since:
+            return
+        if not self._current(self.last_updated, self._index.get(symbol)):
+            self.update_last(symbol, price, requested_at)
+
+    def seed_book(self, symbol: str, bid: float, ask: float, requested_at: float):
+        """Fill in a REST best bid/ask, like seed_last"""
+        if self.live_since is None or requested_at < self.live_since:
+            return
+        if not self._current(self.book_updated, self._index.get(symbol)):
+            self.update_book(symbol, bid, ask, requested_at)
+
+    def last_price(self, symbol: str) -> Optional[float]:
+        """Last traded price, or None if it is not current"""
+        row = self._index.get(symbol)
+        if not self._current(self.last_updated, row):
+            return None
+        return self.last[row]
+
+    def book(self, symbol: str) -> Optional[Dict[str, float]]:
+        """Best bid/ask, or None if it is not current"""
+        row = self._index.get(symbol)
+        if not self._current(self.book_updated, row):
+            return None
+        return {'bidPrice': self.bid[row], 'askPrice': self.ask[row]}
+
+    def has_prices(self, symbols: Iterable[str]) -> bool:
+        """Whether every one of symbols has a current last price"""
+        return all(self._current(self.last_updated, self._index.get(symbol)) for symbol in symbols)
+
+    def all_prices(self) -> List[Dict[str, str]]:
+        """Current last prices in the shape of GET /ticker/price"""
+        return [
+            {'symbol': symbol, 'price': repr(self.last[row])}
+            for symbol, row in self._index.items()
+            if self._current(self.last_updated, row)
+        ]
+
+    def status(self) -> Dict[str, Any]:
+        """Whether the stream is live, how many prices are current and the age of the newest update"""
+        newest = max(self.last_updated, default=0.0)
+        return {
+            'connected': self.live_since is not None,
+            'symbols': sum(1 for row in self._index.values() if self._current(self.last_updated, row)),
+            'last_update_age_s': round(time.monotonic() - newest, 3) if newest else None,
+        }
+
+
+class TickerStream:
+    """
+    Feeds a TickerTable from !miniTicker@arr and per-symbol bookTicker streams
+
+    One combined-stream connection carries the all-market mini tickers;
+    bookTicker streams are added with SUBSCRIBE as symbols are tracked.
+    The connection is re-established with backoff when it drops.
+    """
+
+    def __init__(self, table: TickerTable, stream_url: str = BINANCE_STREAM_URL):
+        self.table = table
+        self.stream_url = stream_url.rstrip('/')
+        self.book_symbols: Set[str] = set()
+        self.connected = False
+        self._ws = None
+        self._task: Optional[asyncio.Task] = None
+        self._request_id = 0
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def close(self):
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def track_book(self, symbol: str):
+        """Subscribe to bookTicker updates for symbol"""
+        if symbol in self.book_symbols:
+            return
+        self.book_symbols.add(symbol)
+        if self._ws is not None:
+            await self._subscribe([symbol])
+
+    async def _subscribe(self, symbols):
+        self._request_id += 1
+        await self._ws.send(json.dumps({
+            'method': 'SUBSCRIBE',
+            'params': [f"{symbol.lower()}@bookTicker" for symbol in symbols],
+            'id': self._request_id,
+        }))
+
+    async def _run(self):
+        url = f"{self.stream_url}/stream?streams=!miniTicker@arr"
+        backoff = 1
+        while True:
+            try:
+                async with websockets.connect(url) as ws:
+                    self._ws = ws
+                    self.connected = True
+                    self.table.stream_connected()
+                    backoff = 1
+                    if self.book_symbols:
+                        await self._subscribe(sorted(self.book_symbols))
+                    async for message in ws:
+                        self._handle(json.loads(message))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning("Ticker stream failed: %s", e)
+            finally:
+                self._ws = None
+                self.connected = False
+                self.table.stream_disconnected()
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, 30)
+
+    def _handle(self, message: Dict[str, Any]):
+        data = message.get('data')
+        if data is None:
+            # Reply to a SUBSCRIBE request
+            return
+        now = time.monotonic()
+        if isinstance(data, list):
+            for ticker in data:
+                self.table.update_last(ticker['s'], float(ticker['c']), now)
+        elif 'b' in data and 'a' in data:
+            self.table.update_book(data['s'], float(data['b']), float(data['a']), now)
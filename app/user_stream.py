@@ -0,0 +1,107 @@
+import asyncio
+import json
+import os
+from typing import Optional, Dict, Any, List, Callable, Awaitable
+
+import websockets
+from binance.client import AsyncClient
+
+from .logger import get_logger
+from .order_book import BINANCE_STREAM_URL
+
+USER_STREAM_ENABLED = os.getenv('USER_STREAM', '1') == '1'
+
+# Listen keys expire after 60 minutes without a keepalive
+LISTEN_KEY_KEEPALIVE = 30 * 60
+
+logger = get_logger('user_stream')
+
+
+class UserDataStream:
+    """
+    Account event stream (executionReport, outboundAccountPosition, balanceUpdate)
+
+    Obtains a listen key, keeps it alive, and dispatches each event to the
+    handlers registered for its type. Callbacks registered with
+    on_connect run after every (re)connect, once the stream is live, so
+    local state can be reconciled with REST for anything missed while it
+    was down. The stream base URL can point at a local WebSocket server
+    for testing.
+    """
+
+    def __init__(self, client: AsyncClient, stream_url: str = BINANCE_STREAM_URL):
+        self.client = client
+        self.stream_url = stream_url.rstrip('/')
+        self.connected = False
+        self._handlers: Dict[str, List[Callable[[Dict[str, Any]], None]]] = {}
+        self._connect_callbacks: List[Callable[[], Awaitable[None]]] = []
+        self._task: Optional[asyncio.Task] = None
+
+    def on(self, event_type: str, handler: Callable[[Dict[str, Any]], None]):
+        """Call handler(event) for every event whose 'e' field is event_type"""
+        self._handlers.setdefault(event_type, []).append(handler)
+
+    def on_connect(self, callback: Callable[[], Awaitable[None]]):
+        self._connect_callbacks.append(callback)
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def close(self):
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _listen_key(self) -> str:
+        # python-binance's async helper targets /api/v1; spot serves it under v3
+        res = await self.client._post('userDataStream', False, data={}, version=self.client.PRIVATE_API_VERSION)
+        return res['listenKey']
+
+    async def _keepalive(self, listen_key: str):
+        while True:
+            await asyncio.sleep(LISTEN_KEY_KEEPALIVE)
+            try:
+                await self.client._put(
+                    'userDataStream', False, data={'listenKey': listen_key},
+                    version=self.client.PRIVATE_API_VERSION
+                )
+            except Exception as e:
+                logger.warning("Listen key keepalive failed: %s", e)
+
+    async def _run(self):
+        backoff = 1
+        while True:
+            keepalive = None
+            try:
+                listen_key = await self._listen_key()
+                async with websockets.connect(f"{self.stream_url}/ws/{listen_key}") as ws:
+                    keepalive = asyncio.create_task(self._keepalive(listen_key))
+                    backoff = 1
+                    for callback in self._connect_callbacks:
+                        try:
+                            await callback()
+                        except Exception as e:
+                            logger.warning("User stream connect callback failed: %s", e)
+                    self.connected = True
+                    async for message in ws:
+                        self._dispatch(json.loads(message))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning("User data stream failed: %s", e)
+            finally:
+                self.connected = False
+                if keepalive:
+                    keepalive.cancel()
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, 30)
+
+    def _dispatch(self, event: Dict[str, Any]):
+        event = event.get('data', event)
+        for handler in self._handlers.get(event.get('e'), []):
+            try:
+                handler(event)
+            except Exception:
+                logger.exception("User stream handler failed for %s", event.get('e'))
@@ -0,0 +1,197 @@
+import asyncio
+import hashlib
+import hmac
+import itertools
+import json
+import os
+import time
+from typing import Optional, Dict, Any, List
+from urllib.parse import urlencode
+
+import websockets
+from binance.exceptions import BinanceAPIException
+
+from .clock import clock
+from .logger import get_logger
+from .metrics import STAGE_SECONDS, BINANCE_REQUEST_SECONDS, BINANCE_ERRORS
+from .rate_limiter import rate_limiter
+
+# 'rest' sends orders over HTTPS; 'ws' keeps one WebSocket API connection open for them
+ORDER_TRANSPORT = os.getenv('ORDER_TRANSPORT', 'rest').lower()
+BINANCE_WS_API_URL = os.getenv('BINANCE_WS_API_URL', 'wss://ws-api.testnet.binance.vision/ws-api/v3')
+WS_API_TIMEOUT = float(os.getenv('WS_API_TIMEOUT', '10'))
+
+# WebSocket API methods and the REST endpoint whose weight and order count they share
+WS_METHOD_ENDPOINTS = {
+    'order.place': ('post', 'order'),
+    'order.cancel': ('delete', 'order'),
+    'order.status': ('get', 'order'),
+    'openOrders.status': ('get', 'openOrders'),
+    'openOrders.cancelAll': ('delete', 'openOrders'),
+}
+
+INTERVAL_LETTERS = {'SECOND': 'S', 'MINUTE': 'M', 'HOUR': 'H', 'DAY': 'D'}
+
+logger = get_logger('ws_api')
+
+
+def rate_limit_headers(rate_limits: List[Dict[str, Any]]) -> Dict[str, str]:
+    """Express a WebSocket API rateLimits array as the equivalent X-MBX-* REST headers"""
+    headers = {}
+    for limit in rate_limits:
+        if 'count' not in limit:
+            continue
+        kind = 'USED-WEIGHT' if limit['rateLimitType'] == 'REQUEST_WEIGHT' else 'ORDER-COUNT'
+        interval = f"{limit['intervalNum']}{INTERVAL_LETTERS.get(limit['interval'], '')}"
+        headers[f"X-MBX-{kind}-{interval}"] = str(limit['count'])
+    return headers
+
+
+class WebSocketAPIClient:
+    """
+    Order entry over Binance's WebSocket API
+
+    Keeps one connection to the WebSocket API open and reconnects with
+    backoff when it drops. Each request carries an id, and the reader task
+    resolves the matching future when the response arrives, so any number
+    of requests can be in flight on the connection. HMAC keys cannot log
+    the session on, so every request is signed on its own, which is a
+    single HMAC over the sorted parameters. Requests draw on the shared
+    rate limiter like their REST equivalents. The URL can point at a local
+    WebSocket server for testing.
+    """
+
+    def __init__(self, api_key: str, api_secret: str, url: str = BINANCE_WS_API_URL, timeout: float = WS_API_TIMEOUT):
+        self.api_key = api_key
+        self.api_secret = api_secret.encode()
+        self.url = url
+        self.timeout = timeout
+        self._ws = None
+        self._connected = asyncio.Event()
+        self._pending: Dict[str, asyncio.Future] = {}
+        self._ids = itertools.count(1)
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def connected(self) -> bool:
+        return self._connected.is_set()
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def wait_connected(self, timeout: float) -> bool:
+        try:
+            await asyncio.wait_for(self._connected.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    async def close(self):
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _run(self):
+        backoff = 1
+        while True:
+            try:
+                async with websockets.connect(self.url, max_size=None) as ws:
+                    self._ws = ws
+                    self._connected.set()
+                    backoff = 1
+                    logger.info("WebSocket API connected")
+                    async for message in ws:
+                        self._handle(json.loads(message))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning("WebSocket API connection failed: %s", e)
+            finally:
+                self._ws = None
+                self._connected.clear()
+                self._fail_pending(ConnectionError("WebSocket API connection closed"))
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, 30)
+
+    def _fail_pending(self, error: Exception):
+        pending, self._pending = self._pending, {}
+        for future in pending.values():
+            if not future.done():
+                future.set_exception(error)
+
+    def _handle(self, message: Dict[str, Any]):
+        future = self._pending.pop(str(message.get('id')), None)
+        status = message.get('status', 200)
+
+        headers = rate_limit_headers(message.get('rateLimits') or [])
+        error = message.get('error')
+        if status in (418, 429) and error:
+            retry_after_ms = (error.get('data') or {}).get('retryAfter')
+            if retry_after_ms:
+                headers['Retry-After'] = str(max(0.0, retry_after_ms / 1000 - time.time()))
+        rate_limiter.update_from_response(headers, status)
+
+        if future is None or future.done():
+            return
+        if error is not None:
+            BINANCE_ERRORS.inc(str(error.get('code')))
+            future.set_exception(BinanceAPIException(None, status, json.dumps(error)))
+        else:
+            future.set_result(message.get('result'))
+
+    def _sign(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        params = {key: value for key, value in params.items() if value is not None}
+        params['apiKey'] = self.api_key
+        params['timestamp'] = int(time.time() * 1000) + (clock.offset_ms if clock.synced else 0)
+        if clock.synced:
+            params.setdefault('recvWindow', clock.recv_window)
+        payload = urlencode(sorted(params.items()))
+        params['signature'] = hmac.new(self.api_secret, payload.encode(), hashlib.sha256).hexdigest()
+        return params
+
+    async def request(self, method: str, params: Dict[str, Any]) -> Any:
+        """
+        Send a signed request and wait for its response
+
+        Raises:
+            ConnectionError: If the connection is down or drops before the response
+            BinanceAPIException: If the exchange answers with an error
+            asyncio.TimeoutError: If no response arrives within the timeout
+        """
+        http_method, path = WS_METHOD_ENDPOINTS[method]
+        with STAGE_SECONDS.time('rate_limit_wait'):
+            await rate_limiter.acquire(http_method, f"/api/v3/{path}", params)
+        if self._ws is None:
+            raise ConnectionError("WebSocket API is not connected")
+
+        with STAGE_SECONDS.time('sign'):
+            request_id = str(next(self._ids))
+            message = json.dumps({'id': request_id, 'method': method, 'params': self._sign(params)})
+
+        future = asyncio.get_running_loop().create_future()
+        self._pending[request_id] = future
+        with BINANCE_REQUEST_SECONDS.time('ws', method):
+            try:
+                await self._ws.send(message)
+                return await asyncio.wait_for(future, self.timeout)
+            finally:
+                self._pending.pop(request_id, None)
+
+    async def place_order(self, **params) -> Dict[str, Any]:
+        """order.place with the same parameters as Client.create_order"""
+        return await self.request('order.place', params)
+
+    async def cancel_order(
+        self, symbol: str, order_id: Optional[int] = None, client_order_id: Optional[str] = None
+    ) -> Dict[str, Any]:
+        return await self.request('order.cancel', {
+            'symbol': symbol, 'orderId': order_id, 'origClientOrderId': client_order_id,
+        })
+
+    async def cancel_open_orders(self, symbol: str) -> List[Dict[str, Any]]:
+        return await self.request('openOrders.cancelAll', {'symbol': symbol})
+
+    async def get_open_orders(self, symbol: Optional[str] = None) -> List[Dict[str, Any]]:
+        return await self.request('openOrders.status', {'symbol': symbol})
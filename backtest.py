@@ -0,0 +1,154 @@
+"""
+Download candles and replay strategies against them
+
+`download` fills the local kline store for each symbol from --since up
+to now, fetching only candles that are not stored yet. `run` maps the
+stored candles and replays a moving-average crossover through the
+vectorised backtest, which fills orders the way the exchange would and
+applies the symbol filters saved at download time.
+
+Usage:
+    python backtest.py download -s BTCUSDT,ETHUSDT -i 1m --since 2024-01-01
+    python backtest.py run -s BTCUSDT -i 1m --fast 20 --slow 120 --quantity 0.01
+    python backtest.py run -s BTCUSDT -i 1h --order-type LIMIT --fills > fills.jsonl
+"""
+import argparse
+import json
+import sys
+import time
+from typing import Dict, Any, List
+
+import numpy as np
+
+from app.backtest import Backtest, Orders, DEFAULT_COMMISSION
+from app.binance_client import BinanceClient
+from app.cli import parse_since
+from app.exchange_info import SymbolFilters
+from app.klines import KlineStore, Klines, KLINE_DATA_DIR, INTERVAL_MS, download, interval_ms
+
+
+def moving_average(values: np.ndarray, window: int) -> np.ndarray:
+    """Trailing mean over window values; NaN until the window is full"""
+    sums = np.cumsum(np.concatenate([[0.0], values]))
+    averages = np.full(len(values), np.nan)
+    averages[window - 1:] = (sums[window:] - sums[:-window]) / window
+    return averages
+
+
+def crossover_orders(klines: Klines, fast: int, slow: int, quantity: float, order_type: str) -> List[Dict[str, Any]]:
+    """
+    Go long when the fast average closes above the slow one and flat when it closes below
+
+    Each order is sent at the open of the candle after the cross; LIMIT
+    orders are priced at the close that triggered them.
+    """
+    close = np.asarray(klines.close, dtype=np.float64)
+    above = moving_average(close, fast) > moving_average(close, slow)
+    crosses = np.flatnonzero(above[1:] != above[:-1]) + 1
+    crosses = crosses[crosses >= slow]
+    # Start flat: the first order must be a BUY
+    if len(crosses) and not above[crosses[0]]:
+        crosses = crosses[1:]
+    step = interval_ms(klines.interval)
+    return [
+        {
+            'time': int(klines.open_time[i]) + step,
+            'side': 'BUY' if above[i] else 'SELL',
+            'order_type': order_type,
+            'quantity': quantity,
+            'price': float(close[i]) if order_type == 'LIMIT' else None,
+        }
+        for i in crosses
+    ]
+
+
+def run_download(args: argparse.Namespace) -> int:
+    bot = BinanceClient()
+    store = KlineStore(args.data_dir)
+    failed = 0
+    for symbol in args.symbols:
+        started = time.perf_counter()
+        try:
+            store.save_symbol_info(symbol, bot.get_symbol_info(symbol))
+            added = download(bot, store, symbol, args.interval, args.since, args.until, args.concurrency)
+        except Exception as e:
+            print(f"{symbol}: {e}", file=sys.stderr)
+            failed += 1
+            continue
+        print(
+            f"{symbol} {args.interval}: {added} candles added in {time.perf_counter() - started:.2f}s, "
+            f"{len(store.load(symbol, args.interval))} stored",
+            file=sys.stderr
+        )
+    return 1 if failed else 0
+
+
+def run_backtest(args: argparse.Namespace) -> int:
+    store = KlineStore(args.data_dir)
+    status = 0
+    for symbol in args.symbols:
+        started = time.perf_counter()
+        klines = store.load(symbol, args.interval, args.since, args.until)
+        if not len(klines):
+            print(f"{symbol}: no {args.interval} candles stored, run download first", file=sys.stderr)
+            status = 1
+            continue
+        symbol_info = store.symbol_info(symbol)
+        filters = SymbolFilters(symbol_info) if symbol_info else None
+        orders = Orders(klines, crossover_orders(klines, args.fast, args.slow, args.quantity, args.order_type), filters)
+        result = Backtest(klines, args.commission).run(orders)
+        summary = {'symbol': symbol, 'interval': args.interval, 'candles': len(klines), **result.summary()}
+        summary['seconds'] = round(time.perf_counter() - started, 3)
+        if args.fills:
+            for row in result.fills():
+                print(json.dumps({'symbol': symbol, **row}))
+        else:
+            print(json.dumps(summary))
+        print(
+            f"{symbol}: {summary['candles']} candles, {summary['filled']}/{summary['orders']} orders filled, "
+            f"pnl {summary['pnl']:.2f} in {summary['seconds']:.2f}s",
+            file=sys.stderr
+        )
+    return status
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Download candles and backtest strategies against them")
+    parser.add_argument('--data-dir', default=KLINE_DATA_DIR, help=f"Kline store directory (default {KLINE_DATA_DIR})")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    for name, help_text in (('download', "Fetch missing candles into the store"), ('run', "Backtest a moving-average crossover")):
+        command = commands.add_parser(name, help=help_text)
+        command.add_argument('-s', '--symbols', required=True, type=lambda value: [s.strip().upper() for s in value.split(',') if s.strip()],
+                             help="Comma-separated symbols")
+        command.add_argument('-i', '--interval', default='1m', choices=list(INTERVAL_MS), help="Candle interval (default 1m)")
+        command.add_argument('--since', type=parse_since, help="Start time (epoch ms or ISO date)")
+        command.add_argument('--until', type=parse_since, help="End time, exclusive (default now)")
+        if name == 'download':
+            command.add_argument('-c', '--concurrency', type=int, default=4, help="Pages fetched in parallel (default 4)")
+        else:
+            command.add_argument('--fast', type=int, default=20, help="Fast moving average, in candles (default 20)")
+            command.add_argument('--slow', type=int, default=120, help="Slow moving average, in candles (default 120)")
+            command.add_argument('--quantity', type=float, required=True, help="Quantity of each order")
+            command.add_argument('--order-type', choices=['MARKET', 'LIMIT'], default='MARKET', help="Order type (default MARKET)")
+            command.add_argument('--commission', type=float, default=DEFAULT_COMMISSION,
+                                 help=f"Fee per fill as a fraction of notional (default {DEFAULT_COMMISSION})")
+            command.add_argument('--fills', action='store_true', help="Output every order as a JSON line instead of the summary")
+
+    args = parser.parse_args(argv)
+    if args.command == 'download' and args.since is None:
+        parser.error("download needs --since")
+    if args.command == 'run' and not 0 < args.fast < args.slow:
+        parser.error("--fast must be positive and smaller than --slow")
+    return args
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    if args.command == 'download':
+        return run_download(args)
+    return run_backtest(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
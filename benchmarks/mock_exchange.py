@@ -0,0 +1,786 @@
+"""
+Local stand-in for the Binance spot REST API
+
+Serves the endpoints the trading bot uses (order, openOrders, allOrders,
+exchangeInfo, depth, ticker, klines, account, time) from memory, with
+configurable latency and error injection, so the order path can be
+benchmarked without the testnet. Klines follow a deterministic price path.
+The same port also serves the market data streams. Depth streams replay
+a fixed cycle of recorded diffs against the book that GET depth serves,
+optionally dropping every Nth event to simulate a missed update, and the
+combined stream pushes mini tickers and subscribed book tickers once a
+second.
+/ws-api/v3 answers the WebSocket API order methods (order.place,
+order.cancel, order.status, openOrders.status, openOrders.cancelAll)
+from the same book, with the same latency and error injection per
+request. Signatures are only checked when the mock is given the API
+secret.
+POST /api/v3/userDataStream hands out listen keys, and /ws/<listenKey>
+streams executionReport and outboundAccountPosition events for every
+order placed, cancelled or filled (fill() fills a resting order) against
+a balance book that GET account reports.
+
+Usage:
+    python -m benchmarks.mock_exchange --port 18080 --latency-ms 20 --jitter-ms 5 --error-rate 0.01
+    python -m benchmarks.mock_exchange --port 18080 --depth-gap-every 50
+"""
+import argparse
+import asyncio
+import hashlib
+import hmac
+import itertools
+import json
+import math
+import random
+import secrets
+import time
+from typing import Optional, Dict, Any, List
+from urllib.parse import urlencode
+
+from aiohttp import web
+
+DEFAULT_PRICES = {
+    'BTCUSDT': 30000.0,
+    'ETHUSDT': 2000.0,
+    'BNBUSDT': 300.0,
+}
+
+# Endpoints that never fail, so clients can always warm up
+NO_FAULT_PATHS = {'/api/v3/ping', '/api/v3/time', '/api/v3/exchangeInfo', '/api/v3/userDataStream'}
+
+QUOTE_ASSET = 'USDT'
+QUOTE_BALANCE = 1000000.0
+BASE_BALANCE = 100.0
+
+# Price levels per side of each mock book, all 0.01 apart
+DEPTH_LEVELS = 1000
+
+# Depth changes replayed in a cycle by the depth streams, as (side, ticks from
+# the symbol's price, quantity); a zero quantity removes the level. Each change
+# takes one update id, so an event spans as many ids as it has changes.
+DEPTH_DIFFS = [
+    [('b', 1, '2.50000000'), ('a', 1, '0.75000000')],
+    [('b', 3, '0.00000000')],
+    [('a', 2, '0.00000000'), ('a', 1, '1.20000000')],
+    [('b', 3, '1.10000000'), ('b', 1, '1.00000000'), ('a', 4, '6.00000000')],
+    [('a', 2, '0.40000000'), ('b', 2, '3.00000000')],
+    [('b', 2, '1.00000000'), ('a', 2, '1.00000000'), ('a', 4, '1.00000000'), ('a', 1, '1.00000000')],
+]
+
+KLINE_INTERVALS = {'1s': 1000, '1m': 60_000, '5m': 300_000, '15m': 900_000, '1h': 3_600_000, '1d': 86_400_000}
+
+
+class OrderError(Exception):
+    """Binance error raised by the order book and returned over REST or the WebSocket API"""
+
+    def __init__(self, code: int, msg: str, status: int = 400):
+        super().__init__(msg)
+        self.code = code
+        self.msg = msg
+        self.status = status
+
+
+class MockExchange:
+    """
+    In-memory spot exchange
+
+    Args:
+        latency_ms: Mean delay added to every response
+        jitter_ms: Standard deviation of that delay
+        error_rate: Fraction of requests (outside NO_FAULT_PATHS) answered with an error
+        error_status: HTTP status of injected errors
+        error_code: Binance error code of injected errors
+        rate_limit: Weight and order limits advertised in exchangeInfo;
+            high by default so the client's own limiter does not pace the benchmark
+        seed: Seed for the latency and error draws
+        depth_interval_ms: Time between depth stream events
+        depth_gap_every: Apply but do not send every Nth depth event, so
+            subscribers see a gap in the update ids; 0 sends every event
+        depth_events: Stop replaying after this many events per symbol; 0 never stops
+        api_secret: Check WebSocket API signatures against this secret; None accepts any
+    """
+
+    def __init__(
+        self,
+        latency_ms: float = 0.0,
+        jitter_ms: float = 0.0,
+        error_rate: float = 0.0,
+        error_status: int = 400,
+        error_code: int = -2010,
+        rate_limit: int = 1000000,
+        prices: Optional[Dict[str, float]] = None,
+        seed: Optional[int] = None,
+        depth_interval_ms: float = 100.0,
+        depth_gap_every: int = 0,
+        depth_events: int = 0,
+        api_secret: Optional[str] = None
+    ):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.error_code = error_code
+        self.rate_limit = rate_limit
+        self.api_secret = api_secret
+        self.prices = dict(prices or DEFAULT_PRICES)
+        self.random = random.Random(seed)
+        self.orders: Dict[int, Dict[str, Any]] = {}
+        self.order_ids = itertools.count(1)
+        self.requests: Dict[str, int] = {}
+        self.injected_errors = 0
+        self.depth_interval_ms = depth_interval_ms
+        self.depth_gap_every = depth_gap_every
+        self.depth_events = depth_events
+        # symbol -> {'b': {ticks: quantity}, 'a': {ticks: quantity}, 'update_id': last update id}
+        self.books: Dict[str, Dict[str, Any]] = {}
+        self.depth_sent = 0
+        self.depth_dropped = 0
+        self._depth_subscribers: Dict[str, set] = {}
+        self._depth_replays: Dict[str, asyncio.Task] = {}
+        # asset -> [free, locked]
+        self.balances: Dict[str, List[float]] = {QUOTE_ASSET: [QUOTE_BALANCE, 0.0]}
+        for symbol in self.prices:
+            self.balances[symbol[:-len(QUOTE_ASSET)]] = [BASE_BALANCE, 0.0]
+        self.listen_keys = set()
+        # Outgoing event queue of each connected user-data stream
+        self._user_streams: Dict[web.WebSocketResponse, asyncio.Queue] = {}
+        self._ws_api_connections = set()
+
+    def app(self) -> web.Application:
+        app = web.Application(middlewares=[self._middleware])
+        app.router.add_get('/api/v3/ping', self.ping)
+        app.router.add_get('/api/v3/time', self.server_time)
+        app.router.add_get('/api/v3/exchangeInfo', self.exchange_info)
+        app.router.add_get('/api/v3/depth', self.depth)
+        app.router.add_get('/api/v3/ticker/price', self.ticker_price)
+        app.router.add_get('/api/v3/ticker/bookTicker', self.book_ticker)
+        app.router.add_get('/api/v3/klines', self.klines)
+        app.router.add_get('/api/v3/account', self.account)
+        app.router.add_post('/api/v3/userDataStream', self.new_listen_key)
+        app.router.add_put('/api/v3/userDataStream', self.keepalive_listen_key)
+        app.router.add_post('/api/v3/order', self.new_order)
+        app.router.add_get('/api/v3/order', self.query_order)
+        app.router.add_delete('/api/v3/order', self.cancel_order)
+        app.router.add_get('/api/v3/openOrders', self.open_orders)
+        app.router.add_get('/api/v3/allOrders', self.all_orders)
+        app.router.add_delete('/api/v3/openOrders', self.cancel_open_orders)
+        app.router.add_get('/ws/{stream}', self.raw_stream)
+        app.router.add_get('/stream', self.combined_stream)
+        app.router.add_get('/ws-api/v3', self.ws_api)
+        app.router.add_get('/mock/stats', self.stats)
+        return app
+
+    @web.middleware
+    async def _middleware(self, request: web.Request, handler):
+        if request.path.startswith(('/ws/', '/stream', '/ws-api/')):
+            return await handler(request)
+        key = f"{request.method} {request.path}"
+        if await self._delay_and_fault(key, request.path not in NO_FAULT_PATHS):
+            return web.json_response(
+                {'code': self.error_code, 'msg': 'Injected error'},
+                status=self.error_status
+            )
+        return await handler(request)
+
+    async def _delay_and_fault(self, key: str, faultable: bool = True) -> bool:
+        """Count the request, apply the configured latency and return whether to inject an error"""
+        self.requests[key] = self.requests.get(key, 0) + 1
+        if self.latency_ms or self.jitter_ms:
+            delay = self.random.gauss(self.latency_ms, self.jitter_ms) if self.jitter_ms else self.latency_ms
+            await asyncio.sleep(max(0.0, delay) / 1000)
+        if self.error_rate and faultable and self.random.random() < self.error_rate:
+            self.injected_errors += 1
+            return True
+        return False
+
+    @staticmethod
+    async def _params(request: web.Request) -> Dict[str, str]:
+        params = dict(request.query)
+        if request.can_read_body:
+            params.update(await request.post())
+        return params
+
+    def _error(self, code: int, msg: str, status: int = 400) -> web.Response:
+        return web.json_response({'code': code, 'msg': msg}, status=status)
+
+    async def ping(self, request: web.Request) -> web.Response:
+        return web.json_response({})
+
+    async def server_time(self, request: web.Request) -> web.Response:
+        return web.json_response({'serverTime': int(time.time() * 1000)})
+
+    async def exchange_info(self, request: web.Request) -> web.Response:
+        return web.json_response({
+            'timezone': 'UTC',
+            'serverTime': int(time.time() * 1000),
+            'rateLimits': [
+                {'rateLimitType': 'REQUEST_WEIGHT', 'interval': 'MINUTE', 'intervalNum': 1, 'limit': self.rate_limit},
+                {'rateLimitType': 'ORDERS', 'interval': 'SECOND', 'intervalNum': 10, 'limit': self.rate_limit},
+                {'rateLimitType': 'ORDERS', 'interval': 'DAY', 'intervalNum': 1, 'limit': self.rate_limit},
+            ],
+            'symbols': [self._symbol_info(symbol) for symbol in self.prices],
+        })
+
+    @staticmethod
+    def _symbol_info(symbol: str) -> Dict[str, Any]:
+        return {
+            'symbol': symbol,
+            'status': 'TRADING',
+            'baseAsset': symbol[:-4],
+            'quoteAsset': 'USDT',
+            'orderTypes': ['LIMIT', 'MARKET', 'STOP_LOSS_LIMIT'],
+            'filters': [
+                {'filterType': 'PRICE_FILTER', 'minPrice': '0.01000000', 'maxPrice': '1000000.00000000', 'tickSize': '0.01000000'},
+                {'filterType': 'LOT_SIZE', 'minQty': '0.00001000', 'maxQty': '9000.00000000', 'stepSize': '0.00001000'},
+                {'filterType': 'NOTIONAL', 'minNotional': '5.00000000', 'applyMinToMarket': True,
+                 'maxNotional': '9000000.00000000', 'applyMaxToMarket': False, 'avgPriceMins': 5},
+            ],
+        }
+
+    def _book(self, symbol: str) -> Dict[str, Any]:
+        book = self.books.get(symbol)
+        if book is None:
+            ladder = {ticks: '1.00000000' for ticks in range(1, DEPTH_LEVELS + 1)}
+            book = self.books[symbol] = {'b': dict(ladder), 'a': dict(ladder), 'update_id': 1}
+        return book
+
+    def _level_price(self, symbol: str, side: str, ticks: int) -> str:
+        price = self.prices[symbol]
+        return f"{price - ticks * 0.01 if side == 'b' else price + ticks * 0.01:.2f}"
+
+    def book_snapshot(self, symbol: str, limit: int = 100) -> Dict[str, Any]:
+        """The book in the shape of GET depth, best levels first"""
+        book = self._book(symbol)
+        return {
+            'lastUpdateId': book['update_id'],
+            'bids': [[self._level_price(symbol, 'b', ticks), book['b'][ticks]] for ticks in sorted(book['b'])[:limit]],
+            'asks': [[self._level_price(symbol, 'a', ticks), book['a'][ticks]] for ticks in sorted(book['a'])[:limit]],
+        }
+
+    async def depth(self, request: web.Request) -> web.Response:
+        symbol = request.query.get('symbol')
+        if symbol not in self.prices:
+            return self._error(-1121, 'Invalid symbol.')
+        return web.json_response(self.book_snapshot(symbol, int(request.query.get('limit', 100))))
+
+    def _next_depth_event(self, symbol: str, sequence: int) -> Dict[str, Any]:
+        """Apply the next recorded diff to the book and return it as a depthUpdate event"""
+        book = self._book(symbol)
+        changes = DEPTH_DIFFS[sequence % len(DEPTH_DIFFS)]
+        event = {
+            'e': 'depthUpdate', 'E': int(time.time() * 1000), 's': symbol,
+            'U': book['update_id'] + 1, 'u': book['update_id'] + len(changes), 'b': [], 'a': [],
+        }
+        for side, ticks, quantity in changes:
+            if float(quantity):
+                book[side][ticks] = quantity
+            else:
+                book[side].pop(ticks, None)
+            event[side].append([self._level_price(symbol, side, ticks), quantity])
+        book['update_id'] = event['u']
+        return event
+
+    async def _replay_depth(self, symbol: str):
+        """Send the recorded diffs to every subscriber of symbol, dropping every depth_gap_every-th"""
+        sequence = 0
+        while not self.depth_events or sequence < self.depth_events:
+            await asyncio.sleep(self.depth_interval_ms / 1000)
+            event = self._next_depth_event(symbol, sequence)
+            sequence += 1
+            if self.depth_gap_every and sequence % self.depth_gap_every == 0:
+                self.depth_dropped += 1
+                continue
+            message = json.dumps(event)
+            for ws in list(self._depth_subscribers.get(symbol, ())):
+                try:
+                    await ws.send_str(message)
+                except ConnectionError:
+                    self._depth_subscribers[symbol].discard(ws)
+            self.depth_sent += 1
+
+    async def ticker_price(self, request: web.Request) -> web.Response:
+        symbol = request.query.get('symbol')
+        if symbol is None:
+            return web.json_response([{'symbol': s, 'price': f"{p:.2f}"} for s, p in self.prices.items()])
+        if symbol not in self.prices:
+            return self._error(-1121, 'Invalid symbol.')
+        return web.json_response({'symbol': symbol, 'price': f"{self.prices[symbol]:.2f}"})
+
+    async def book_ticker(self, request: web.Request) -> web.Response:
+        symbol = request.query.get('symbol')
+        if symbol not in self.prices:
+            return self._error(-1121, 'Invalid symbol.')
+        price = self.prices[symbol]
+        return web.json_response({
+            'symbol': symbol,
+            'bidPrice': f"{price - 0.01:.2f}", 'bidQty': '1.00000000',
+            'askPrice': f"{price + 0.01:.2f}", 'askQty': '1.00000000',
+        })
+
+    def _price_at(self, symbol: str, ms: int) -> float:
+        """A deterministic price path around the symbol's price, so repeated downloads agree"""
+        base = self.prices[symbol]
+        return base * (1 + 0.02 * math.sin(ms / 3_600_000) + 0.002 * math.sin(ms / 97_000))
+
+    async def klines(self, request: web.Request) -> web.Response:
+        symbol = request.query.get('symbol')
+        if symbol not in self.prices:
+            return self._error(-1121, 'Invalid symbol.')
+        step = KLINE_INTERVALS.get(request.query.get('interval'))
+        if step is None:
+            return self._error(-1120, 'Invalid interval.')
+        limit = min(int(request.query.get('limit', 500)), 1000)
+        now = int(time.time() * 1000)
+        end = min(int(request.query.get('endTime', now)), now)
+        start = int(request.query.get('startTime', end - step * (limit - 1)))
+        candles = []
+        # Like the exchange, the candle that is still open is included
+        for open_time in range(start + (-start) % step, end + 1, step):
+            if len(candles) == limit:
+                break
+            prices = [self._price_at(symbol, open_time + step * i // 4) for i in range(5)]
+            volume = 1 + (open_time // step) % 7
+            candles.append([
+                open_time, f"{prices[0]:.2f}", f"{max(prices):.2f}", f"{min(prices):.2f}", f"{prices[-1]:.2f}",
+                f"{volume:.8f}", open_time + step - 1, f"{volume * prices[-1]:.8f}", 10 * volume,
+                f"{volume / 2:.8f}", f"{volume * prices[-1] / 2:.8f}", '0',
+            ])
+        return web.json_response(candles)
+
+    async def account(self, request: web.Request) -> web.Response:
+        balances = [
+            {'asset': asset, 'free': f"{free:.8f}", 'locked': f"{locked:.8f}"}
+            for asset, (free, locked) in self.balances.items()
+        ]
+        return web.json_response({
+            'makerCommission': 10, 'takerCommission': 10,
+            'canTrade': True, 'canWithdraw': True, 'canDeposit': True,
+            'updateTime': int(time.time() * 1000),
+            'accountType': 'SPOT',
+            'balances': balances,
+            'permissions': ['SPOT'],
+        })
+
+    async def new_order(self, request: web.Request) -> web.Response:
+        try:
+            return web.json_response(self.place(await self._params(request)))
+        except OrderError as e:
+            return self._error(e.code, e.msg, e.status)
+
+    def place(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        symbol = params.get('symbol')
+        if symbol not in self.prices:
+            raise OrderError(-1121, 'Invalid symbol.')
+
+        order_type = params.get('type')
+        quantity = str(params.get('quantity', '0'))
+        now = int(time.time() * 1000)
+        filled = order_type == 'MARKET'
+        price = self.prices[symbol]
+        order_id = next(self.order_ids)
+        order = {
+            'symbol': symbol,
+            'orderId': order_id,
+            'orderListId': -1,
+            'clientOrderId': params.get('newClientOrderId') or f"mock{order_id}",
+            'transactTime': now,
+            'price': str(params.get('price', '0.00000000')),
+            'origQty': quantity,
+            'executedQty': quantity if filled else '0.00000000',
+            'cummulativeQuoteQty': f"{float(quantity) * price:.8f}" if filled else '0.00000000',
+            'status': 'FILLED' if filled else 'NEW',
+            'timeInForce': params.get('timeInForce', 'GTC'),
+            'type': order_type,
+            'side': params.get('side'),
+            'stopPrice': str(params.get('stopPrice', '0.00000000')),
+            'workingTime': now,
+            'selfTradePreventionMode': 'NONE',
+            'fills': [],
+        }
+        if filled:
+            order['fills'] = [{
+                'price': f"{price:.2f}", 'qty': quantity, 'commission': '0.00000000',
+                'commissionAsset': 'BNB', 'tradeId': order['orderId'],
+            }]
+        self.orders[order['orderId']] = order
+        base = symbol[:-len(QUOTE_ASSET)]
+        if filled:
+            quote = float(order['cummulativeQuoteQty'])
+            self._move(QUOTE_ASSET, -quote if order['side'] == 'BUY' else quote)
+            self._move(base, float(quantity) if order['side'] == 'BUY' else -float(quantity))
+        else:
+            self._lock_funds(order, 1)
+        self._push_execution_report(order, 'NEW', now)
+        if filled:
+            self._push_execution_report(order, 'TRADE', now, last_qty=quantity, last_price=f"{price:.2f}")
+        self._push_account_position([QUOTE_ASSET, base], now)
+        return order
+
+    def fill(self, order_id: int) -> Dict[str, Any]:
+        """Fill the rest of a resting order at its limit price, as a matching trade would"""
+        order = self.orders[order_id]
+        if order['status'] not in ('NEW', 'PARTIALLY_FILLED'):
+            raise OrderError(-2011, 'Unknown order sent.')
+        now = int(time.time() * 1000)
+        remaining = float(order['origQty']) - float(order['executedQty'])
+        price = float(order['price'])
+        self._lock_funds(order, -1)
+        base = order['symbol'][:-len(QUOTE_ASSET)]
+        self._move(QUOTE_ASSET, -remaining * price if order['side'] == 'BUY' else remaining * price)
+        self._move(base, remaining if order['side'] == 'BUY' else -remaining)
+        order.update(
+            status='FILLED', updateTime=now, executedQty=order['origQty'],
+            cummulativeQuoteQty=f"{float(order['cummulativeQuoteQty']) + remaining * price:.8f}",
+        )
+        self._push_execution_report(order, 'TRADE', now, last_qty=f"{remaining:.8f}", last_price=order['price'])
+        self._push_account_position([QUOTE_ASSET, base], now)
+        return self._order_view(order)
+
+    def _move(self, asset: str, amount: float, locked: float = 0.0):
+        """Add amount to the free and locked balance of asset"""
+        balance = self.balances.setdefault(asset, [0.0, 0.0])
+        balance[0] += amount
+        balance[1] += locked
+
+    def _lock_funds(self, order: Dict[str, Any], direction: int):
+        """Lock (direction 1) or release (-1) what the unfilled part of a resting order needs"""
+        remaining = float(order['origQty']) - float(order['executedQty'])
+        if order['side'] == 'BUY':
+            asset, amount = QUOTE_ASSET, remaining * float(order['price'])
+        else:
+            asset, amount = order['symbol'][:-len(QUOTE_ASSET)], remaining
+        self._move(asset, -direction * amount, direction * amount)
+
+    def _push_user_event(self, event: Dict[str, Any]):
+        message = json.dumps(event)
+        for events in self._user_streams.values():
+            events.put_nowait(message)
+
+    def _push_execution_report(
+        self,
+        order: Dict[str, Any],
+        execution_type: str,
+        now: int,
+        last_qty: str = '0.00000000',
+        last_price: str = '0.00000000',
+        cancel_id: Optional[str] = None
+    ):
+        trade = execution_type == 'TRADE'
+        self._push_user_event({
+            'e': 'executionReport', 'E': now, 's': order['symbol'],
+            'c': cancel_id or order['clientOrderId'], 'C': order['clientOrderId'] if cancel_id else '',
+            'S': order['side'], 'o': order['type'], 'f': order['timeInForce'],
+            'q': order['origQty'], 'p': order['price'], 'P': order['stopPrice'],
+            'x': execution_type, 'X': order['status'], 'r': 'NONE', 'i': order['orderId'],
+            'l': last_qty, 'z': order['executedQty'], 'L': last_price,
+            'n': '0.00000000', 'N': None, 'T': now, 't': order['orderId'] if trade else -1,
+            'm': False, 'O': order['transactTime'], 'Z': order['cummulativeQuoteQty'],
+            'Y': f"{float(last_qty) * float(last_price):.8f}",
+        })
+
+    def _push_account_position(self, assets: List[str], now: int):
+        self._push_user_event({
+            'e': 'outboundAccountPosition', 'E': now, 'u': now,
+            'B': [
+                {'a': asset, 'f': f"{self.balances[asset][0]:.8f}", 'l': f"{self.balances[asset][1]:.8f}"}
+                for asset in assets
+            ],
+        })
+
+    def _find_order(self, params: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        if params.get('orderId'):
+            return self.orders.get(int(params['orderId']))
+        client_order_id = params.get('origClientOrderId')
+        for order in self.orders.values():
+            if order['clientOrderId'] == client_order_id:
+                return order
+        return None
+
+    @staticmethod
+    def _order_view(order: Dict[str, Any]) -> Dict[str, Any]:
+        view = {key: value for key, value in order.items() if key not in ('fills', 'transactTime')}
+        view['time'] = order['transactTime']
+        view['updateTime'] = order.get('updateTime', order['transactTime'])
+        view['isWorking'] = True
+        return view
+
+    def status(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        order = self._find_order(params)
+        if order is None:
+            raise OrderError(-2013, 'Order does not exist.')
+        return self._order_view(order)
+
+    def cancel(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        order = self._find_order(params)
+        if order is None or order['status'] not in ('NEW', 'PARTIALLY_FILLED'):
+            raise OrderError(-2011, 'Unknown order sent.')
+        order['status'] = 'CANCELED'
+        order['updateTime'] = int(time.time() * 1000)
+        self._lock_funds(order, -1)
+        response = {key: value for key, value in order.items() if key not in ('fills', 'workingTime', 'stopPrice')}
+        response['origClientOrderId'] = order['clientOrderId']
+        response['clientOrderId'] = params.get('newClientOrderId') or f"cancel{order['orderId']}"
+        self._push_execution_report(order, 'CANCELED', order['updateTime'], cancel_id=response['clientOrderId'])
+        side_asset = QUOTE_ASSET if order['side'] == 'BUY' else order['symbol'][:-len(QUOTE_ASSET)]
+        self._push_account_position([side_asset], order['updateTime'])
+        return response
+
+    def open(self, params: Dict[str, Any]) -> List[Dict[str, Any]]:
+        symbol = params.get('symbol')
+        return [
+            self._order_view(order) for order in self.orders.values()
+            if order['status'] in ('NEW', 'PARTIALLY_FILLED') and symbol in (None, order['symbol'])
+        ]
+
+    def history(self, params: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """allOrders: orders of a symbol from orderId, or else from startTime, oldest first"""
+        symbol = params.get('symbol')
+        if symbol not in self.prices:
+            raise OrderError(-1121, 'Invalid symbol.')
+        limit = min(int(params.get('limit', 500)), 1000)
+        first_id = int(params.get('orderId', 0))
+        start_time = int(params.get('startTime', 0))
+        end_time = int(params.get('endTime', 2 ** 63))
+        orders = [
+            self._order_view(order) for order in self.orders.values()
+            if order['symbol'] == symbol and order['orderId'] >= first_id
+            and (first_id or start_time <= order['transactTime'] <= end_time)
+        ]
+        return orders[:limit]
+
+    def cancel_all(self, params: Dict[str, Any]) -> List[Dict[str, Any]]:
+        symbol = params.get('symbol')
+        if symbol not in self.prices:
+            raise OrderError(-1121, 'Invalid symbol.')
+        open_ids = [
+            order['orderId'] for order in self.orders.values()
+            if order['symbol'] == symbol and order['status'] in ('NEW', 'PARTIALLY_FILLED')
+        ]
+        if not open_ids:
+            raise OrderError(-2011, 'Unknown order sent.')
+        return [self.cancel({'orderId': order_id}) for order_id in open_ids]
+
+    async def query_order(self, request: web.Request) -> web.Response:
+        try:
+            return web.json_response(self.status(await self._params(request)))
+        except OrderError as e:
+            return self._error(e.code, e.msg, e.status)
+
+    async def cancel_order(self, request: web.Request) -> web.Response:
+        try:
+            return web.json_response(self.cancel(await self._params(request)))
+        except OrderError as e:
+            return self._error(e.code, e.msg, e.status)
+
+    async def cancel_open_orders(self, request: web.Request) -> web.Response:
+        try:
+            return web.json_response(self.cancel_all(await self._params(request)))
+        except OrderError as e:
+            return self._error(e.code, e.msg, e.status)
+
+    async def open_orders(self, request: web.Request) -> web.Response:
+        return web.json_response(self.open(dict(request.query)))
+
+    async def all_orders(self, request: web.Request) -> web.Response:
+        try:
+            return web.json_response(self.history(dict(request.query)))
+        except OrderError as e:
+            return self._error(e.code, e.msg, e.status)
+
+    async def new_listen_key(self, request: web.Request) -> web.Response:
+        listen_key = secrets.token_hex(32)
+        self.listen_keys.add(listen_key)
+        return web.json_response({'listenKey': listen_key})
+
+    async def keepalive_listen_key(self, request: web.Request) -> web.Response:
+        if (await self._params(request)).get('listenKey') not in self.listen_keys:
+            return self._error(-1125, 'This listenKey does not exist.')
+        return web.json_response({})
+
+    async def raw_stream(self, request: web.Request) -> web.WebSocketResponse:
+        if request.match_info['stream'] in self.listen_keys:
+            return await self.user_stream(request)
+        return await self.depth_stream(request)
+
+    async def user_stream(self, request: web.Request) -> web.WebSocketResponse:
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        # Events are queued by the order handlers and written in order by one writer per connection
+        events = self._user_streams[ws] = asyncio.Queue()
+
+        async def write():
+            while True:
+                await ws.send_str(await events.get())
+
+        writer = asyncio.create_task(write())
+        try:
+            async for _ in ws:
+                pass
+        finally:
+            del self._user_streams[ws]
+            writer.cancel()
+        return ws
+
+    async def drop_connections(self):
+        """Close every user-data stream and WebSocket API connection, as a network blip would"""
+        sockets = list(self._user_streams) + list(self._ws_api_connections)
+        await asyncio.gather(*(ws.close() for ws in sockets), return_exceptions=True)
+
+    async def depth_stream(self, request: web.Request) -> web.WebSocketResponse:
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        symbol, _, stream = request.match_info['stream'].partition('@')
+        symbol = symbol.upper()
+        # Other streams stay quiet
+        if not stream.startswith('depth') or symbol not in self.prices:
+            async for _ in ws:
+                pass
+            return ws
+
+        subscribers = self._depth_subscribers.setdefault(symbol, set())
+        subscribers.add(ws)
+        # One replay per symbol, shared by its subscribers, so they all see the same book
+        if symbol not in self._depth_replays:
+            self._depth_replays[symbol] = asyncio.create_task(self._replay_depth(symbol))
+        try:
+            async for _ in ws:
+                pass
+        finally:
+            subscribers.discard(ws)
+            if not subscribers:
+                self._depth_replays.pop(symbol).cancel()
+        return ws
+
+    async def combined_stream(self, request: web.Request) -> web.WebSocketResponse:
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        book_symbols = set()
+
+        async def push():
+            while True:
+                now = int(time.time() * 1000)
+                await ws.send_str(json.dumps({'stream': '!miniTicker@arr', 'data': [
+                    {'e': '24hrMiniTicker', 'E': now, 's': symbol, 'c': f"{price:.2f}"}
+                    for symbol, price in self.prices.items()
+                ]}))
+                for symbol in book_symbols:
+                    price = self.prices[symbol]
+                    await ws.send_str(json.dumps({'stream': f"{symbol.lower()}@bookTicker", 'data': {
+                        's': symbol, 'b': f"{price - 0.01:.2f}", 'B': '1.00000000',
+                        'a': f"{price + 0.01:.2f}", 'A': '1.00000000',
+                    }}))
+                await asyncio.sleep(1)
+
+        pusher = asyncio.create_task(push())
+        try:
+            async for message in ws:
+                request_data = json.loads(message.data)
+                if request_data.get('method') == 'SUBSCRIBE':
+                    for stream in request_data.get('params', []):
+                        symbol = stream.split('@')[0].upper()
+                        if symbol in self.prices:
+                            book_symbols.add(symbol)
+                    await ws.send_str(json.dumps({'result': None, 'id': request_data.get('id')}))
+        finally:
+            pusher.cancel()
+        return ws
+
+    async def ws_api(self, request: web.Request) -> web.WebSocketResponse:
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        methods = {
+            'order.place': self.place,
+            'order.cancel': self.cancel,
+            'order.status': self.status,
+            'openOrders.status': self.open,
+            'openOrders.cancelAll': self.cancel_all,
+        }
+
+        async def answer(message: Dict[str, Any]):
+            method = message.get('method')
+            response = {'id': message.get('id'), 'status': 200}
+            if method not in methods:
+                response.update(status=400, error={'code': -1100, 'msg': f"Unknown method {method}."})
+            elif not self._signature_valid(message.get('params') or {}):
+                response.update(status=400, error={'code': -1022, 'msg': 'Signature for this request is not valid.'})
+            elif await self._delay_and_fault(f"WS {method}"):
+                response.update(status=self.error_status, error={'code': self.error_code, 'msg': 'Injected error'})
+            else:
+                try:
+                    response['result'] = methods[method](message.get('params') or {})
+                except OrderError as e:
+                    response.update(status=e.status, error={'code': e.code, 'msg': e.msg})
+            response['rateLimits'] = [
+                {'rateLimitType': 'REQUEST_WEIGHT', 'interval': 'MINUTE', 'intervalNum': 1,
+                 'limit': self.rate_limit, 'count': 1},
+            ]
+            await ws.send_str(json.dumps(response))
+
+        # Requests on one connection are answered concurrently, as the real API does
+        pending = set()
+        self._ws_api_connections.add(ws)
+        try:
+            async for message in ws:
+                task = asyncio.create_task(answer(json.loads(message.data)))
+                pending.add(task)
+                task.add_done_callback(pending.discard)
+        finally:
+            self._ws_api_connections.discard(ws)
+            for task in pending:
+                task.cancel()
+        return ws
+
+    def _signature_valid(self, params: Dict[str, Any]) -> bool:
+        """HMAC-SHA256 over the other parameters, sorted and urlencoded, as the WebSocket API signs them"""
+        if self.api_secret is None:
+            return True
+        payload = urlencode(sorted((key, value) for key, value in params.items() if key != 'signature'))
+        expected = hmac.new(self.api_secret.encode(), payload.encode(), hashlib.sha256).hexdigest()
+        return hmac.compare_digest(expected, str(params.get('signature', '')))
+
+    async def stats(self, request: web.Request) -> web.Response:
+        return web.json_response({
+            'requests': self.requests,
+            'injected_errors': self.injected_errors,
+            'orders': len(self.orders),
+        })
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Local mock of the Binance spot REST API")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=18080)
+    parser.add_argument('--latency-ms', type=float, default=0.0, help="Mean added latency per request")
+    parser.add_argument('--jitter-ms', type=float, default=0.0, help="Standard deviation of the added latency")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="Fraction of requests answered with an error")
+    parser.add_argument('--error-status', type=int, default=400, help="HTTP status of injected errors")
+    parser.add_argument('--error-code', type=int, default=-2010, help="Binance error code of injected errors")
+    parser.add_argument('--rate-limit', type=int, default=1000000, help="Weight and order limits advertised in exchangeInfo")
+    parser.add_argument('--seed', type=int, help="Seed for latency and error draws")
+    parser.add_argument('--depth-interval-ms', type=float, default=100.0, help="Time between depth stream events")
+    parser.add_argument('--depth-gap-every', type=int, default=0, help="Drop every Nth depth event to simulate a gap (0 = never)")
+    parser.add_argument('--depth-events', type=int, default=0, help="Depth events replayed per symbol (0 = unlimited)")
+    parser.add_argument('--api-secret', help="Check WebSocket API signatures against this secret")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None):
+    args = parse_args(argv)
+    exchange = MockExchange(
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        error_rate=args.error_rate,
+        error_status=args.error_status,
+        error_code=args.error_code,
+        rate_limit=args.rate_limit,
+        seed=args.seed,
+        depth_interval_ms=args.depth_interval_ms,
+        depth_gap_every=args.depth_gap_every,
+        depth_events=args.depth_events,
+        api_secret=args.api_secret,
+    )
+    web.run_app(exchange.app(), host=args.host, port=args.port, print=None, access_log=None)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,345 @@
+"""
+Latency and throughput benchmarks for the order path
+
+Starts a local mock exchange (benchmarks.mock_exchange), points the app
+at it through BINANCE_API_URL, and drives each scenario with a fixed
+number of requests at a fixed concurrency. Results are written as JSON
+with p50/p95/p99 latency and throughput per scenario; passing a previous
+result file as --baseline fails the run when a scenario regresses by more
+than --max-regression.
+
+Usage:
+    python -m benchmarks.run
+    python -m benchmarks.run --requests 2000 --concurrency 50 --latency-ms 20 --jitter-ms 5
+    python -m benchmarks.run --scenarios place_order,http_place_order --baseline benchmarks/results/main.json
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import math
+import os
+import platform
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Optional, Dict, Any, List, Callable, Awaitable
+
+import aiohttp
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SCENARIOS = [
+    'http_place_order', 'api_place_order', 'place_order', 'ws_place_order', 'sync_place_order',
+    'ticker', 'order_book', 'account',
+]
+
+# Order sent by the order scenarios; LIMIT below the mock price so it rests on the book
+ORDER = {'symbol': 'BTCUSDT', 'quantity': 0.001, 'order_type': 'LIMIT', 'side': 'BUY', 'price': 29000.0}
+
+RESULT_SCHEMA = 1
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(fraction * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def summarize(latencies: List[float], errors: int, duration: float) -> Dict[str, Any]:
+    latencies = sorted(latencies)
+    count = len(latencies)
+    return {
+        'requests': count,
+        'errors': errors,
+        'error_rate': round(errors / count, 4) if count else 0.0,
+        'duration_s': round(duration, 3),
+        'throughput_per_s': round(count / duration, 1) if duration else 0.0,
+        'latency_ms': {
+            'p50': round(percentile(latencies, 0.50) * 1000, 3),
+            'p95': round(percentile(latencies, 0.95) * 1000, 3),
+            'p99': round(percentile(latencies, 0.99) * 1000, 3),
+            'mean': round(sum(latencies) / count * 1000, 3) if count else 0.0,
+            'max': round(latencies[-1] * 1000, 3) if count else 0.0,
+        },
+    }
+
+
+async def drive(operation: Callable[[], Awaitable[Any]], requests: int, concurrency: int) -> Dict[str, Any]:
+    """
+    Run operation `requests` times from `concurrency` workers
+
+    Every call's latency is recorded; calls that raise also count as errors.
+    """
+    counter = itertools.count()
+    latencies: List[float] = []
+    errors = 0
+
+    async def worker():
+        nonlocal errors
+        while next(counter) < requests:
+            started = time.perf_counter()
+            try:
+                await operation()
+            except Exception:
+                errors += 1
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return summarize(latencies, errors, time.perf_counter() - started)
+
+
+async def wait_for_http(url: str, timeout: float = 30.0, process: Optional[subprocess.Popen] = None):
+    """Poll url until it answers 200"""
+    deadline = time.monotonic() + timeout
+    async with aiohttp.ClientSession() as session:
+        while time.monotonic() < deadline:
+            if process is not None and process.poll() is not None:
+                raise RuntimeError(f"Process serving {url} exited with status {process.returncode}")
+            try:
+                async with session.get(url) as response:
+                    if response.status == 200:
+                        return
+            except aiohttp.ClientError:
+                pass
+            await asyncio.sleep(0.1)
+    raise RuntimeError(f"Timed out waiting for {url}")
+
+
+def start_process(args: List[str], env: Dict[str, str]) -> subprocess.Popen:
+    return subprocess.Popen([sys.executable, *args], cwd=REPO_ROOT, env=env, stdout=subprocess.DEVNULL)
+
+
+def stop_process(process: subprocess.Popen):
+    process.terminate()
+    try:
+        process.wait(timeout=10)
+    except subprocess.TimeoutExpired:
+        process.kill()
+
+
+async def bench_http(name: str, args: argparse.Namespace, env: Dict[str, str]) -> Dict[str, Any]:
+    """POST the HTML form (/place_order) or the JSON API (/api/v1/orders) to a uvicorn worker in its own process"""
+    port = free_port()
+    server_env = {**env, 'ORDER_STORE_PATH': os.path.join(env['BENCHMARK_TMP'], f"{name}.db")}
+    server = start_process(
+        ['-m', 'uvicorn', 'app.main:app', '--host', '127.0.0.1', '--port', str(port), '--log-level', 'warning'],
+        server_env
+    )
+    try:
+        base_url = f"http://127.0.0.1:{port}"
+        await wait_for_http(f"{base_url}/ready", process=server)
+        connector = aiohttp.TCPConnector(limit=args.concurrency)
+        async with aiohttp.ClientSession(connector=connector) as session:
+            if name == 'api_place_order':
+                async def place_order():
+                    async with session.post(f"{base_url}/api/v1/orders", json=ORDER) as response:
+                        await response.read()
+                        if response.status != 201:
+                            raise RuntimeError(f"Order failed with HTTP {response.status}")
+            else:
+                form = {key: str(value) for key, value in ORDER.items()}
+
+                async def place_order():
+                    async with session.post(f"{base_url}/place_order", data=form) as response:
+                        body = await response.text()
+                        if response.status != 200 or 'error-card' in body:
+                            raise RuntimeError(f"Order failed with HTTP {response.status}")
+
+            await drive(place_order, args.warm_up, args.concurrency)
+            return await drive(place_order, args.requests, args.concurrency)
+    finally:
+        stop_process(server)
+
+
+async def bench_client(name: str, args: argparse.Namespace) -> Dict[str, Any]:
+    """Call AsyncBinanceClient / BinanceClient methods in this process"""
+    from app.binance_client import AsyncBinanceClient, BinanceClient
+    from app.ws_api import WebSocketAPIClient
+
+    if name == 'sync_place_order':
+        bot = BinanceClient()
+        loop = asyncio.get_running_loop()
+        with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+            def operation():
+                return loop.run_in_executor(pool, lambda: bot.place_order(**ORDER))
+            await drive(operation, args.warm_up, args.concurrency)
+            return await drive(operation, args.requests, args.concurrency)
+
+    client = AsyncBinanceClient.connect()
+    if name == 'ws_place_order':
+        # Same client, with orders sent over the WebSocket API instead of REST
+        client.ws_api = WebSocketAPIClient(client.client.API_KEY, client.client.API_SECRET)
+    await client.warm_up()
+    try:
+        if name == 'ws_place_order' and not client.ws_api.connected:
+            raise RuntimeError("WebSocket API did not connect")
+        operations = {
+            'place_order': lambda: client.place_order(**ORDER),
+            'ws_place_order': lambda: client.place_order(**ORDER),
+            'ticker': lambda: client.get_ticker_price(ORDER['symbol']),
+            'order_book': lambda: client.get_order_book(ORDER['symbol']),
+            'account': client.get_account_info,
+        }
+        await drive(operations[name], args.warm_up, args.concurrency)
+        return await drive(operations[name], args.requests, args.concurrency)
+    finally:
+        await client.close()
+
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any], max_regression: float) -> List[str]:
+    """Describe every scenario that got slower or lost throughput beyond max_regression"""
+    regressions = []
+    for name, current in results['scenarios'].items():
+        previous = baseline.get('scenarios', {}).get(name)
+        if previous is None:
+            continue
+        for key in ('p50', 'p95', 'p99'):
+            before, after = previous['latency_ms'][key], current['latency_ms'][key]
+            if before and after > before * (1 + max_regression):
+                regressions.append(f"{name}: {key} latency {before:.3f}ms -> {after:.3f}ms")
+        before, after = previous['throughput_per_s'], current['throughput_per_s']
+        if before and after < before * (1 - max_regression):
+            regressions.append(f"{name}: throughput {before:.1f}/s -> {after:.1f}/s")
+    return regressions
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=REPO_ROOT, stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark the order path against a local mock exchange")
+    parser.add_argument('--scenarios', default=','.join(SCENARIOS), help=f"Comma-separated subset of {', '.join(SCENARIOS)}")
+    parser.add_argument('--requests', type=int, default=1000, help="Measured requests per scenario")
+    parser.add_argument('--warm-up', type=int, default=50, help="Unmeasured requests before each scenario")
+    parser.add_argument('--concurrency', type=int, default=20, help="Requests in flight at once")
+    parser.add_argument('--latency-ms', type=float, default=0.0, help="Mean latency added by the mock exchange")
+    parser.add_argument('--jitter-ms', type=float, default=0.0, help="Standard deviation of the mock latency")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="Fraction of mock responses that are errors")
+    parser.add_argument('--seed', type=int, default=1, help="Seed for the mock's latency and error draws")
+    parser.add_argument('--mock-url', help="Use an already running mock exchange at this base URL instead of starting one")
+    parser.add_argument('--output', default=os.path.join('benchmarks', 'results', 'latest.json'), help="Where to write the JSON results")
+    parser.add_argument('--baseline', help="Previous result file to compare against")
+    parser.add_argument('--max-regression', type=float, default=0.10, help="Allowed fractional regression before failing (default 0.10)")
+    args = parser.parse_args(argv)
+
+    args.scenarios = [name.strip() for name in args.scenarios.split(',') if name.strip()]
+    unknown = set(args.scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"Unknown scenarios: {', '.join(sorted(unknown))}")
+    return args
+
+
+async def run(args: argparse.Namespace) -> Dict[str, Any]:
+    mock = None
+    if args.mock_url:
+        mock_url = args.mock_url.rstrip('/')
+    else:
+        port = free_port()
+        mock_url = f"http://127.0.0.1:{port}"
+        mock = start_process([
+            '-m', 'benchmarks.mock_exchange', '--port', str(port),
+            '--latency-ms', str(args.latency_ms), '--jitter-ms', str(args.jitter_ms),
+            '--error-rate', str(args.error_rate), '--seed', str(args.seed),
+        ], dict(os.environ))
+
+    tmp = tempfile.mkdtemp(prefix='benchmark-')
+    # Settings are read at import time, so they must be in place before app is imported
+    env = {
+        **os.environ,
+        'API_KEY': 'benchmark',
+        'API_SECRET': 'benchmark',
+        'BINANCE_API_URL': f"{mock_url}/api",
+        'BINANCE_STREAM_URL': mock_url.replace('http', 'ws', 1),
+        'BINANCE_WS_API_URL': f"{mock_url.replace('http', 'ws', 1)}/ws-api/v3",
+        'USER_STREAM': '0',
+        'ORDER_STORE_PATH': os.path.join(tmp, 'orders.db'),
+        'LOG_DIR': os.path.join(tmp, 'logs'),
+        'LOG_LEVEL': os.getenv('LOG_LEVEL', 'ERROR'),
+        'BENCHMARK_TMP': tmp,
+    }
+    os.environ.update(env)
+
+    scenarios = {}
+    try:
+        await wait_for_http(f"{mock_url}/api/v3/ping", process=mock)
+        for name in args.scenarios:
+            if name in ('http_place_order', 'api_place_order'):
+                scenarios[name] = await bench_http(name, args, env)
+            else:
+                scenarios[name] = await bench_client(name, args)
+            print(format_row(name, scenarios[name]), file=sys.stderr)
+    finally:
+        if mock is not None:
+            stop_process(mock)
+
+    return {
+        'schema': RESULT_SCHEMA,
+        'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'git_commit': git_commit(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'config': {
+            'requests': args.requests,
+            'warm_up': args.warm_up,
+            'concurrency': args.concurrency,
+            'latency_ms': args.latency_ms,
+            'jitter_ms': args.jitter_ms,
+            'error_rate': args.error_rate,
+            'seed': args.seed,
+        },
+        'scenarios': scenarios,
+    }
+
+
+def format_row(name: str, result: Dict[str, Any]) -> str:
+    latency = result['latency_ms']
+    return (
+        f"{name:<18} {result['throughput_per_s']:>9.1f}/s  p50 {latency['p50']:>8.2f}ms  "
+        f"p95 {latency['p95']:>8.2f}ms  p99 {latency['p99']:>8.2f}ms  errors {result['errors']}"
+    )
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    results = asyncio.run(run(args))
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, 'w') as f:
+        json.dump(results, f, indent=2, sort_keys=True)
+    print(f"Results written to {args.output}", file=sys.stderr)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if baseline.get('config') != results['config']:
+            print("Warning: baseline was run with a different configuration", file=sys.stderr)
+        regressions = compare(results, baseline, args.max_regression)
+        for regression in regressions:
+            print(f"REGRESSION {regression}", file=sys.stderr)
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,43 +1,198 @@
-import os
-from dotenv import load_dotenv
-from binance.client import Client
+"""
+Reconcile Binance order history with the local order journal
+
+Fetches each symbol's order history concurrently, starting after the
+last orderId seen for the symbol by the previous run, and re-queries the
+older orders the journal still has open; only new orders and orders
+whose state may have changed are downloaded. Every fetched order is
+upserted into the journal and written to stdout as soon as its symbol
+completes.
+
+Usage:
+    python check_orders.py                          # symbols already in the journal
+    python check_orders.py -s BTCUSDT,ETHUSDT -f csv > orders.csv
+    python check_orders.py -s BTCUSDT --since 2024-01-01 -f json
+"""
+import argparse
+import csv
+import json
+import sys
 import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timezone
+from typing import Optional, Dict, Any, List, Tuple
+
+from app.binance_client import BinanceClient
+from app.cli import parse_since
+
+# allOrders returns at most this many orders per call
+PAGE_LIMIT = 1000
+
+COLUMNS = [
+    'symbol', 'orderId', 'clientOrderId', 'side', 'type', 'status',
+    'price', 'origQty', 'executedQty', 'time', 'updateTime', 'change',
+]
 
-load_dotenv()
-client = Client(os.getenv('API_KEY'), os.getenv('API_SECRET'), testnet=True)
-client.API_URL = 'https://testnet.binance.vision/api'
-
-# Sync time with server
-server_time = client.get_server_time()
-local_time = int(time.time() * 1000)
-time_offset = server_time['serverTime'] - local_time
-client.timestamp_offset = time_offset
-
-try:
-    # Get all open orders
-    open_orders = client.get_open_orders()
-    
-    print(f"=== Current Open Orders ({len(open_orders)}) ===")
-    
-    if not open_orders:
-        print("No open orders found!")
+TABLE_WIDTHS = {
+    'symbol': 12, 'orderId': 12, 'clientOrderId': 34, 'side': 5, 'type': 16, 'status': 17,
+    'price': 16, 'origQty': 16, 'executedQty': 16, 'time': 20, 'updateTime': 20, 'change': 9,
+}
+
+
+def fetch_history(bot: BinanceClient, symbol: str, since: Optional[int], full: bool) -> List[Dict[str, Any]]:
+    """
+    Fetch what changed for symbol since its last reconciliation
+
+    New orders are paged through allOrders from just after the checkpoint
+    (or from --since / the first order when there is none). Orders at or
+    before the checkpoint that the journal still has open are queried one
+    by one, since only they can still change.
+    """
+    checkpoint = None if full else bot.orders.checkpoint(symbol)
+    if checkpoint is not None:
+        params = {'order_id': checkpoint['last_order_id'] + 1}
+    elif since is not None:
+        params = {'start_time': since}
     else:
-        for i, order in enumerate(open_orders, 1):
-            print(f"\n{i}. Order ID: {order['orderId']}")
-            print(f"   Symbol: {order['symbol']}")
-            print(f"   Side: {order['side']}")
-            print(f"   Type: {order['type']}")
-            print(f"   Quantity: {order['origQty']}")
-            print(f"   Status: {order['status']}")
-            if order.get('price'):
-                print(f"   Price: ${order['price']}")
-            if order.get('stopPrice'):
-                print(f"   Stop Price: ${order['stopPrice']}")
-            print(f"   Time: {order['time']}")
-    
-    print(f"\n=== Account Info ===")
-    account = client.get_account()
-    print(f"Total Orders: {len(account['orders'])}")
-    
-except Exception as e:
-    print(f"Error: {e}") 
\ No newline at end of file
+        params = {'order_id': 1}
+
+    orders = []
+    while True:
+        page = bot.get_all_orders(symbol, limit=PAGE_LIMIT, **params)
+        orders.extend(page)
+        if len(page) < PAGE_LIMIT:
+            break
+        params = {'order_id': page[-1]['orderId'] + 1}
+
+    if checkpoint is not None:
+        for row in bot.orders.open_orders(symbol):
+            if row['order_id'] and row['order_id'] <= checkpoint['last_order_id']:
+                orders.append(bot.get_order(symbol, row['order_id']))
+    return orders
+
+
+def reconcile(bot: BinanceClient, symbol: str, orders: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Upsert fetched orders into the journal and tag each with how it differs from it"""
+    if not orders:
+        return []
+    order_ids = [order['orderId'] for order in orders]
+    local_orders = bot.orders.orders_between(symbol, min(order_ids), max(order_ids))
+
+    rows = []
+    for order in orders:
+        local = local_orders.get(order['orderId'])
+        if local is None:
+            change = 'new'
+        elif local['status'] != order['status'] or local['executed_qty'] != order['executedQty']:
+            change = 'updated'
+        else:
+            change = 'unchanged'
+        rows.append({**{column: order.get(column) for column in COLUMNS}, 'change': change})
+
+    bot.orders.record_orders(orders)
+    bot.orders.save_checkpoint(
+        symbol,
+        max(order_ids),
+        max(order.get('updateTime') or order['time'] for order in orders)
+    )
+    return rows
+
+
+def format_time(value: Optional[int]) -> str:
+    if not value:
+        return ''
+    return datetime.fromtimestamp(value / 1000, tz=timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
+
+
+class TableWriter:
+    def __init__(self, stream):
+        self.stream = stream
+        self.stream.write(self._line({column: column for column in COLUMNS}))
+
+    def _line(self, row: Dict[str, Any]) -> str:
+        return ' '.join(str(row[column]).ljust(TABLE_WIDTHS[column]) for column in COLUMNS).rstrip() + '\n'
+
+    def write(self, row: Dict[str, Any]):
+        row = {**row, 'time': format_time(row['time']), 'updateTime': format_time(row['updateTime'])}
+        self.stream.write(self._line({column: '' if row[column] is None else row[column] for column in COLUMNS}))
+
+
+class JsonLinesWriter:
+    def __init__(self, stream):
+        self.stream = stream
+
+    def write(self, row: Dict[str, Any]):
+        self.stream.write(json.dumps(row) + '\n')
+
+
+class CsvWriter:
+    def __init__(self, stream):
+        self.writer = csv.DictWriter(stream, fieldnames=COLUMNS)
+        self.writer.writeheader()
+
+    def write(self, row: Dict[str, Any]):
+        self.writer.writerow(row)
+
+
+WRITERS = {'table': TableWriter, 'json': JsonLinesWriter, 'csv': CsvWriter}
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Reconcile Binance order history with the local order journal")
+    parser.add_argument('-s', '--symbols', help="Comma-separated symbols (default: every symbol in the journal)")
+    parser.add_argument('-f', '--format', choices=sorted(WRITERS), default='table', help="Output format; json writes one object per line")
+    parser.add_argument('-c', '--concurrency', type=int, default=8, help="Symbols fetched in parallel (default 8)")
+    parser.add_argument('--since', type=parse_since, help="Start time for symbols with no checkpoint (epoch ms or ISO date)")
+    parser.add_argument('--full', action='store_true', help="Ignore checkpoints and fetch the whole history again")
+    parser.add_argument('--changes-only', action='store_true', help="Only output orders that are new or changed")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    started = time.perf_counter()
+    bot = BinanceClient()
+
+    if args.symbols:
+        symbols = [symbol.strip().upper() for symbol in args.symbols.split(',') if symbol.strip()]
+    else:
+        symbols = bot.orders.symbols()
+    if not symbols:
+        print("No symbols to reconcile: the journal is empty, pass --symbols", file=sys.stderr)
+        return 1
+
+    writer = WRITERS[args.format](sys.stdout)
+    counts = {'new': 0, 'updated': 0, 'unchanged': 0}
+    failed: List[Tuple[str, str]] = []
+
+    with ThreadPoolExecutor(max_workers=max(1, args.concurrency)) as pool:
+        futures = {
+            pool.submit(fetch_history, bot, symbol, args.since, args.full): symbol
+            for symbol in symbols
+        }
+        for future in as_completed(futures):
+            symbol = futures[future]
+            try:
+                rows = reconcile(bot, symbol, future.result())
+            except Exception as e:
+                failed.append((symbol, str(e)))
+                continue
+            for row in rows:
+                counts[row['change']] += 1
+                if not args.changes_only or row['change'] != 'unchanged':
+                    writer.write(row)
+            sys.stdout.flush()
+
+    for symbol, error in failed:
+        print(f"{symbol}: {error}", file=sys.stderr)
+    print(
+        f"Reconciled {sum(counts.values())} orders across {len(symbols) - len(failed)} symbols "
+        f"in {time.perf_counter() - started:.2f}s "
+        f"({counts['new']} new, {counts['updated']} updated, {counts['unchanged']} unchanged)",
+        file=sys.stderr
+    )
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
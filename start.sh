@@ -1,2 +1,13 @@
 #!/bin/bash
-uvicorn app.main:app --host 0.0.0.0 --port $PORT --workers 1 
\ No newline at end of file
+WORKERS=${WORKERS:-1}
+
+# Workers share rate-limit budgets, the clock estimate and exchangeInfo through files here
+if [ "$WORKERS" -gt 1 ] && [ -z "$SHARED_STATE_DIR" ]; then
+    if [ -d /dev/shm ]; then
+        export SHARED_STATE_DIR=/dev/shm/spot-trading-bot-$PORT
+    else
+        export SHARED_STATE_DIR=${TMPDIR:-/tmp}/spot-trading-bot-$PORT
+    fi
+fi
+
+exec uvicorn app.main:app --host 0.0.0.0 --port $PORT --workers $WORKERS
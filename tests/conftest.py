@@ -0,0 +1,127 @@
+"""
+Shared test setup
+
+Settings are read when app modules are imported, so they are set here,
+before any test module imports app: the clients point at a mock exchange
+on a fixed local port, logs and the order journal go to a temporary
+directory, and the streams are off unless a test starts them.
+"""
+import asyncio
+import os
+import threading
+from contextlib import asynccontextmanager
+
+import pytest
+
+from .helpers import MOCK_PORT, MOCK_URL, MOCK_WS_URL, TEST_DIR
+
+os.environ.update({
+    'API_KEY': 'test-key',
+    'API_SECRET': 'test-secret',
+    'BINANCE_API_URL': f"{MOCK_URL}/api",
+    'BINANCE_STREAM_URL': MOCK_WS_URL,
+    'BINANCE_WS_API_URL': f"{MOCK_WS_URL}/ws-api/v3",
+    'ORDER_TRANSPORT': 'rest',
+    'USER_STREAM': '0',
+    'TICKER_STREAM': '0',
+    'ORDER_STORE_PATH': ':memory:',
+    'LOG_DIR': os.path.join(TEST_DIR, 'logs'),
+    'LOG_LEVEL': 'ERROR',
+    'KLINE_DATA_DIR': os.path.join(TEST_DIR, 'klines'),
+    'WARM_UP_TIMEOUT': '10',
+})
+os.environ.pop('SHARED_STATE_DIR', None)
+
+from aiohttp import web  # noqa: E402
+
+from benchmarks.mock_exchange import MockExchange  # noqa: E402
+
+
+class MockServer:
+    """Serves a MockExchange on MOCK_PORT from an event loop in a background thread"""
+
+    def __init__(self, exchange: MockExchange, port: int = MOCK_PORT):
+        self.exchange = exchange
+        self.port = port
+        self.loop = asyncio.new_event_loop()
+        self._runner = None
+        self._thread = threading.Thread(target=self.loop.run_forever, daemon=True)
+
+    def start(self):
+        self._thread.start()
+        self.call(self._start())
+
+    async def _start(self):
+        self._runner = web.AppRunner(self.exchange.app(), access_log=None, shutdown_timeout=0.1)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, '127.0.0.1', self.port).start()
+
+    async def _cancel_tasks(self):
+        """Cancel handlers still sleeping on injected latency so the loop closes cleanly"""
+        tasks = [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def call(self, coroutine, timeout: float = 10):
+        """Run a coroutine on the mock's loop and return its result"""
+        return asyncio.run_coroutine_threadsafe(coroutine, self.loop).result(timeout)
+
+    def run(self, function, *args):
+        """Call function on the mock's loop, for state changes that push stream events"""
+        async def call():
+            return function(*args)
+        return self.call(call())
+
+    def stop(self):
+        self.call(self._runner.cleanup())
+        self.call(self._cancel_tasks())
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join(5)
+        self.loop.close()
+
+
+@pytest.fixture
+def mock_server():
+    """A fresh mock exchange for each test; configure it through mock_server.exchange"""
+    server = MockServer(MockExchange(seed=1))
+    server.start()
+    yield server
+    server.stop()
+
+
+@pytest.fixture
+def exchange(mock_server) -> MockExchange:
+    return mock_server.exchange
+
+
+@pytest.fixture
+def connect_client(mock_server):
+    """
+    Async context manager factory yielding a warmed-up AsyncBinanceClient
+
+    Use it inside the coroutine a test runs with asyncio.run, since the
+    client's session belongs to that loop.
+    """
+    from app.binance_client import AsyncBinanceClient
+
+    @asynccontextmanager
+    async def connect():
+        client = AsyncBinanceClient.connect()
+        await client.warm_up()
+        try:
+            yield client
+        finally:
+            await client.close()
+
+    return connect
+
+
+@pytest.fixture
+def http(mock_server):
+    """TestClient for the web app, whose lifespan connects it to the mock exchange"""
+    from fastapi.testclient import TestClient
+    from app.main import app
+
+    with TestClient(app) as client:
+        yield client
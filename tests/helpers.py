@@ -0,0 +1,25 @@
+import asyncio
+import socket
+import tempfile
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+# The mock exchange of every test listens here; the app reads these URLs at import time
+MOCK_PORT = free_port()
+MOCK_URL = f"http://127.0.0.1:{MOCK_PORT}"
+MOCK_WS_URL = f"ws://127.0.0.1:{MOCK_PORT}"
+TEST_DIR = tempfile.mkdtemp(prefix='trading-bot-tests-')
+
+
+async def wait_until(predicate, timeout: float = 5.0, interval: float = 0.02):
+    """Poll predicate() until it is true; fail the test after timeout seconds"""
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not predicate():
+        if asyncio.get_running_loop().time() > deadline:
+            raise AssertionError("Condition not met in time")
+        await asyncio.sleep(interval)
@@ -0,0 +1,106 @@
+import pytest
+from binance.exceptions import BinanceAPIException
+
+from app.api import exchange_error
+
+ORDER = {'symbol': 'BTCUSDT', 'quantity': 0.001, 'order_type': 'LIMIT', 'side': 'BUY', 'price': 29000}
+
+
+class FakeResponse:
+    def __init__(self, status_code, code, msg):
+        self.status_code = status_code
+        self.text = f'{{"code": {code}, "msg": "{msg}"}}'
+
+
+def api_exception(status_code, code, msg='error'):
+    response = FakeResponse(status_code, code, msg)
+    return BinanceAPIException(response, status_code, response.text)
+
+
+def test_exchange_errors_keep_the_binance_code():
+    error = exchange_error(api_exception(400, -2010, 'Account has insufficient balance'))
+    assert error.status_code == 400
+    assert error.detail == {'code': -2010, 'msg': 'Account has insufficient balance'}
+    # Server-side failures become a bad gateway
+    assert exchange_error(api_exception(503, -1001)).status_code == 502
+
+
+def test_wrapped_exchange_errors_are_unwrapped():
+    try:
+        try:
+            raise api_exception(400, -2011, 'Unknown order sent.')
+        except BinanceAPIException as e:
+            raise Exception(f"Failed to cancel order: {e}")
+    except Exception as wrapped:
+        error = exchange_error(wrapped)
+    assert (error.status_code, error.detail['code']) == (400, -2011)
+
+
+def test_other_errors():
+    assert exchange_error(ValueError('bad quantity')).status_code == 400
+    assert exchange_error(ConnectionError('reset')).status_code == 502
+
+
+def test_create_and_query_order(http, exchange):
+    response = http.post('/api/v1/orders', json=ORDER)
+    assert response.status_code == 201
+    order = response.json()
+    assert order['status'] == 'NEW'
+
+    response = http.get(f"/api/v1/orders/BTCUSDT/{order['orderId']}")
+    assert response.json()['clientOrderId'] == order['clientOrderId']
+    assert [o['orderId'] for o in http.get('/api/v1/orders/open', params={'symbol': 'BTCUSDT'}).json()] == [order['orderId']]
+
+    response = http.delete(f"/api/v1/orders/BTCUSDT/{order['orderId']}")
+    assert response.status_code == 200 and response.json()['status'] == 'CANCELED'
+    assert http.get('/api/v1/orders/open').json() == []
+
+
+@pytest.mark.parametrize('change', [
+    {'symbol': 'btc-usdt'},
+    {'quantity': 0},
+    {'order_type': 'OCO'},
+    {'side': 'HOLD'},
+    {'price': -1},
+])
+def test_invalid_orders_fail_validation(http, exchange, change):
+    response = http.post('/api/v1/orders', json={**ORDER, **change})
+    assert response.status_code == 422
+    assert 'POST /api/v3/order' not in exchange.requests
+
+
+def test_order_rules_are_checked_before_sending(http, exchange):
+    response = http.post('/api/v1/orders', json={**ORDER, 'price': None})
+    assert response.status_code == 400 and 'Price is required' in response.json()['detail']
+
+
+def test_exchange_rejections_map_to_client_errors(http, exchange):
+    exchange.error_rate = 1.0
+    response = http.post('/api/v1/orders', json=ORDER)
+    assert response.status_code == 400
+    assert response.json()['detail'] == {'code': -2010, 'msg': 'Injected error'}
+
+    exchange.error_rate = 0.0
+    response = http.delete('/api/v1/orders/BTCUSDT/12345')
+    assert response.status_code == 400 and response.json()['detail']['code'] == -2011
+
+
+def test_balances_and_ticker(http, exchange):
+    usdt = http.get('/api/v1/balances', params={'asset': 'USDT'}).json()
+    assert float(usdt['free']) == 1000000
+    assets = {balance['asset'] for balance in http.get('/api/v1/balances').json()}
+    assert assets == {'USDT', 'BTC', 'ETH', 'BNB'}
+
+    assert float(http.get('/api/v1/ticker', params={'symbol': 'ETHUSDT'}).json()['price']) == exchange.prices['ETHUSDT']
+    assert len(http.get('/api/v1/ticker').json()) == len(exchange.prices)
+
+
+def test_requests_wait_for_warm_up(http, monkeypatch):
+    client = http.app.state.binance_client
+
+    async def not_ready(timeout=None):
+        return False
+
+    monkeypatch.setattr(client, 'wait_ready', not_ready)
+    response = http.get('/api/v1/ticker')
+    assert response.status_code == 503 and 'warming up' in response.json()['detail']
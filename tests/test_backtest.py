@@ -0,0 +1,104 @@
+import json
+import time
+
+import numpy as np
+import pytest
+
+import backtest
+from app.backtest import Backtest, FirstHit, NOT_FOUND, Orders
+from app.klines import KlineStore, Klines
+
+MINUTE = 60_000
+
+# open, high, low, close of four one-minute candles
+CANDLES = [(100, 105, 95, 102), (102, 110, 101, 108), (108, 109, 90, 92), (92, 96, 91, 95)]
+
+
+@pytest.fixture
+def klines():
+    rows = [
+        [i * MINUTE, *map(str, prices), '1', i * MINUTE + MINUTE - 1, '1', 1, '0', '0', '0']
+        for i, prices in enumerate(CANDLES)
+    ]
+    return Klines('BTCUSDT', '1m', KlineStore.to_columns(rows))
+
+
+def order(side, order_type, time=0, price=None, stop_price=None, quantity=1.0):
+    return {'time': time, 'side': side, 'order_type': order_type, 'quantity': quantity,
+            'price': price, 'stop_price': stop_price}
+
+
+def test_first_hit_matches_a_scan():
+    values = np.random.default_rng(7).normal(size=300)
+    starts = np.arange(0, 300, 7)
+    thresholds = np.linspace(-2.5, 0.5, len(starts))
+    expected = []
+    for start, threshold in zip(starts, thresholds):
+        hits = np.flatnonzero(values[start:] <= threshold)
+        expected.append(start + hits[0] if len(hits) else NOT_FOUND)
+    assert FirstHit(values).find(starts, thresholds).tolist() == expected
+
+
+def test_fills_follow_the_order_types(klines):
+    orders = Orders(klines, [
+        order('BUY', 'MARKET'),
+        # Rests until the low of the third candle trades through it
+        order('BUY', 'LIMIT', price=93),
+        # Marketable at the open of the second candle
+        order('SELL', 'LIMIT', time=MINUTE, price=100),
+        # Triggers at 107 in the second candle, within its limit
+        order('BUY', 'STOP_LIMIT', price=108, stop_price=107),
+        # Triggers above its limit, then rests as a LIMIT order
+        order('BUY', 'STOP_LIMIT', price=106, stop_price=107),
+        order('SELL', 'STOP_LIMIT', price=93.5, stop_price=94),
+        order('BUY', 'LIMIT', price=50),
+        order('BUY', 'LIMIT'),
+        order('BUY', 'MARKET', time=10 * MINUTE),
+    ])
+    fills = Backtest(klines).run(orders).fills()
+    assert [(row['status'], row['fill_time'], row['fill_price']) for row in fills] == [
+        ('FILLED', 0, 100.0),
+        ('FILLED', 2 * MINUTE, 93.0),
+        ('FILLED', MINUTE, 102.0),
+        ('FILLED', MINUTE, 107.0),
+        ('FILLED', 2 * MINUTE, 106.0),
+        ('FILLED', 2 * MINUTE, 94.0),
+        ('NEW', None, None),
+        ('REJECTED', None, None),
+        ('NEW', None, None),
+    ]
+    assert fills[3]['type'] == 'STOP_LOSS_LIMIT'
+    assert 'Price is required' in fills[7]['error']
+
+
+def test_summary_marks_the_account_to_each_close(klines):
+    orders = Orders(klines, [order('BUY', 'MARKET'), order('SELL', 'MARKET', time=2 * MINUTE)])
+    result = Backtest(klines, commission=0.001).run(orders)
+    assert result.position.tolist() == [1.0, 1.0, 0.0, 0.0]
+    summary = result.summary()
+    assert summary['fees'] == pytest.approx(0.208)
+    assert summary['pnl'] == pytest.approx(8 - 0.208)
+    assert (summary['filled'], summary['final_position']) == (2, 0.0)
+    # Equity peaks at the second close and the selling fee is the only loss after it
+    assert summary['max_drawdown'] == pytest.approx(0.108)
+
+
+def test_cli_downloads_then_backtests(exchange, tmp_path, capsys):
+    now = int(time.time() * 1000)
+    since = str(now - now % MINUTE - 300 * MINUTE)
+    assert backtest.main(['--data-dir', str(tmp_path), 'download', '-s', 'btcusdt', '--since', since]) == 0
+    assert backtest.main(['--data-dir', str(tmp_path), 'run', '-s', 'BTCUSDT', '--since', since,
+                          '--fast', '5', '--slow', '20', '--quantity', '0.01']) == 0
+    summary = json.loads(capsys.readouterr().out)
+    assert summary['symbol'] == 'BTCUSDT' and summary['candles'] >= 299
+    assert summary['orders'] > 0 and summary['rejected'] == 0
+
+
+def test_cli_rejects_bad_arguments(tmp_path, capsys):
+    with pytest.raises(SystemExit):
+        backtest.parse_args(['download', '-s', 'BTCUSDT'])
+    with pytest.raises(SystemExit):
+        backtest.parse_args(['run', '-s', 'BTCUSDT', '--quantity', '1', '--fast', '50', '--slow', '20'])
+    assert backtest.parse_args(['run', '-s', 'BTCUSDT', '--quantity', '1', '--since', '2024-01-01']).since == 1704067200000
+    assert backtest.main(['--data-dir', str(tmp_path), 'run', '-s', 'ETHUSDT', '--quantity', '1']) == 1
+    assert 'no 1m candles stored' in capsys.readouterr().err
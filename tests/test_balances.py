@@ -0,0 +1,114 @@
+import asyncio
+import time
+from decimal import Decimal
+
+import pytest
+
+from app.balances import BalanceLedger
+
+from .helpers import wait_until
+
+ACCOUNT = {'updateTime': 1000, 'balances': [
+    {'asset': 'USDT', 'free': '100.00000000', 'locked': '0.00000000'},
+    {'asset': 'BTC', 'free': '1.00000000', 'locked': '0.50000000'},
+]}
+
+
+@pytest.fixture
+def ledger():
+    ledger = BalanceLedger()
+    ledger.seed(ACCOUNT)
+    return ledger
+
+
+def position(time, **balances):
+    return {'e': 'outboundAccountPosition', 'E': time, 'u': time,
+            'B': [{'a': asset, 'f': free, 'l': '0'} for asset, free in balances.items()]}
+
+
+def test_seed_and_lookups(ledger):
+    assert ledger.get('BTC') == {'asset': 'BTC', 'free': '1.00000000', 'locked': '0.50000000'}
+    assert ledger.total('BTC') == Decimal('1.5')
+    assert ledger.get('ETH')['free'] == '0.00000000'
+
+
+def test_positions_older_than_the_ledger_are_ignored(ledger):
+    ledger.apply_account_position(position(2000, USDT='80'))
+    ledger.apply_account_position(position(1500, USDT='90'))
+    assert ledger.free('USDT') == Decimal('80')
+
+
+def test_balance_updates_are_deltas(ledger):
+    ledger.apply_balance_update({'e': 'balanceUpdate', 'E': 2000, 'T': 2000, 'a': 'USDT', 'd': '25'})
+    # Already part of the snapshot
+    ledger.apply_balance_update({'e': 'balanceUpdate', 'E': 900, 'T': 900, 'a': 'USDT', 'd': '25'})
+    assert ledger.free('USDT') == Decimal('125')
+
+
+def test_reconcile_reports_and_corrects_drift(ledger):
+    ledger.apply_account_position(position(5000, BTC='3'))
+    drifted = ledger.reconcile({'updateTime': 3000, 'balances': [
+        {'asset': 'USDT', 'free': '99.00000000', 'locked': '0.00000000'},
+        {'asset': 'BTC', 'free': '2.00000000', 'locked': '0.00000000'},
+    ]}, requested_at=4000)
+    # BTC changed after the snapshot was requested, so it is left alone
+    assert list(drifted) == ['USDT']
+    assert ledger.free('USDT') == Decimal('99') and ledger.free('BTC') == Decimal('3')
+
+
+def test_reservations_are_taken_from_the_free_balance(ledger):
+    assert ledger.reserve('first', 'USDT', Decimal('60'))
+    assert ledger.available('USDT') == Decimal('40')
+    assert not ledger.reserve('second', 'USDT', Decimal('60'))
+    assert ledger.reserve('second', 'BTC', Decimal('1'))
+    ledger.release('first')
+    ledger.release('first')
+    assert ledger.available('USDT') == Decimal('100')
+    assert ledger.reserve('third', 'USDT', Decimal('60'))
+
+
+def test_reservations_survive_a_reseed(ledger):
+    ledger.reserve('first', 'USDT', Decimal('60'))
+    ledger.seed(ACCOUNT)
+    assert ledger.available('USDT') == Decimal('40')
+
+
+def test_prepared_orders_hold_their_balance_until_answered(exchange, connect_client):
+    async def scenario():
+        async with connect_client() as client:
+            client.user_stream.start()
+            await wait_until(lambda: client.balances_live)
+            first = client.prepare_order('BTCUSDT', 20, 'LIMIT', 'BUY', price=30000)
+            with pytest.raises(ValueError, match='Insufficient USDT balance'):
+                client.prepare_order('BTCUSDT', 20, 'LIMIT', 'BUY', price=30000)
+            await client.submit_order(first)
+            assert client.balances.available('USDT') == client.balances.free('USDT')
+            # The exchange now holds the first order's funds, so the second still does not fit
+            await wait_until(lambda: client.balances.free('USDT') == Decimal('400000'))
+            with pytest.raises(ValueError, match='400000.00000000 is available'):
+                client.prepare_order('BTCUSDT', 20, 'LIMIT', 'BUY', price=30000)
+
+    asyncio.run(scenario())
+    assert exchange.requests['POST /api/v3/order'] == 1
+
+
+def test_rejected_batch_releases_its_reservations(http, exchange):
+    client = http.app.state.binance_client
+
+    async def start_stream():
+        client.user_stream.start()
+
+    http.portal.call(start_stream)
+    deadline = time.monotonic() + 5
+    while not client.balances_live:
+        assert time.monotonic() < deadline
+        time.sleep(0.02)
+
+    order = {'symbol': 'BTCUSDT', 'quantity': 20, 'order_type': 'LIMIT', 'side': 'BUY', 'price': 30000}
+    response = http.post('/place_orders', json=[order, order])
+    assert response.status_code == 400
+    assert response.json()['errors'] == [
+        {'index': 1, 'error': 'Insufficient USDT balance: order needs 600000, 400000.00000000 is available'},
+    ]
+    assert client.balances.available('USDT') == Decimal('1000000')
+    assert 'POST /api/v3/order' not in exchange.requests
@@ -0,0 +1,67 @@
+import argparse
+import asyncio
+
+import pytest
+
+from benchmarks.run import bench_client, compare, drive, parse_args, percentile, summarize
+
+
+def result(p50=1.0, p95=2.0, p99=3.0, throughput=100.0):
+    return {'latency_ms': {'p50': p50, 'p95': p95, 'p99': p99}, 'throughput_per_s': throughput}
+
+
+def test_percentile_uses_the_nearest_rank():
+    values = [float(i) for i in range(1, 101)]
+    assert [percentile(values, f) for f in (0.5, 0.95, 0.99, 1.0)] == [50.0, 95.0, 99.0, 100.0]
+    assert percentile([7.0], 0.99) == 7.0
+    assert percentile([], 0.5) == 0.0
+
+
+def test_summarize_reports_milliseconds():
+    summary = summarize([0.003, 0.001, 0.002], errors=1, duration=0.5)
+    assert (summary['requests'], summary['error_rate'], summary['throughput_per_s']) == (3, 0.3333, 6.0)
+    assert summary['latency_ms'] == {'p50': 2.0, 'p95': 3.0, 'p99': 3.0, 'mean': 2.0, 'max': 3.0}
+    assert summarize([], 0, 0)['latency_ms']['mean'] == 0.0
+
+
+def test_drive_runs_every_request_and_counts_errors():
+    calls = 0
+
+    async def operation():
+        nonlocal calls
+        calls += 1
+        call = calls
+        await asyncio.sleep(0)
+        if call % 4 == 0:
+            raise RuntimeError('rejected')
+
+    summary = asyncio.run(drive(operation, requests=20, concurrency=3))
+    assert calls == 20
+    assert (summary['requests'], summary['errors']) == (20, 5)
+
+
+def test_compare_flags_latency_and_throughput_regressions():
+    baseline = {'scenarios': {'ticker': result(), 'account': result()}}
+    current = {'scenarios': {
+        'ticker': result(p50=1.05, p99=3.5),
+        'account': result(throughput=80.0),
+        'order_book': result(p50=50.0),
+    }}
+    assert compare(current, baseline, 0.10) == [
+        'ticker: p99 latency 3.000ms -> 3.500ms',
+        'account: throughput 100.0/s -> 80.0/s',
+    ]
+    assert compare(current, baseline, 0.25) == []
+
+
+def test_unknown_scenarios_are_rejected():
+    assert parse_args(['--scenarios', 'ticker, account']).scenarios == ['ticker', 'account']
+    with pytest.raises(SystemExit):
+        parse_args(['--scenarios', 'ticker,teleport'])
+
+
+def test_client_scenario_against_the_mock(exchange):
+    args = argparse.Namespace(requests=10, warm_up=2, concurrency=4)
+    summary = asyncio.run(bench_client('place_order', args))
+    assert (summary['requests'], summary['errors']) == (10, 0)
+    assert exchange.requests['POST /api/v3/order'] == 12
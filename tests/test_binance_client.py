@@ -0,0 +1,89 @@
+import asyncio
+
+import pytest
+from binance.exceptions import BinanceAPIException
+
+from app.binance_client import AsyncBinanceClient, BinanceClient, build_order_params
+
+
+def test_build_order_params_maps_order_types():
+    market = build_order_params('BTCUSDT', 0.5, 'MARKET', 'BUY')
+    assert market['type'] == 'MARKET' and 'price' not in market
+
+    limit = build_order_params('BTCUSDT', 0.5, 'LIMIT', 'SELL', price=30000)
+    assert (limit['type'], limit['price'], limit['timeInForce']) == ('LIMIT', 30000, 'GTC')
+
+    stop = build_order_params('BTCUSDT', 0.5, 'STOP_LIMIT', 'SELL', price=29000, stop_price=29100)
+    assert (stop['type'], stop['stopPrice']) == ('STOP_LOSS_LIMIT', 29100)
+
+
+def test_build_order_params_gives_each_order_its_own_client_id():
+    first = build_order_params('BTCUSDT', 1, 'MARKET', 'BUY')
+    second = build_order_params('BTCUSDT', 1, 'MARKET', 'BUY')
+    assert first['newClientOrderId'] != second['newClientOrderId']
+
+
+@pytest.mark.parametrize('args, message', [
+    (('btc-usdt', 1, 'MARKET', 'BUY'), 'Invalid symbol format'),
+    (('BTCUSDT', -1, 'MARKET', 'BUY'), 'Quantity must be positive'),
+    (('BTCUSDT', 1, 'OCO', 'BUY'), 'Order type must be'),
+    (('BTCUSDT', 1, 'MARKET', 'HOLD'), 'Side must be'),
+    (('BTCUSDT', 1, 'LIMIT', 'BUY'), 'Price is required'),
+    (('BTCUSDT', 1, 'STOP_LIMIT', 'BUY', 100), 'Stop price is required'),
+])
+def test_build_order_params_rejects_invalid_orders(args, message):
+    with pytest.raises(ValueError, match=message):
+        build_order_params(*args)
+
+
+def test_connect_requires_credentials(monkeypatch):
+    monkeypatch.delenv('API_KEY')
+    with pytest.raises(ValueError, match='API_KEY and API_SECRET'):
+        AsyncBinanceClient.connect()
+
+
+def test_async_place_order(exchange, connect_client):
+    async def scenario():
+        async with connect_client() as client:
+            assert client.ready and client.symbol_cache.loaded
+            response = await client.place_order('BTCUSDT', 0.001, 'LIMIT', 'BUY', price=29000)
+            row = client.orders.get_order('BTCUSDT', response['orderId'])
+            return response, row
+
+    response, row = asyncio.run(scenario())
+    assert response['status'] == 'NEW'
+    assert exchange.orders[response['orderId']]['price'] == '29000'
+    assert row['status'] == 'NEW' and row['client_order_id'] == response['clientOrderId']
+
+
+def test_concurrent_orders_share_the_pooled_session(exchange, connect_client):
+    async def scenario():
+        async with connect_client() as client:
+            session = client.client.session
+            responses = await asyncio.gather(*(
+                client.place_order('ETHUSDT', 0.01, 'MARKET', 'BUY') for _ in range(20)
+            ))
+            assert client.client.session is session
+            return responses
+
+    responses = asyncio.run(scenario())
+    assert len({response['orderId'] for response in responses}) == 20
+    assert exchange.requests['POST /api/v3/order'] == 20
+
+
+def test_async_place_order_raises_exchange_errors(exchange, connect_client):
+    async def scenario():
+        async with connect_client() as client:
+            exchange.error_rate = 1.0
+            with pytest.raises(BinanceAPIException) as error:
+                await client.place_order('BTCUSDT', 0.001, 'MARKET', 'BUY')
+            return error.value
+
+    assert asyncio.run(scenario()).code == -2010
+
+
+def test_sync_place_order(exchange):
+    bot = BinanceClient()
+    response = bot.place_order('BNBUSDT', 0.1, 'MARKET', 'SELL')
+    assert response['status'] == 'FILLED'
+    assert bot.orders.get_order('BNBUSDT', response['orderId'])['status'] == 'FILLED'
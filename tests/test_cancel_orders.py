@@ -0,0 +1,79 @@
+import asyncio
+
+from app.binance_client import build_order_params
+
+from .helpers import wait_until
+
+
+def place(exchange, side='BUY', price='29000', symbol='BTCUSDT'):
+    return exchange.place({'symbol': symbol, 'side': side, 'type': 'LIMIT', 'quantity': '0.01', 'price': price})
+
+
+def open_ids(exchange):
+    return sorted(order['orderId'] for order in exchange.orders.values() if order['status'] == 'NEW')
+
+
+def test_symbols_are_cleared_with_one_request_each(http, exchange):
+    place(exchange)
+    place(exchange, 'SELL', '31000')
+    place(exchange, symbol='ETHUSDT', price='1900')
+    result = http.delete('/api/v1/orders').json()
+    assert len(result['canceled']) == 3 and result['failed'] == []
+    assert exchange.requests['DELETE /api/v3/openOrders'] == 2 and open_ids(exchange) == []
+
+
+def test_symbols_without_open_orders_are_not_failures(http, exchange):
+    result = http.delete('/api/v1/orders', params={'symbol': 'BTCUSDT'}).json()
+    assert result == {'canceled': [], 'failed': []}
+
+
+def test_filters_cancel_only_matching_orders(http, exchange):
+    low_buy, high_buy = place(exchange, price='28000'), place(exchange, price='29500')
+    sell = place(exchange, 'SELL', '31000')
+    result = http.delete('/api/v1/orders', params={'symbol': 'BTCUSDT', 'side': 'BUY', 'min_price': 29000}).json()
+    assert [order['orderId'] for order in result['canceled']] == [high_buy['orderId']]
+    assert open_ids(exchange) == [low_buy['orderId'], sell['orderId']]
+    assert exchange.requests['DELETE /api/v3/order'] == 1
+
+
+def test_failed_cancels_are_reported_per_order(http, exchange, monkeypatch):
+    order = place(exchange)
+
+    async def cancel_order(symbol, order_id=None, client_order_id=None):
+        raise Exception("Failed to cancel order: timed out")
+
+    monkeypatch.setattr(http.app.state.binance_client, 'cancel_order', cancel_order)
+    result = http.delete('/api/v1/orders', params={'symbol': 'BTCUSDT', 'side': 'BUY'}).json()
+    assert result['canceled'] == []
+    assert result['failed'] == [{
+        'symbol': 'BTCUSDT', 'orderId': order['orderId'], 'clientOrderId': order['clientOrderId'],
+        'error': "Failed to cancel order: timed out",
+    }]
+
+
+def test_listing_errors_map_to_client_errors(http, exchange):
+    place(exchange)
+    exchange.error_rate = 1.0
+    response = http.delete('/api/v1/orders', params={'symbol': 'BTCUSDT', 'max_price': 30000})
+    assert response.status_code == 400
+    assert response.json()['detail'] == {'code': -2010, 'msg': 'Injected error'}
+
+
+def test_journaled_orders_without_an_order_id_are_cancelled_by_client_order_id(exchange, connect_client):
+    async def scenario():
+        async with connect_client() as client:
+            client.user_stream.start()
+            await wait_until(lambda: client.orders_live)
+            placed = await client.place_order('BTCUSDT', 0.01, 'LIMIT', 'BUY', price=29000)
+            # Still being submitted: no orderId yet, and no price for the MARKET one
+            for client_order_id, order_type, price in (('pending-limit', 'LIMIT', 28000), ('pending-market', 'MARKET', None)):
+                params = build_order_params('BTCUSDT', 0.01, order_type, 'BUY', price=price)
+                client.orders.record_submission({**params, 'newClientOrderId': client_order_id})
+            return placed, await client.cancel_orders('BTCUSDT', side='BUY', max_price=30000)
+
+    placed, result = asyncio.run(scenario())
+    assert [order['orderId'] for order in result['canceled']] == [placed['orderId']]
+    # The exchange has not seen it yet, so the cancel by clientOrderId fails with -2011
+    assert [(failure['orderId'], failure['clientOrderId']) for failure in result['failed']] == [(None, 'pending-limit')]
+    assert 'Unknown order sent' in result['failed'][0]['error']
+    assert exchange.requests['DELETE /api/v3/order'] == 2
@@ -0,0 +1,71 @@
+import json
+
+import pytest
+
+import check_orders
+from app.binance_client import BinanceClient
+
+
+def place(exchange, count, order_type='LIMIT', symbol='BTCUSDT'):
+    return [
+        exchange.place({'symbol': symbol, 'side': 'BUY', 'type': order_type, 'quantity': '0.01', 'price': '29000'})
+        for _ in range(count)
+    ]
+
+
+@pytest.fixture
+def bot(exchange):
+    return BinanceClient()
+
+
+def test_history_is_paged_by_order_id(bot, exchange, monkeypatch):
+    monkeypatch.setattr(check_orders, 'PAGE_LIMIT', 2)
+    place(exchange, 5)
+    orders = check_orders.fetch_history(bot, 'BTCUSDT', since=None, full=False)
+    assert [order['orderId'] for order in orders] == [1, 2, 3, 4, 5]
+    assert exchange.requests['GET /api/v3/allOrders'] == 3
+
+
+def test_first_run_records_every_order_as_new(bot, exchange):
+    place(exchange, 3)
+    rows = check_orders.reconcile(bot, 'BTCUSDT', check_orders.fetch_history(bot, 'BTCUSDT', None, False))
+    assert [row['change'] for row in rows] == ['new'] * 3
+    assert bot.orders.checkpoint('BTCUSDT')['last_order_id'] == 3
+    assert len(bot.orders.open_orders('BTCUSDT')) == 3
+
+
+def test_later_runs_fetch_new_orders_and_requery_open_ones(bot, exchange):
+    first, second = place(exchange, 2)
+    place(exchange, 1, 'MARKET')
+    check_orders.reconcile(bot, 'BTCUSDT', check_orders.fetch_history(bot, 'BTCUSDT', None, False))
+
+    exchange.cancel({'orderId': first['orderId']})
+    place(exchange, 1)
+    rows = check_orders.reconcile(bot, 'BTCUSDT', check_orders.fetch_history(bot, 'BTCUSDT', None, False))
+    changes = {row['orderId']: (row['status'], row['change']) for row in rows}
+    # The filled market order cannot change any more, so it is not fetched again
+    assert changes == {4: ('NEW', 'new'), 1: ('CANCELED', 'updated'), 2: ('NEW', 'unchanged')}
+    assert exchange.requests['GET /api/v3/allOrders'] == 2
+    assert exchange.requests['GET /api/v3/order'] == 2
+
+
+def test_full_run_ignores_the_checkpoint(bot, exchange):
+    place(exchange, 2)
+    check_orders.reconcile(bot, 'BTCUSDT', check_orders.fetch_history(bot, 'BTCUSDT', None, False))
+    orders = check_orders.fetch_history(bot, 'BTCUSDT', None, full=True)
+    assert [order['orderId'] for order in orders] == [1, 2]
+
+
+def test_cli_writes_json_lines_per_symbol(exchange, capsys):
+    place(exchange, 2)
+    place(exchange, 1, symbol='ETHUSDT')
+    assert check_orders.main(['-s', 'btcusdt,ETHUSDT', '-f', 'json']) == 0
+    out, err = capsys.readouterr()
+    rows = [json.loads(line) for line in out.splitlines()]
+    assert sorted((row['symbol'], row['orderId']) for row in rows) == [('BTCUSDT', 1), ('BTCUSDT', 2), ('ETHUSDT', 3)]
+    assert 'Reconciled 3 orders across 2 symbols' in err and '3 new' in err
+
+
+def test_cli_reports_failed_symbols(exchange, capsys):
+    assert check_orders.main(['-s', 'DOGEUSDT']) == 1
+    assert 'DOGEUSDT: Failed to get order history' in capsys.readouterr().err
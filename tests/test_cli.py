@@ -0,0 +1,7 @@
+from app.cli import parse_since
+
+
+def test_parse_since():
+    assert parse_since('1700000000000') == 1700000000000
+    assert parse_since('2024-01-01') == 1704067200000
+    assert parse_since('2024-01-01T01:00:00+01:00') == 1704067200000
@@ -0,0 +1,66 @@
+import asyncio
+
+import pytest
+
+from app.clock import RECV_WINDOW_MIN, ClockEstimator
+
+
+def test_offset_comes_from_the_fastest_round_trip():
+    clock = ClockEstimator()
+    # 100ms round trip, server 1s ahead
+    clock.add_sample(1000.0, 1001050, 1000.1)
+    # 10ms round trip, server 1.2s ahead
+    clock.add_sample(2000.0, 2001205, 2000.01)
+    assert clock.min_rtt_ms == pytest.approx(10, abs=0.01)
+    # The estimate sits below the raw offset by half the round trip plus twice the jitter
+    uncertainty = 5 + 2 * clock.jitter_ms
+    assert clock.offset_ms == pytest.approx(1200 - uncertainty, abs=1)
+    assert clock.offset_ms < 1200
+
+
+def test_single_sample_uses_half_the_round_trip_as_jitter():
+    clock = ClockEstimator()
+    clock.add_sample(1000.0, 1000025, 1000.05)
+    assert clock.jitter_ms == pytest.approx(25)
+    assert clock.offset_ms == pytest.approx(-25 - 50, abs=1)
+    assert clock.synced
+
+
+def test_recv_window_is_clamped():
+    clock = ClockEstimator()
+    clock.add_sample(1000.0, 1000000, 1000.001)
+    assert clock.recv_window == RECV_WINDOW_MIN
+
+    slow = ClockEstimator()
+    slow.add_sample(1000.0, 1030000, 1060.0)
+    assert slow.recv_window == 60000
+
+
+def test_window_forgets_old_samples():
+    clock = ClockEstimator(window=2)
+    clock.add_sample(1000.0, 1000000, 1000.001)
+    clock.add_sample(1001.0, 1001000, 1001.1)
+    clock.add_sample(1002.0, 1002000, 1002.1)
+    assert clock.state()['samples'] == 2
+    assert clock.min_rtt_ms == pytest.approx(100, abs=0.01)
+
+
+def test_state_reports_the_estimate():
+    clock = ClockEstimator()
+    assert not clock.synced
+    clock.add_sample(1000.0, 1000000, 1000.02)
+    state = clock.state()
+    assert state['offset_ms'] == clock.offset_ms and state['samples'] == 1 and state['leader'] is None
+
+
+def test_async_sampling_against_the_mock(exchange, connect_client):
+    async def scenario():
+        async with connect_client() as client:
+            estimator = ClockEstimator()
+            await estimator.sample_async(client.client.get_server_time, 3)
+            return estimator
+
+    estimator = asyncio.run(scenario())
+    assert estimator.state()['samples'] == 3
+    # The mock serves local time, so the estimate stays within a few milliseconds of zero
+    assert -50 < estimator.offset_ms <= 0
@@ -0,0 +1,126 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from app.coalescing import ReadCoalescer
+
+
+class Fetcher:
+    """Counts calls and returns after an optional delay"""
+
+    def __init__(self, delay=0.05, error=None):
+        self.calls = 0
+        self.delay = delay
+        self.error = error
+
+    async def __call__(self):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        if self.error:
+            raise self.error
+        return {'call': self.calls}
+
+
+def test_concurrent_calls_share_one_fetch():
+    reads, fetch = ReadCoalescer({'ticker': 0.0}), Fetcher()
+
+    async def scenario():
+        return await asyncio.gather(*(reads.get('ticker', 'BTCUSDT', fetch) for _ in range(5)))
+
+    results = asyncio.run(scenario())
+    assert fetch.calls == 1
+    assert all(result is results[0] for result in results)
+
+
+def test_errors_are_shared_and_not_cached():
+    reads, fetch = ReadCoalescer({'ticker': 60.0}), Fetcher(error=RuntimeError('down'))
+
+    async def scenario():
+        results = await asyncio.gather(*(reads.get('ticker', 'BTCUSDT', fetch) for _ in range(3)), return_exceptions=True)
+        fetch.error = None
+        return results, await reads.get('ticker', 'BTCUSDT', fetch)
+
+    errors, result = asyncio.run(scenario())
+    assert all(isinstance(error, RuntimeError) for error in errors)
+    assert result == {'call': 2}
+
+
+def test_results_are_cached_for_their_ttl():
+    reads, fetch = ReadCoalescer({'ticker': 0.1, 'open_orders': 0.0}), Fetcher(delay=0)
+
+    async def scenario():
+        first = await reads.get('ticker', 'BTCUSDT', fetch)
+        cached = await reads.get('ticker', 'BTCUSDT', fetch)
+        await reads.get('open_orders', None, fetch)
+        await reads.get('open_orders', None, fetch)
+        await asyncio.sleep(0.15)
+        expired = await reads.get('ticker', 'BTCUSDT', fetch)
+        return first, cached, expired
+
+    first, cached, expired = asyncio.run(scenario())
+    assert cached is first and expired == {'call': 4}
+
+
+def test_cache_evicts_the_least_recently_used_entry():
+    reads = ReadCoalescer({'ticker': 60.0}, max_entries=2)
+
+    async def scenario():
+        for symbol in ('A', 'B'):
+            await reads.get('ticker', symbol, Fetcher(delay=0))
+        await reads.get('ticker', 'A', Fetcher(delay=0))
+        await reads.get('ticker', 'C', Fetcher(delay=0))
+
+    asyncio.run(scenario())
+    assert [key for _, key in reads._cache] == ['A', 'C']
+
+
+def test_invalidate_drops_cached_and_in_flight_results():
+    reads, fetch = ReadCoalescer({'ticker': 60.0}), Fetcher()
+
+    async def scenario():
+        in_flight = asyncio.create_task(reads.get('ticker', 'BTCUSDT', fetch))
+        await asyncio.sleep(0)
+        reads.invalidate('ticker')
+        # Not joined to the invalidated call
+        fresh = await reads.get('ticker', 'BTCUSDT', fetch)
+        return await in_flight, fresh
+
+    stale, fresh = asyncio.run(scenario())
+    assert fetch.calls == 2 and stale is not fresh
+    assert reads._cache[('ticker', 'BTCUSDT')][1] is fresh
+
+
+@pytest.mark.parametrize('cancelled', [0, 1])
+def test_cancelled_caller_does_not_fail_the_others(cancelled):
+    reads, fetch = ReadCoalescer({'ticker': 0.0}), Fetcher(delay=0.1)
+
+    async def scenario():
+        callers = [asyncio.create_task(reads.get('ticker', 'BTCUSDT', fetch)) for _ in range(2)]
+        await asyncio.sleep(0.02)
+        callers[cancelled].cancel()
+        results = await asyncio.gather(*callers, return_exceptions=True)
+        return results[cancelled], results[1 - cancelled]
+
+    cancelled_result, result = asyncio.run(scenario())
+    assert isinstance(cancelled_result, asyncio.CancelledError)
+    assert result == {'call': 1} and fetch.calls == 1
+
+
+def test_threads_share_one_blocking_fetch():
+    reads = ReadCoalescer({'ticker': 0.0})
+    calls = []
+    results = []
+
+    def fetch():
+        calls.append(1)
+        time.sleep(0.1)
+        return {'price': '1'}
+
+    threads = [threading.Thread(target=lambda: results.append(reads.get_blocking('ticker', 'X', fetch))) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(calls) == 1 and len(results) == 4
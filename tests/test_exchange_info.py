@@ -0,0 +1,123 @@
+import asyncio
+from decimal import Decimal
+
+import pytest
+
+from app.exchange_info import SymbolFilters, SymbolInfoCache
+from benchmarks.mock_exchange import MockExchange
+
+from .helpers import wait_until
+
+SYMBOL_INFO = MockExchange._symbol_info('BTCUSDT')
+
+
+def limit_order(quantity, price):
+    return {'symbol': 'BTCUSDT', 'side': 'BUY', 'type': 'LIMIT', 'quantity': quantity, 'price': price}
+
+
+def test_filters_are_parsed_once():
+    filters = SymbolFilters(SYMBOL_INFO)
+    assert filters.step_size == Decimal('0.00001')
+    assert filters.tick_size == Decimal('0.01')
+    assert filters.min_notional == Decimal('5')
+
+
+def test_apply_rounds_quantity_down_and_price_to_the_tick():
+    params = SymbolFilters(SYMBOL_INFO).apply(limit_order(0.123456789, 30000.126))
+    assert params['quantity'] == '0.12345'
+    assert params['price'] == '30000.13'
+
+
+def test_apply_leaves_the_input_unchanged():
+    order = limit_order(0.123456789, 30000.126)
+    SymbolFilters(SYMBOL_INFO).apply(order)
+    assert order['quantity'] == 0.123456789
+
+
+@pytest.mark.parametrize('quantity, price, message', [
+    (0.000001, 30000, 'below LOT_SIZE stepSize'),
+    (10000, 30000, 'above LOT_SIZE maxQty'),
+    (0.0001, 30000, 'below minNotional'),
+    (1, 2000000, 'above PRICE_FILTER maxPrice'),
+])
+def test_apply_rejects_orders_outside_the_filters(quantity, price, message):
+    with pytest.raises(ValueError, match=message):
+        SymbolFilters(SYMBOL_INFO).apply(limit_order(quantity, price))
+
+
+def test_market_notional_uses_the_reference_price():
+    filters = SymbolFilters(SYMBOL_INFO)
+    order = {'symbol': 'BTCUSDT', 'side': 'BUY', 'type': 'MARKET', 'quantity': 0.0001}
+    # Unknown price: left to the exchange
+    assert filters.apply(order)['quantity'] == '0.0001'
+    with pytest.raises(ValueError, match='below minNotional'):
+        filters.apply(order, reference_price=30000)
+
+
+def test_symbol_that_is_not_trading_is_rejected():
+    filters = SymbolFilters({**SYMBOL_INFO, 'status': 'HALT'})
+    with pytest.raises(ValueError, match='not trading'):
+        filters.apply(limit_order(1, 30000))
+
+
+def test_cache_passes_orders_through_until_loaded():
+    cache = SymbolInfoCache()
+    order = limit_order(0.123456789, 30000.126)
+    assert not cache.loaded
+    assert cache.validate_order(order) is order
+
+
+def test_cache_validates_loaded_symbols():
+    cache = SymbolInfoCache()
+    cache.update({'symbols': [SYMBOL_INFO]})
+    assert cache.get('BTCUSDT')['baseAsset'] == 'BTC'
+    assert cache.validate_order(limit_order(1, 30000))['quantity'] == '1'
+    with pytest.raises(ValueError, match='ETHUSDT not found'):
+        cache.validate_order({**limit_order(1, 30000), 'symbol': 'ETHUSDT'})
+
+
+def test_cache_goes_stale_after_its_ttl():
+    fresh, expired = SymbolInfoCache(ttl=60), SymbolInfoCache(ttl=0)
+    for cache in (fresh, expired):
+        cache.update({'symbols': [SYMBOL_INFO]})
+    assert not fresh.is_stale()
+    assert expired.is_stale()
+
+
+def test_refresh_skips_while_another_refresh_runs():
+    cache = SymbolInfoCache()
+    calls = []
+    with cache._refresh_lock:
+        cache.refresh(lambda: calls.append(1) or {'symbols': []})
+    assert calls == []
+
+
+def test_failed_background_refresh_is_not_retried_on_every_lookup():
+    cache = SymbolInfoCache(ttl=0, retry=60)
+    cache.update({'symbols': [SYMBOL_INFO]})
+    calls = []
+
+    def failing_fetch():
+        calls.append(1)
+        raise ConnectionError('exchange unreachable')
+
+    for _ in range(5):
+        cache.refresh_in_background(failing_fetch)
+    asyncio.run(wait_until(lambda: calls and not cache._refresh_lock.locked()))
+    assert calls == [1]
+    assert cache.loaded and cache.get('BTCUSDT') is not None
+
+    # Once the retry interval has passed the next lookup tries again
+    cache.attempted_at -= 60
+    cache.refresh_in_background(failing_fetch)
+    asyncio.run(wait_until(lambda: len(calls) == 2))
+
+
+def test_client_rejects_invalid_orders_before_sending(exchange, connect_client):
+    async def scenario():
+        async with connect_client() as client:
+            with pytest.raises(ValueError, match='below minNotional'):
+                await client.place_order('BTCUSDT', 0.0001, 'LIMIT', 'BUY', price=30000)
+
+    asyncio.run(scenario())
+    assert 'POST /api/v3/order' not in exchange.requests
@@ -0,0 +1,74 @@
+import asyncio
+from decimal import Decimal
+
+from app.exchange_info import SymbolFilters
+from app.execution import Execution, split_quantity
+
+from .helpers import wait_until
+
+FILTERS = SymbolFilters({'symbol': 'BTCUSDT', 'filters': [
+    {'filterType': 'LOT_SIZE', 'minQty': '0.001', 'maxQty': '100', 'stepSize': '0.001'},
+    {'filterType': 'NOTIONAL', 'minNotional': '10', 'maxNotional': '1000000'},
+]})
+
+
+def test_split_quantity_stays_on_the_lot_size_grid():
+    assert split_quantity(Decimal('1'), 3, FILTERS) == [Decimal('0.333'), Decimal('0.333'), Decimal('0.334')]
+    # 0.003 BTC at 10000 is 30 USDT, enough for three 10 USDT children at most
+    assert split_quantity(Decimal('0.003'), 10, FILTERS, Decimal('10000')) == [Decimal('0.001')] * 3
+    assert split_quantity(Decimal('1'), 4, None) == [Decimal('0.25')] * 4
+
+
+def twap(client, slices, duration):
+    execution = Execution(client, 'TWAP', 'BTCUSDT', 'BUY', Decimal('0.003'),
+                          order_type='LIMIT', price=29000, duration=duration, slices=slices)
+    execution.start()
+    return execution
+
+
+def test_cancel_between_slices_cancels_resting_children(exchange, connect_client):
+    async def scenario():
+        async with connect_client() as client:
+            execution = twap(client, slices=3, duration=3)
+            await wait_until(lambda: execution.children and execution.children[0]['order_id'])
+            await execution.cancel()
+            return execution.progress()
+
+    progress = asyncio.run(scenario())
+    assert progress['status'] == 'CANCELED' and progress['children_sent'] == 1
+    assert progress['children'][0]['status'] == 'CANCELED'
+    assert [order['status'] for order in exchange.orders.values()] == ['CANCELED']
+
+
+def test_cancel_waits_for_a_send_in_flight(exchange, connect_client):
+    async def scenario():
+        async with connect_client() as client:
+            exchange.latency_ms = 300
+            execution = twap(client, slices=1, duration=1)
+            await wait_until(lambda: exchange.requests.get('POST /api/v3/order'))
+            await execution.cancel()
+            return execution.progress()
+
+    progress = asyncio.run(scenario())
+    child = progress['children'][0]
+    assert progress['status'] == 'CANCELED'
+    assert child['order_id'] is not None and child['status'] == 'CANCELED'
+    assert exchange.orders[child['order_id']]['status'] == 'CANCELED'
+
+
+def test_children_without_an_order_id_are_cancelled_by_client_order_id(exchange, connect_client):
+    async def scenario():
+        async with connect_client() as client:
+            order = await client.place_order('BTCUSDT', 0.001, 'LIMIT', 'BUY', price=29000)
+            execution = Execution(client, 'TWAP', 'BTCUSDT', 'BUY', Decimal('0.001'), order_type='LIMIT', price=29000)
+            # The response of this child was lost, so only its clientOrderId is known
+            execution.children.append({
+                'quantity': '0.001', 'order_id': None, 'client_order_id': order['clientOrderId'],
+                'status': 'PENDING', 'executed_qty': '0', 'error': None, 'sent_at': 0,
+            })
+            await execution._cancel_open_children()
+            return order, execution.children[0]
+
+    order, child = asyncio.run(scenario())
+    assert (child['order_id'], child['status']) == (order['orderId'], 'CANCELED')
+    assert exchange.orders[order['orderId']]['status'] == 'CANCELED'
@@ -0,0 +1,87 @@
+import os
+import time
+
+import numpy as np
+import pytest
+
+from app.binance_client import BinanceClient
+from app.klines import KlineStore, _windows, download, interval_ms
+
+MINUTE = 60_000
+
+
+def rows(first, count, step=MINUTE):
+    return [
+        [t, '1.0', '2.0', '0.5', str(1 + i), '3.0', t + step - 1, '4.0', 5, '1.5', '2.0', '0']
+        for i, t in enumerate(range(first, first + count * step, step))
+    ]
+
+
+@pytest.fixture
+def store(tmp_path):
+    return KlineStore(str(tmp_path))
+
+
+def test_unknown_intervals_are_rejected():
+    assert interval_ms('1h') == 3_600_000
+    with pytest.raises(ValueError, match='Interval must be one of'):
+        interval_ms('7m')
+
+
+def test_append_skips_candles_already_stored(store):
+    assert store.append('btcusdt', '1m', rows(0, 3)) == 3
+    assert store.append('BTCUSDT', '1m', rows(MINUTE, 4)) == 2
+    klines = store.load('BTCUSDT', '1m')
+    assert klines.open_time.tolist() == [0, MINUTE, 2 * MINUTE, 3 * MINUTE, 4 * MINUTE]
+    assert klines.close.tolist() == [1.0, 2.0, 3.0, 3.0, 4.0]
+    assert store.span('BTCUSDT', '1m') == (0, 4 * MINUTE)
+
+
+def test_between_is_half_open(store):
+    store.append('BTCUSDT', '1m', rows(0, 5))
+    klines = store.load('BTCUSDT', '1m', start=MINUTE, end=3 * MINUTE)
+    assert klines.open_time.tolist() == [MINUTE, 2 * MINUTE]
+    assert klines.close_time.tolist() == [2 * MINUTE - 1, 3 * MINUTE - 1]
+
+
+def test_interrupted_append_is_trimmed_on_open(store):
+    store.append('BTCUSDT', '1m', rows(0, 3))
+    # A write that stopped after the first column of a fourth candle
+    with open(os.path.join(store.path('BTCUSDT', '1m'), 'open_time.bin'), 'ab') as f:
+        f.write(np.array([3 * MINUTE], dtype='<i8').tobytes())
+    assert len(store.load('BTCUSDT', '1m')) == 3
+    assert store.append('BTCUSDT', '1m', rows(3 * MINUTE, 1)) == 1
+    assert store.load('BTCUSDT', '1m').close.tolist() == [1.0, 2.0, 3.0, 1.0]
+
+
+def test_merge_keeps_stored_candles(store):
+    store.append('BTCUSDT', '1m', rows(2 * MINUTE, 2))
+    assert store.merge('BTCUSDT', '1m', rows(0, 3)) == 2
+    klines = store.load('BTCUSDT', '1m')
+    assert klines.open_time.tolist() == [0, MINUTE, 2 * MINUTE, 3 * MINUTE]
+    # The stored candle at 2m wins over the merged one
+    assert klines.close.tolist() == [1.0, 2.0, 1.0, 2.0]
+    assert not os.path.exists(store.path('BTCUSDT', '1m') + '.new')
+
+
+def test_windows_cover_the_range_in_pages():
+    assert _windows(30_000, 2500 * MINUTE, MINUTE) == [
+        (0, 1000 * MINUTE - 1), (1000 * MINUTE, 2000 * MINUTE - 1), (2000 * MINUTE, 2500 * MINUTE - 1),
+    ]
+
+
+def test_download_fetches_only_missing_candles(store, exchange):
+    bot = BinanceClient()
+    now = int(time.time() * 1000)
+    start = now - now % MINUTE - 2000 * MINUTE
+    end = start + 1500 * MINUTE
+    assert download(bot, store, 'BTCUSDT', '1m', start + 500 * MINUTE, end) == 1000
+    assert exchange.requests['GET /api/v3/klines'] == 1
+
+    # Earlier candles are merged in with one rewrite
+    assert download(bot, store, 'BTCUSDT', '1m', start, end) == 500
+    klines = store.load('BTCUSDT', '1m')
+    assert (len(klines), klines.open_time[0], klines.open_time[-1]) == (1500, start, end - MINUTE)
+    assert np.all(np.diff(klines.open_time) == MINUTE)
+    assert download(bot, store, 'BTCUSDT', '1m', start, end) == 0
+    assert exchange.requests['GET /api/v3/klines'] == 2
@@ -0,0 +1,78 @@
+import gzip
+import json
+import logging
+import queue
+import sys
+from logging.handlers import RotatingFileHandler
+
+from app.logger import DeferredQueueHandler, JsonFormatter, _gzip_rotator, log_trade_result
+
+
+class Recorder(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record)
+
+
+def make_logger(name, handler):
+    logger = logging.getLogger(f"tests.{name}")
+    logger.handlers = [handler]
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+    return logger
+
+
+def test_records_are_rendered_as_json_lines():
+    record = logging.LogRecord('binance_trading_bot.client', logging.INFO, __file__, 1, "placed %s", ('BTCUSDT',), None)
+    record.fields = {'order_id': 7}
+    entry = json.loads(JsonFormatter().format(record))
+    assert entry['level'] == 'INFO' and entry['logger'] == 'binance_trading_bot.client'
+    assert entry['message'] == 'placed BTCUSDT' and entry['order_id'] == 7
+    assert entry['time'].endswith('+00:00')
+
+
+def test_exceptions_are_included():
+    try:
+        raise ValueError('boom')
+    except ValueError:
+        record = logging.LogRecord('bot', logging.ERROR, __file__, 1, 'failed', (), sys.exc_info())
+    assert 'ValueError: boom' in json.loads(JsonFormatter().format(record))['exception']
+
+
+def test_queue_handler_leaves_formatting_to_the_listener():
+    log_queue = queue.SimpleQueue()
+    logger = make_logger('deferred', DeferredQueueHandler(log_queue))
+    arguments = {'symbol': 'BTCUSDT'}
+    logger.info("order %s", arguments)
+    record = log_queue.get_nowait()
+    # The record is enqueued as-is: args are kept and the message is not yet rendered
+    assert record.args is arguments and record.msg == "order %s"
+
+
+def test_trade_results_carry_structured_fields():
+    recorder = Recorder()
+    logger = make_logger('trades', recorder)
+    log_trade_result(logger, True, {'symbol': 'BTCUSDT', 'orderId': 1, 'status': 'FILLED'})
+    log_trade_result(logger, False, 'Insufficient balance')
+    success, failure = recorder.records
+    assert success.fields['order_id'] == 1 and success.fields['status'] == 'FILLED'
+    assert failure.levelno == logging.ERROR and failure.fields == {'success': False, 'error': 'Insufficient balance'}
+
+
+def test_rotated_files_are_gzipped(tmp_path):
+    path = tmp_path / 'trade_logs.log'
+    handler = RotatingFileHandler(path, maxBytes=200, backupCount=2)
+    handler.namer = lambda name: name + '.gz'
+    handler.rotator = _gzip_rotator
+    handler.setFormatter(JsonFormatter())
+    logger = make_logger('rotation', handler)
+    for i in range(10):
+        logger.info("line %d", i)
+    handler.close()
+
+    assert sorted(p.name for p in tmp_path.iterdir()) == ['trade_logs.log', 'trade_logs.log.1.gz', 'trade_logs.log.2.gz']
+    with gzip.open(tmp_path / 'trade_logs.log.1.gz', 'rt') as backup:
+        assert all(json.loads(line)['logger'] == 'tests.rotation' for line in backup)
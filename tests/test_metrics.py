@@ -0,0 +1,66 @@
+import pytest
+
+from app.metrics import Counter, Histogram, MetricsRegistry
+
+
+def test_counter_renders_each_label_combination():
+    counter = Counter('orders_total', 'Orders', ['side', 'outcome'])
+    counter.inc('BUY', 'success')
+    counter.inc('BUY', 'success', amount=2)
+    counter.inc('SELL', 'error')
+    assert counter.value('BUY', 'success') == 3
+    assert counter.render() == [
+        '# HELP orders_total Orders',
+        '# TYPE orders_total counter',
+        'orders_total{side="BUY",outcome="success"} 3',
+        'orders_total{side="SELL",outcome="error"} 1',
+    ]
+
+
+def test_label_values_are_escaped():
+    counter = Counter('errors_total', 'Errors', ['message'])
+    counter.inc('say "hi"\\\n')
+    assert counter.render()[-1] == 'errors_total{message="say \\"hi\\"\\\\\\n"} 1'
+
+
+def test_histogram_buckets_are_cumulative_and_inclusive():
+    histogram = Histogram('stage_seconds', 'Stages', ['stage'], buckets=(0.1, 0.5, 1.0))
+    for value in (0.05, 0.1, 0.3, 2.0):
+        histogram.observe(value, 'sign')
+    assert histogram.count('sign') == 4
+    assert histogram.render()[2:] == [
+        'stage_seconds_bucket{stage="sign",le="0.1"} 2',
+        'stage_seconds_bucket{stage="sign",le="0.5"} 3',
+        'stage_seconds_bucket{stage="sign",le="1.0"} 3',
+        'stage_seconds_bucket{stage="sign",le="+Inf"} 4',
+        'stage_seconds_sum{stage="sign"} 2.45',
+        'stage_seconds_count{stage="sign"} 4',
+    ]
+
+
+def test_histogram_times_a_block_even_when_it_raises():
+    histogram = Histogram('block_seconds', 'Blocks')
+    with pytest.raises(RuntimeError):
+        with histogram.time():
+            raise RuntimeError
+    assert histogram.count() == 1
+
+
+def test_registry_rejects_duplicate_names():
+    registry = MetricsRegistry()
+    registry.counter('a_total', 'A')
+    registry.histogram('b_seconds', 'B')
+    with pytest.raises(ValueError, match='already registered'):
+        registry.counter('a_total', 'A again')
+    assert registry.render().endswith('# TYPE b_seconds histogram\n')
+
+
+def test_metrics_endpoint_reports_orders_and_requests(http, exchange):
+    http.post('/api/v1/orders', json={'symbol': 'BTCUSDT', 'quantity': 0.001, 'order_type': 'MARKET', 'side': 'BUY'})
+    response = http.get('/metrics')
+    assert response.status_code == 200
+    assert response.headers['content-type'].startswith('text/plain; version=0.0.4')
+    body = response.text
+    assert 'trading_bot_orders_total{type="MARKET",side="BUY",outcome="success"}' in body
+    assert 'trading_bot_stage_seconds_count{stage="validate_order"}' in body
+    assert 'trading_bot_http_request_seconds_count{method="POST",handler="create_order",status="201"}' in body
@@ -0,0 +1,95 @@
+import asyncio
+
+from app.order_book import BookSide, LocalOrderBook
+
+from .helpers import wait_until
+
+
+def depth_update(first_id, final_id, bids=(), asks=()):
+    return {'e': 'depthUpdate', 'U': first_id, 'u': final_id, 'b': list(bids), 'a': list(asks)}
+
+
+def loaded_book(last_update_id=100):
+    book = LocalOrderBook('BTCUSDT')
+    book.load_snapshot({
+        'lastUpdateId': last_update_id,
+        'bids': [['99.00', '1'], ['98.00', '2']],
+        'asks': [['101.00', '1'], ['102.00', '2']],
+    })
+    return book
+
+
+def test_book_side_keeps_levels_sorted_from_the_best():
+    bids, asks = BookSide(descending=True), BookSide(descending=False)
+    for price in ('10.5', '9', '11', '10'):
+        bids.set(price, '1')
+        asks.set(price, '1')
+    assert [level[0] for level in bids.top(3)] == ['11', '10.5', '10']
+    assert [level[0] for level in asks.top(3)] == ['9', '10', '10.5']
+    assert bids.best() == ['11', '1'] and asks.best() == ['9', '1']
+
+
+def test_book_side_updates_and_removes_levels():
+    side = BookSide(descending=True)
+    side.set('10.00', '1')
+    side.set('10.0', '3')
+    assert side.top(5) == [['10.0', '3']]
+    side.set('10', '0.00000000')
+    side.set('12', '0')
+    assert len(side) == 0 and side.best() is None
+
+
+def test_events_covered_by_the_snapshot_are_dropped():
+    book = loaded_book()
+    assert book.apply_diff(depth_update(90, 100, bids=[['99.00', '5']]))
+    assert book.best_bid() == ['99.00', '1'] and book.last_update_id == 100
+
+
+def test_first_event_must_contain_the_snapshot_id():
+    # The first applied event may start before lastUpdateId + 1 as long as it ends after it
+    book = loaded_book()
+    assert book.apply_diff(depth_update(95, 105, asks=[['101.00', '0']]))
+    assert book.best_ask() == ['102.00', '2'] and book.last_update_id == 105
+
+    book = loaded_book()
+    assert not book.apply_diff(depth_update(102, 105))
+    assert not book.ready
+
+
+def test_later_events_must_follow_on_directly():
+    book = loaded_book()
+    assert book.apply_diff(depth_update(101, 103, bids=[['99.50', '4']]))
+    assert book.apply_diff(depth_update(104, 104, bids=[['99.00', '0']]))
+    assert book.snapshot(5)['bids'] == [['99.50', '4'], ['98.00', '2']]
+    # Once an event has been applied, overlapping events count as a gap too
+    assert not book.apply_diff(depth_update(104, 106))
+    assert not book.ready
+
+
+def test_snapshots_do_not_share_levels_with_the_book():
+    book = loaded_book()
+    snapshot = book.snapshot(5)
+    snapshot['bids'][0][1] = '0'
+    snapshot['asks'].clear()
+    book.best_ask()[0] = '1.00'
+    assert book.snapshot(5) == loaded_book().snapshot(5)
+
+
+def test_gap_in_the_stream_reloads_the_snapshot(exchange, connect_client):
+    exchange.depth_interval_ms = 20
+    exchange.depth_gap_every = 3
+    exchange.depth_events = 11
+
+    async def scenario():
+        async with connect_client() as client:
+            await client.get_order_book('BTCUSDT')
+            await wait_until(lambda: exchange.depth_sent + exchange.depth_dropped == 11)
+            await wait_until(lambda: client.order_books.books['BTCUSDT'].last_update_id == exchange.books['BTCUSDT']['update_id'])
+            book = client.order_books.get('BTCUSDT')
+            return book.snapshot(1000)
+
+    snapshot = asyncio.run(scenario())
+    assert snapshot == exchange.book_snapshot('BTCUSDT', 1000)
+    assert exchange.depth_dropped == 3
+    # One read before the book was tracked, the initial snapshot and one reload per gap
+    assert exchange.requests['GET /api/v3/depth'] == 5
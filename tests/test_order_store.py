@@ -0,0 +1,180 @@
+import asyncio
+
+import pytest
+import requests
+
+from app.binance_client import BinanceClient, build_order_params
+from app.order_store import OrderStore
+
+from .helpers import wait_until
+
+
+@pytest.fixture
+def store():
+    store = OrderStore(':memory:')
+    yield store
+    store.close()
+
+
+def execution_report(status, executed='0', time=1000, execution_type='NEW', trade_id=-1):
+    return {
+        'e': 'executionReport', 'E': time, 's': 'BTCUSDT', 'c': 'order-1', 'C': '', 'S': 'BUY', 'o': 'LIMIT',
+        'f': 'GTC', 'q': '1', 'p': '30000', 'P': '0', 'x': execution_type, 'X': status, 'r': 'NONE', 'i': 7,
+        'l': executed, 'z': executed, 'L': '30000', 'n': '0', 'N': None, 'T': time, 't': trade_id, 'm': False,
+        'O': 900, 'Z': '0', 'Y': '0',
+    }
+
+
+def submit(store):
+    params = build_order_params('BTCUSDT', 1, 'LIMIT', 'BUY', price=30000)
+    params['newClientOrderId'] = 'order-1'
+    store.record_submission(params)
+
+
+def test_submission_is_journaled_before_the_response(store):
+    submit(store)
+    row = store.get_order('BTCUSDT', client_order_id='order-1')
+    assert row['status'] == 'PENDING_NEW' and row['order_id'] is None
+    assert store.open_order_count('BTCUSDT') == 1
+
+
+def test_open_notional_counts_the_unfilled_quantity(store):
+    submit(store)
+    store.record_submission(build_order_params('BTCUSDT', 2, 'MARKET', 'BUY') | {'newClientOrderId': 'market-1'})
+    assert store.open_notional('BTCUSDT') == 30000
+    store.apply_execution_report(execution_report('PARTIALLY_FILLED', '0.4', execution_type='TRADE', trade_id=5))
+    assert store.open_notional('BTCUSDT') == pytest.approx(18000)
+    assert store.open_notional('ETHUSDT') == 0
+
+
+def test_failure_only_rejects_pending_orders(store):
+    submit(store)
+    store.record_failure('order-1', 'timeout')
+    assert store.get_order('BTCUSDT', client_order_id='order-1')['status'] == 'REJECTED'
+    # The order did reach the exchange after all
+    store.apply_execution_report(execution_report('NEW'))
+    store.record_failure('order-1', 'late error')
+    row = store.get_order('BTCUSDT', 7)
+    assert row['status'] == 'NEW'
+
+
+def test_older_reports_are_ignored(store):
+    store.apply_execution_report(execution_report('FILLED', '1', time=2000, execution_type='TRADE', trade_id=5))
+    store.apply_execution_report(execution_report('NEW', time=1000))
+    row = store.get_order('BTCUSDT', 7)
+    assert (row['status'], row['executed_qty'], row['updated_at']) == ('FILLED', '1', 2000)
+    assert len(store.fills('BTCUSDT', 7)) == 1
+
+
+@pytest.mark.parametrize('stored, late', [
+    (('FILLED', '1'), ('NEW', '0')),
+    (('CANCELED', '0.4'), ('PARTIALLY_FILLED', '0.4')),
+    (('PARTIALLY_FILLED', '0.6'), ('PARTIALLY_FILLED', '0.4')),
+])
+def test_ties_keep_the_later_stage(store, stored, late):
+    store.apply_execution_report(execution_report(*stored))
+    store.apply_execution_report(execution_report(*late))
+    row = store.get_order('BTCUSDT', 7)
+    assert (row['status'], row['executed_qty']) == stored
+
+
+def test_ties_accept_progress(store):
+    store.apply_execution_report(execution_report('NEW'))
+    store.apply_execution_report(execution_report('PARTIALLY_FILLED', '0.4'))
+    store.apply_execution_report(execution_report('PARTIALLY_FILLED', '0.7'))
+    row = store.get_order('BTCUSDT', 7)
+    assert (row['status'], row['executed_qty']) == ('PARTIALLY_FILLED', '0.7')
+
+
+def test_replayed_report_is_a_no_op(store):
+    store.apply_execution_report(execution_report('NEW'))
+    store.apply_execution_report({**execution_report('NEW'), 'p': '31000'})
+    assert store.get_order('BTCUSDT', 7)['price'] == '30000'
+
+
+def test_rest_response_after_the_stream_does_not_regress(store):
+    submit(store)
+    store.apply_execution_report(execution_report('FILLED', '1', execution_type='TRADE', trade_id=5))
+    # The REST response of the same order, stamped with the same millisecond
+    store.record_response({
+        'symbol': 'BTCUSDT', 'orderId': 7, 'clientOrderId': 'order-1', 'transactTime': 1000,
+        'status': 'NEW', 'executedQty': '0', 'origQty': '1', 'price': '30000', 'fills': [],
+    })
+    assert store.get_order('BTCUSDT', 7)['status'] == 'FILLED'
+
+
+def test_stream_keeps_the_journal_current(mock_server, exchange, connect_client):
+    async def scenario():
+        async with connect_client() as client:
+            client.user_stream.start()
+            await wait_until(lambda: client.orders_live and client.balances_live)
+            order = await client.place_order('BTCUSDT', 0.01, 'LIMIT', 'BUY', price=29000)
+            mock_server.run(exchange.fill, order['orderId'])
+            await wait_until(lambda: client.orders.get_order('BTCUSDT', order['orderId'])['status'] == 'FILLED')
+            return order, client.orders.fills('BTCUSDT', order['orderId']), client.balances.get('BTC')
+
+    order, fills, btc = asyncio.run(scenario())
+    assert [(fill['price'], float(fill['qty'])) for fill in fills] == [('29000', 0.01)]
+    assert float(btc['free']) == pytest.approx(100.01)
+    assert exchange.requests['POST /api/v3/userDataStream'] == 1
+
+
+def test_reconnect_reconciles_what_the_stream_missed(mock_server, exchange, connect_client):
+    async def scenario():
+        async with connect_client() as client:
+            client.user_stream.start()
+            await wait_until(lambda: client.orders_live)
+            order = await client.place_order('ETHUSDT', 0.1, 'LIMIT', 'SELL', price=2100)
+
+            mock_server.call(exchange.drop_connections())
+            await wait_until(lambda: not client.orders_live)
+            # Filled while the stream is down, so no executionReport reaches the client
+            mock_server.run(exchange.fill, order['orderId'])
+            await wait_until(lambda: client.orders_live)
+            return client.orders.get_order('ETHUSDT', order['orderId'])
+
+    row = asyncio.run(scenario())
+    assert row['status'] == 'FILLED' and float(row['executed_qty']) == pytest.approx(0.1)
+    assert exchange.requests['POST /api/v3/userDataStream'] == 2
+    assert exchange.requests['GET /api/v3/order'] == 1
+
+
+def test_reconnect_resolves_orders_whose_response_was_lost(mock_server, exchange, connect_client):
+    def journal(client, client_order_id):
+        params = build_order_params('BTCUSDT', 0.01, 'LIMIT', 'BUY', price=29000)
+        params['newClientOrderId'] = client_order_id
+        client.orders.record_submission(params)
+        return params
+
+    async def scenario():
+        async with connect_client() as client:
+            # Both were journaled, then the process died before the responses arrived
+            placed = exchange.place(journal(client, 'reached-1'))
+            mock_server.run(exchange.fill, placed['orderId'])
+            journal(client, 'lost-1')
+            client.user_stream.start()
+            await wait_until(lambda: client.orders_live)
+            return (
+                client.orders.get_order('BTCUSDT', client_order_id='reached-1'),
+                client.orders.get_order('BTCUSDT', client_order_id='lost-1'),
+                client.orders.open_order_count('BTCUSDT'),
+            )
+
+    reached, lost, open_count = asyncio.run(scenario())
+    assert (reached['status'], reached['order_id']) == ('FILLED', 1)
+    assert (lost['status'], lost['reject_reason']) == ('REJECTED', 'Order never reached the exchange')
+    assert open_count == 0
+    assert exchange.requests['GET /api/v3/order'] == 2
+
+
+def test_sync_client_journals_transport_failures(exchange, monkeypatch):
+    bot = BinanceClient()
+
+    def timeout(**order_params):
+        raise requests.exceptions.Timeout('read timed out')
+
+    monkeypatch.setattr(bot.client, 'create_order', timeout)
+    with pytest.raises(requests.exceptions.Timeout):
+        bot.place_order('BTCUSDT', 0.001, 'MARKET', 'BUY')
+    row = bot.orders.orders('BTCUSDT')[0]
+    assert row['status'] == 'REJECTED' and 'read timed out' in row['reject_reason']
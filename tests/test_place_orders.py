@@ -0,0 +1,85 @@
+import pytest
+
+from app.main import parse_batch_order
+
+CSV_BATCH = (
+    "symbol,quantity,order_type,side,price,stop_price\n"
+    "btcusdt,0.001,limit,buy,29000,\n"
+    "ETHUSDT,0.01,MARKET,SELL,,\n"
+)
+
+
+def test_parse_batch_order_normalises_fields():
+    assert parse_batch_order({'symbol': ' btcusdt ', 'quantity': '0.5', 'order_type': 'limit', 'side': 'buy', 'price': '10', 'stop_price': ''}) == {
+        'symbol': 'BTCUSDT', 'quantity': 0.5, 'order_type': 'LIMIT', 'side': 'BUY', 'price': 10.0, 'stop_price': None,
+    }
+
+
+def test_parse_batch_order_rejects_non_objects():
+    with pytest.raises(ValueError, match='must be an object'):
+        parse_batch_order(['BTCUSDT'])
+
+
+def test_json_batch_is_placed_in_input_order(http, exchange):
+    orders = [
+        {'symbol': 'BTCUSDT', 'quantity': 0.001, 'order_type': 'LIMIT', 'side': 'BUY', 'price': 29000 + i}
+        for i in range(5)
+    ]
+    response = http.post('/place_orders', json=orders)
+    assert response.status_code == 200
+    body = response.json()
+    assert (body['success'], body['placed'], body['failed']) == (True, 5, 0)
+    assert [result['index'] for result in body['results']] == list(range(5))
+    assert [result['order']['price'] for result in body['results']] == [str(29000 + i) for i in range(5)]
+    assert exchange.requests['POST /api/v3/order'] == 5
+
+
+def test_csv_body_and_upload(http, exchange):
+    response = http.post('/place_orders', content=CSV_BATCH.encode(), headers={'content-type': 'text/csv'})
+    assert response.json()['placed'] == 2
+
+    response = http.post('/place_orders', files={'file': ('orders.csv', b'\xef\xbb\xbf' + CSV_BATCH.encode(), 'text/csv')})
+    assert response.json()['placed'] == 2
+    assert exchange.requests['POST /api/v3/order'] == 4
+
+
+def test_invalid_order_rejects_the_whole_batch(http, exchange):
+    orders = [
+        {'symbol': 'BTCUSDT', 'quantity': 0.001, 'order_type': 'MARKET', 'side': 'BUY'},
+        {'symbol': 'BTCUSDT', 'quantity': 0.001, 'order_type': 'LIMIT', 'side': 'BUY'},
+        {'symbol': 'BTCUSDT', 'quantity': 'lots', 'order_type': 'MARKET', 'side': 'BUY'},
+    ]
+    response = http.post('/place_orders', json=orders)
+    assert response.status_code == 400
+    assert [error['index'] for error in response.json()['errors']] == [1, 2]
+    assert 'POST /api/v3/order' not in exchange.requests
+
+
+def test_exchange_failures_are_reported_per_order(http, exchange):
+    exchange.error_rate = 1.0
+    response = http.post('/place_orders', json=[{'symbol': 'BTCUSDT', 'quantity': 0.001, 'order_type': 'MARKET', 'side': 'BUY'}])
+    body = response.json()
+    assert (body['success'], body['failed']) == (False, 1)
+    assert 'Injected error' in body['results'][0]['error']
+
+
+@pytest.mark.parametrize('kwargs, detail', [
+    ({'json': []}, 'Batch is empty'),
+    ({'json': {'symbol': 'BTCUSDT'}}, 'JSON array'),
+    ({'content': b'not json', 'headers': {'content-type': 'application/json'}}, 'JSON array of orders or CSV'),
+    ({'content': b'symbol\n\xff\xfe', 'headers': {'content-type': 'text/csv'}}, 'UTF-8'),
+    ({'files': {'file': ('orders.csv', b'symbol\n\xff\xfe', 'text/csv')}}, 'UTF-8'),
+    ({'files': {'other': ('orders.csv', CSV_BATCH.encode(), 'text/csv')}}, "'file' field"),
+])
+def test_malformed_batches_are_rejected(http, kwargs, detail):
+    response = http.post('/place_orders', **kwargs)
+    assert response.status_code == 400
+    assert detail in response.json()['detail']
+
+
+def test_batch_size_is_limited(http, monkeypatch):
+    monkeypatch.setattr('app.main.MAX_BATCH_SIZE', 2)
+    order = {'symbol': 'BTCUSDT', 'quantity': 0.001, 'order_type': 'MARKET', 'side': 'BUY'}
+    response = http.post('/place_orders', json=[order] * 3)
+    assert response.status_code == 400
+    assert 'exceeds 2 orders' in response.json()['detail']
@@ -0,0 +1,131 @@
+import asyncio
+import time
+
+import pytest
+
+from app.rate_limiter import FixedWindow, RateLimiter, api_path, depth_weight, endpoint_cost
+
+URL = 'https://testnet.binance.vision/api/v3/'
+
+
+def test_api_path():
+    assert api_path(URL + 'ticker/price') == 'ticker/price'
+    assert api_path('wss://stream.binance.com/ws') is None
+
+
+@pytest.mark.parametrize('method, path, params, cost', [
+    ('post', 'order', None, (1, True, True)),
+    ('delete', 'openOrders', None, (1, False, True)),
+    ('get', 'account', None, (20, False, False)),
+    ('get', 'openOrders', {'symbol': 'BTCUSDT'}, (6, False, False)),
+    ('get', 'openOrders', None, (80, False, False)),
+    ('get', 'depth', {'limit': 1000}, (50, False, False)),
+])
+def test_endpoint_cost(method, path, params, cost):
+    assert endpoint_cost(method, URL + path, params) == cost
+
+
+def test_depth_weight_steps():
+    assert [depth_weight(limit) for limit in (5, 100, 101, 500, 1000, 5000)] == [5, 5, 25, 25, 50, 250]
+
+
+def test_fixed_window_resets_only_at_the_boundary():
+    window = FixedWindow(60, 60, now=1200.0)
+    window.take(60)
+    # Nothing comes back part way through the minute
+    assert window.wait_time(1, 1230.0) == pytest.approx(30.0)
+    assert window.wait_time(1, 1259.5) == pytest.approx(0.5)
+    assert window.wait_time(1, 1260.0) == 0
+    assert window.used == 0
+    assert window.wait_time(51, 1261.0, reserve=10) == pytest.approx(59.0)
+
+
+def test_reported_usage_holds_until_its_window_rolls_over():
+    window = FixedWindow(100, 60, now=1200.0)
+    window.set_used(100, 1210.0)
+    assert window.wait_time(1, 1250.0) == pytest.approx(10.0)
+    # A header from the next minute starts that window's count
+    window.set_used(3, 1261.0)
+    assert window.window == 1260.0 and window.wait_time(1, 1261.0) == 0
+
+
+def test_reads_cannot_use_the_order_reserve():
+    limiter = RateLimiter()
+    limiter.configure([{'rateLimitType': 'REQUEST_WEIGHT', 'interval': 'MINUTE', 'intervalNum': 1, 'limit': 100}])
+    # Reads may only use 90 of the 100 weight
+    assert limiter._try_acquire(90, False, False, 'account') == 0
+    assert limiter._try_acquire(1, False, False, 'account') > 0
+    assert limiter._try_acquire(1, True, True, 'order') == 0
+
+
+def test_order_count_limits_new_orders():
+    limiter = RateLimiter()
+    limiter.configure([{'rateLimitType': 'ORDERS', 'interval': 'SECOND', 'intervalNum': 10, 'limit': 2}])
+    assert limiter._try_acquire(1, True, True, 'order') == 0
+    assert limiter._try_acquire(1, True, True, 'order') == 0
+    assert 0 < limiter._try_acquire(1, True, True, 'order') <= 10
+    # Cancels are not orders
+    assert limiter._try_acquire(1, False, True, 'order') == 0
+
+
+def test_configure_keeps_current_usage():
+    limiter = RateLimiter()
+    limiter._try_acquire(100, False, True, 'account')
+    limiter.configure([{'rateLimitType': 'REQUEST_WEIGHT', 'interval': 'MINUTE', 'intervalNum': 1, 'limit': 1200}])
+    usage = limiter.usage()['request_weight']
+    assert usage['limit'] == 1200 and usage['used'] == pytest.approx(100, abs=1)
+
+
+def test_headers_replace_local_usage():
+    limiter = RateLimiter()
+    limiter.update_from_response({'x-mbx-used-weight-1m': '5000', 'X-MBX-ORDER-COUNT-10S': '7'}, 200)
+    usage = limiter.usage()
+    assert usage['request_weight']['used'] == pytest.approx(5000, abs=1)
+    assert usage['orders_10s']['used'] == pytest.approx(7, abs=1)
+
+
+def test_ban_blocks_every_request_until_retry_after():
+    limiter = RateLimiter()
+    limiter.update_from_response({'Retry-After': '30'}, 429)
+    assert limiter.bans == 1
+    assert limiter._try_acquire(1, True, True, 'order') == pytest.approx(30, abs=0.5)
+
+
+def test_acquire_waits_without_blocking_the_loop():
+    limiter = RateLimiter()
+    limiter.weight = FixedWindow(600, 0.2)
+
+    async def scenario():
+        # The window is full, so the order waits for the next 0.2s window
+        limiter.weight.used = 600
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                ticks += 1
+                await asyncio.sleep(0.01)
+
+        task = asyncio.create_task(ticker())
+        started = time.perf_counter()
+        await limiter.acquire('post', URL + 'order', {})
+        task.cancel()
+        return time.perf_counter() - started, ticks
+
+    waited, ticks = asyncio.run(scenario())
+    assert waited < 1
+    assert ticks >= 1
+    assert limiter.waits >= 1
+    assert limiter.weight.used == 1
+
+
+def test_client_requests_draw_on_the_shared_limiter(exchange, connect_client):
+    from app.rate_limiter import rate_limiter
+
+    async def scenario():
+        async with connect_client() as client:
+            before = rate_limiter.weight_by_endpoint.get('v3/account', 0)
+            await client.get_account_info()
+            return rate_limiter.weight_by_endpoint['v3/account'] - before
+
+    assert asyncio.run(scenario()) == 20
@@ -0,0 +1,108 @@
+import pytest
+
+from app.binance_client import build_order_params
+from app.risk import PendingOrders, RiskEngine
+
+
+def order(side='BUY', quantity=1.0, price=100.0, symbol='BTCUSDT', order_type='LIMIT'):
+    return build_order_params(symbol, quantity, order_type, side, price=price if order_type == 'LIMIT' else None)
+
+
+def test_overrides_inherit_the_defaults():
+    risk = RiskEngine({'max_notional': 1000}, {'ethusdt': {'price_band': 0.05}})
+    risk.check(order(quantity=9), last_price=100)
+    with pytest.raises(ValueError, match='Order notional 1100.00000000 exceeds the ETHUSDT limit of 1000'):
+        risk.check(order(quantity=11, symbol='ETHUSDT'))
+    with pytest.raises(ValueError, match='outside the ETHUSDT band'):
+        risk.check(order(price=106, symbol='ETHUSDT'), last_price=100)
+    with pytest.raises(ValueError, match='Unknown risk limits: max_loss'):
+        RiskEngine({'max_loss': 1}, {})
+
+
+def test_market_notional_needs_a_last_price():
+    risk = RiskEngine({'max_notional': 1000}, {})
+    risk.check(order(quantity=20, order_type='MARKET'))
+    with pytest.raises(ValueError, match='Order notional'):
+        risk.check(order(quantity=20, order_type='MARKET'), last_price=100)
+
+
+def test_position_and_open_orders_are_only_read_when_limited():
+    def unexpected():
+        raise AssertionError('not limited, so not evaluated')
+
+    RiskEngine({}, {}).check(order(), position=unexpected, open_orders=unexpected)
+    risk = RiskEngine({'max_position': 5, 'max_open_orders': 2}, {})
+    risk.check(order(side='SELL', quantity=50), position=lambda: 4.5, open_orders=lambda: 1)
+    with pytest.raises(ValueError, match='Position would reach 5.50000000'):
+        risk.check(order(), position=lambda: 4.5)
+    with pytest.raises(ValueError, match='already has the maximum of 2 open orders'):
+        risk.check(order(), open_orders=lambda: 2)
+
+
+def test_pending_orders_add_up_per_symbol():
+    pending = PendingOrders()
+    pending.add(order(quantity=2, price=100))
+    pending.add(order(side='SELL', quantity=1, price=110))
+    pending.add(order(quantity=3, order_type='MARKET'), last_price=105)
+    pending.add(order(symbol='ETHUSDT'))
+    assert pending.get('BTCUSDT') == (3, 5.0, 625.0)
+    assert pending.get('ETHUSDT') == (1, 1.0, 100.0)
+    assert pending.get('BNBUSDT') == (0, 0.0, 0.0)
+
+
+def test_max_notional_applies_to_each_order_of_a_batch():
+    risk = RiskEngine({'max_notional': 1000}, {})
+    pending = PendingOrders()
+    for _ in range(5):
+        risk.check(order(quantity=9), pending=pending)
+        pending.add(order(quantity=9))
+    with pytest.raises(ValueError, match='Order notional 1100.00000000'):
+        risk.check(order(quantity=11), pending=pending)
+
+
+def test_open_notional_counts_open_and_pending_orders():
+    risk = RiskEngine({'max_open_notional': 1000}, {})
+    risk.check(order(quantity=4), open_notional=lambda: 600)
+    with pytest.raises(ValueError, match='Open notional would reach 1100.00000000, above the BTCUSDT limit of 1000'):
+        risk.check(order(quantity=5), open_notional=lambda: 600)
+    # MARKET orders count once a last price is known
+    risk.check(order(quantity=5, order_type='MARKET'), open_notional=lambda: 600)
+    with pytest.raises(ValueError, match='Open notional'):
+        risk.check(order(quantity=5, order_type='MARKET'), last_price=100, open_notional=lambda: 600)
+
+    pending = PendingOrders()
+    pending.add(order(quantity=4))
+    with pytest.raises(ValueError, match='Open notional would reach 1000.00000001'):
+        risk.check(order(quantity=6.0000000001), pending=pending)
+    with pytest.raises(ValueError, match='Open notional would reach 1200.00000000'):
+        risk.check(order(quantity=6), open_notional=lambda: 200, pending=pending)
+
+
+def test_pending_orders_count_against_position_and_open_orders():
+    pending = PendingOrders()
+    for _ in range(2):
+        pending.add(order(quantity=4))
+    # Without the ledger the batch alone is a lower bound of the position
+    with pytest.raises(ValueError, match='Position would reach 11.00000000'):
+        RiskEngine({'max_position': 10}, {}).check(order(quantity=3), pending=pending)
+    with pytest.raises(ValueError, match='would have more than 3 open orders with this batch'):
+        RiskEngine({'max_open_orders': 3}, {}).check(order(), open_orders=lambda: 1, pending=pending)
+    RiskEngine({'max_open_orders': 3}, {}).check(order(symbol='ETHUSDT'), open_orders=lambda: 2, pending=pending)
+
+
+def test_batch_that_breaks_a_limit_together_is_rejected(http, exchange):
+    http.app.state.binance_client.risk.configure({'max_open_orders': 2, 'max_notional': 100}, {})
+    # Each order is under max_notional; three BTCUSDT orders break max_open_orders together
+    orders = [
+        {'symbol': 'BTCUSDT', 'quantity': 0.001, 'order_type': 'LIMIT', 'side': 'BUY', 'price': 29000 + i}
+        for i in range(3)
+    ] + [{'symbol': 'ETHUSDT', 'quantity': 0.01, 'order_type': 'LIMIT', 'side': 'BUY', 'price': 2000}]
+    response = http.post('/place_orders', json=orders)
+    assert response.status_code == 400
+    assert response.json()['errors'] == [
+        {'index': 2, 'error': 'BTCUSDT would have more than 2 open orders with this batch'},
+    ]
+    assert 'POST /api/v3/order' not in exchange.requests
+
+    response = http.post('/place_orders', json=orders[1:])
+    assert response.status_code == 200 and response.json()['placed'] == 3
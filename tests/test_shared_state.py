@@ -0,0 +1,100 @@
+import asyncio
+import os
+import threading
+
+import pytest
+
+from app.clock import ClockEstimator
+from app.rate_limiter import RateLimiter
+from app.shared_state import LAYOUT_VERSION, SharedState
+
+WEIGHT_LIMITS = [{'rateLimitType': 'REQUEST_WEIGHT', 'interval': 'MINUTE', 'intervalNum': 1, 'limit': 100}]
+
+
+@pytest.fixture
+def workers(tmp_path):
+    """Two workers attached to the same state directory"""
+    return SharedState(str(tmp_path)), SharedState(str(tmp_path))
+
+
+def test_new_state_is_initialised(workers):
+    first, second = workers
+    assert first.read()['version'] == LAYOUT_VERSION
+    first.write(weight_used=42)
+    assert second.read()['weight_used'] == 42
+
+
+def test_only_one_worker_leads(workers):
+    first, second = workers
+    assert first.try_lead() and first.leading
+    assert not second.try_lead()
+    # Closing the leader's lock file, as its exit would, hands leadership on
+    os.close(first._leader_fd)
+    first._leader_fd = None
+    assert second.try_lead()
+
+
+def test_followers_adopt_the_leaders_clock(workers):
+    first, second = workers
+    leader, follower = ClockEstimator(shared=first), ClockEstimator(shared=second)
+    assert not follower.adopt_shared()
+    first.try_lead()
+    leader.add_sample(1000.0, 1000500, 1000.02)
+    assert follower.adopt_shared()
+    assert (follower.offset_ms, follower.recv_window) == (leader.offset_ms, leader.recv_window)
+    assert follower._following() and not leader._following()
+
+
+def test_rate_limit_budget_is_shared(workers):
+    first, second = (RateLimiter(shared) for shared in workers)
+    first.configure(WEIGHT_LIMITS)
+    second.configure(WEIGHT_LIMITS)
+    assert first._try_acquire(60, False, True, 'account') == 0
+    # The second worker sees what the first one used
+    assert second._try_acquire(60, False, True, 'account') > 0
+    assert second._try_acquire(40, False, True, 'account') == 0
+
+
+def test_ban_is_shared(workers):
+    first, second = (RateLimiter(shared) for shared in workers)
+    first.update_from_response({'Retry-After': '30'}, 429)
+    assert second._try_acquire(1, True, True, 'order') == pytest.approx(30, abs=0.5)
+
+
+def test_exchange_info_is_downloaded_once(workers):
+    calls = []
+    started = threading.Barrier(2)
+
+    def fetch():
+        calls.append(1)
+        return {'symbols': [], 'rateLimits': WEIGHT_LIMITS}
+
+    def load(shared):
+        started.wait()
+        return shared.exchange_info(fetch, max_age=60)
+
+    results = []
+    threads = [threading.Thread(target=lambda shared=shared: results.append(load(shared))) for shared in workers]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(calls) == 1
+    assert results[0] == results[1] == {'symbols': [], 'rateLimits': WEIGHT_LIMITS}
+
+
+def test_stale_exchange_info_is_downloaded_again(workers):
+    first, second = workers
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        return {'symbols': [len(calls)]}
+
+    async def scenario():
+        await first.exchange_info_async(fetch, max_age=60)
+        cached = await second.exchange_info_async(fetch, max_age=60)
+        refreshed = await second.exchange_info_async(fetch, max_age=-1)
+        return cached, refreshed
+
+    assert asyncio.run(scenario()) == ({'symbols': [1]}, {'symbols': [2]})
@@ -0,0 +1,140 @@
+import asyncio
+import time
+
+from app.ticker_cache import TickerStream, TickerTable
+
+from .helpers import MOCK_WS_URL, wait_until
+
+
+def live_table(connected_at=None):
+    table = TickerTable()
+    table.stream_connected(connected_at)
+    return table
+
+
+def test_table_rows_are_assigned_once():
+    table = live_table()
+    table.update_last('BTCUSDT', 30000.0)
+    table.update_last('ETHUSDT', 2000.0)
+    table.update_last('BTCUSDT', 30100.0)
+    assert table.symbols == ['BTCUSDT', 'ETHUSDT']
+    assert table.last_price('BTCUSDT') == 30100.0
+
+
+def test_quiet_symbols_stay_current_while_connected():
+    now = time.monotonic()
+    table = live_table(now - 600)
+    # Not updated for nine minutes, but the stream would have sent any change
+    table.update_last('BTCUSDT', 30000.0, now=now - 540)
+    table.update_book('BTCUSDT', 29999.0, 30001.0, now=now - 540)
+    assert table.last_price('BTCUSDT') == 30000.0
+    assert table.book('BTCUSDT') == {'bidPrice': 29999.0, 'askPrice': 30001.0}
+    assert table.status()['connected'] and table.status()['last_update_age_s'] >= 540
+    assert table.last_price('ETHUSDT') is None
+
+
+def test_prices_are_not_current_across_a_reconnect():
+    table = live_table()
+    table.update_last('BTCUSDT', 30000.0)
+    table.update_last('ETHUSDT', 2000.0)
+    table.stream_disconnected()
+    assert table.last_price('BTCUSDT') is None and table.all_prices() == []
+    assert (table.status()['connected'], table.status()['symbols']) == (False, 0)
+
+    table.stream_connected()
+    table.update_last('ETHUSDT', 2001.0)
+    # BTCUSDT may have changed while the stream was down
+    assert table.last_price('BTCUSDT') is None
+    assert table.all_prices() == [{'symbol': 'ETHUSDT', 'price': '2001.0'}]
+    assert table.has_prices(['ETHUSDT']) and not table.has_prices(['ETHUSDT', 'BTCUSDT'])
+
+
+def test_rest_answers_only_fill_symbols_not_yet_seen():
+    table = TickerTable()
+    table.seed_last('BTCUSDT', 30000.0, time.monotonic())
+    assert table.symbols == []
+
+    table.stream_connected()
+    table.update_last('ETHUSDT', 2001.0)
+    requested_at = time.monotonic()
+    table.seed_last('ETHUSDT', 2000.0, requested_at)
+    table.seed_last('BTCUSDT', 30000.0, requested_at)
+    table.seed_book('BTCUSDT', 29999.0, 30001.0, requested_at)
+    # Sent before this connection opened, so possibly older than what was missed
+    table.seed_last('BNBUSDT', 300.0, requested_at - 60)
+    assert table.all_prices() == [{'symbol': 'ETHUSDT', 'price': '2001.0'}, {'symbol': 'BTCUSDT', 'price': '30000.0'}]
+    assert table.book('BTCUSDT') == {'bidPrice': 29999.0, 'askPrice': 30001.0}
+
+
+def test_stream_messages_update_the_table():
+    stream = TickerStream(live_table())
+    stream._handle({'stream': '!miniTicker@arr', 'data': [{'s': 'BTCUSDT', 'c': '30000.00'}]})
+    stream._handle({'stream': 'btcusdt@bookTicker', 'data': {'s': 'BTCUSDT', 'b': '29999.99', 'a': '30000.01'}})
+    stream._handle({'result': None, 'id': 1})
+    assert stream.table.last_price('BTCUSDT') == 30000.0
+    assert stream.table.book('BTCUSDT') == {'bidPrice': 29999.99, 'askPrice': 30000.01}
+
+
+def test_stream_fills_prices_and_subscribed_books(exchange):
+    async def scenario():
+        stream = TickerStream(TickerTable(), MOCK_WS_URL)
+        await stream.track_book('ETHUSDT')
+        stream.start()
+        try:
+            await wait_until(lambda: stream.table.book('ETHUSDT') is not None)
+            # Symbols tracked after connecting are subscribed on the open connection
+            await stream.track_book('BTCUSDT')
+            await wait_until(lambda: stream.table.book('BTCUSDT') is not None)
+            table = stream.table
+            return table.last_price('ETHUSDT'), table.all_prices(), table.book('BTCUSDT')
+        finally:
+            await stream.close()
+            assert not stream.table.status()['connected']
+
+    eth, prices, btc_book = asyncio.run(scenario())
+    assert eth == exchange.prices['ETHUSDT']
+    assert {row['symbol'] for row in prices} == set(exchange.prices)
+    assert btc_book['askPrice'] > btc_book['bidPrice']
+
+
+def test_client_reads_streamed_prices_without_rest(exchange, connect_client):
+    async def scenario():
+        async with connect_client() as client:
+            client.tickers.stream_connected()
+            first = await client.get_ticker_price('BTCUSDT')
+            client.tickers.update_last('BTCUSDT', 31000.0)
+            second = await client.get_ticker_price('BTCUSDT')
+            return first, second
+
+    first, second = asyncio.run(scenario())
+    assert float(first['price']) == exchange.prices['BTCUSDT']
+    assert second == {'symbol': 'BTCUSDT', 'price': '31000.0'}
+    assert exchange.requests['GET /api/v3/ticker/price'] == 1
+
+
+def test_all_prices_use_rest_until_every_symbol_is_seen(exchange, connect_client):
+    async def scenario():
+        async with connect_client() as client:
+            client.tickers.stream_connected()
+            client.tickers.update_last('BTCUSDT', 31000.0)
+            # Only one symbol has been streamed, so REST answers for all of them
+            partial = await client.get_ticker_price()
+            client.tickers.update_last('ETHUSDT', 2100.0)
+            streamed = await client.get_ticker_price()
+            return partial, streamed
+
+    partial, streamed = asyncio.run(scenario())
+    assert {row['symbol'] for row in partial} == set(exchange.prices)
+    prices = {row['symbol']: row['price'] for row in streamed}
+    assert set(prices) == set(exchange.prices)
+    assert (prices['BTCUSDT'], prices['ETHUSDT']) == ('31000.0', '2100.0')
+    assert exchange.requests['GET /api/v3/ticker/price'] == 1
+
+
+def test_disconnected_stream_falls_back_to_rest(exchange, connect_client):
+    async def scenario():
+        async with connect_client() as client:
+            client.tickers.update_last('BTCUSDT', 31000.0)
+            return await client.get_ticker_price('BTCUSDT')
+
+    assert float(asyncio.run(scenario())['price']) == exchange.prices['BTCUSDT']
@@ -0,0 +1,44 @@
+import asyncio
+import time
+
+from app.binance_client import AsyncBinanceClient
+
+
+def test_connect_does_no_network_io(exchange):
+    async def scenario():
+        client = AsyncBinanceClient.connect()
+        try:
+            return client.ready, await client.wait_ready(timeout=0.05)
+        finally:
+            await client.close()
+
+    assert asyncio.run(scenario()) == (False, False)
+    assert exchange.requests == {}
+
+
+def test_time_sync_and_exchange_info_load_concurrently(exchange, connect_client):
+    exchange.latency_ms = 300
+
+    async def scenario():
+        async with connect_client() as client:
+            return client.warm_up_seconds, client.symbol_cache.loaded
+
+    warm_up_seconds, symbols_loaded = asyncio.run(scenario())
+    assert symbols_loaded
+    assert exchange.requests['GET /api/v3/time'] >= 1 and exchange.requests['GET /api/v3/exchangeInfo'] == 1
+    # Run one after the other the two requests would take 0.6s
+    assert 0.3 <= warm_up_seconds < 0.55
+
+
+def test_ready_turns_200_once_warmed_up(exchange, http):
+    exchange.latency_ms = 300
+    # The lifespan has returned, but warm-up is still waiting on the exchange
+    response = http.get('/ready')
+    assert response.status_code == 503 and not response.json()['ready']
+
+    deadline = time.monotonic() + 5
+    while http.get('/ready').status_code != 200:
+        assert time.monotonic() < deadline
+        time.sleep(0.05)
+    body = http.get('/ready').json()
+    assert body['clock_synced'] and body['symbols_loaded'] and body['warm_up_ms'] >= 300
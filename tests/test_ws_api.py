@@ -0,0 +1,132 @@
+import asyncio
+import hashlib
+import hmac
+from contextlib import asynccontextmanager
+from urllib.parse import urlencode
+
+import pytest
+from binance.exceptions import BinanceAPIException
+
+from app.ws_api import WebSocketAPIClient, rate_limit_headers
+
+from .helpers import MOCK_WS_URL, free_port
+
+WS_API_URL = f"{MOCK_WS_URL}/ws-api/v3"
+
+
+@asynccontextmanager
+async def connected(secret='test-secret', url=WS_API_URL):
+    client = WebSocketAPIClient('test-key', secret, url, timeout=5)
+    client.start()
+    try:
+        assert await client.wait_connected(5)
+        yield client
+    finally:
+        await client.close()
+
+
+def order(client_order_id):
+    return {'symbol': 'BTCUSDT', 'side': 'BUY', 'type': 'LIMIT', 'timeInForce': 'GTC',
+            'quantity': '0.001', 'price': '29000', 'newClientOrderId': client_order_id}
+
+
+def test_rate_limits_become_rest_headers():
+    assert rate_limit_headers([
+        {'rateLimitType': 'REQUEST_WEIGHT', 'interval': 'MINUTE', 'intervalNum': 1, 'count': 12},
+        {'rateLimitType': 'ORDERS', 'interval': 'SECOND', 'intervalNum': 10, 'count': 3},
+        {'rateLimitType': 'ORDERS', 'interval': 'DAY', 'intervalNum': 1},
+    ]) == {'X-MBX-USED-WEIGHT-1M': '12', 'X-MBX-ORDER-COUNT-10S': '3'}
+
+
+def test_requests_are_signed_over_sorted_parameters():
+    client = WebSocketAPIClient('test-key', 'test-secret')
+    params = client._sign({'symbol': 'BTCUSDT', 'orderId': 7, 'origClientOrderId': None})
+    assert 'origClientOrderId' not in params and params['apiKey'] == 'test-key'
+    signature = params.pop('signature')
+    payload = urlencode(sorted(params.items()))
+    assert signature == hmac.new(b'test-secret', payload.encode(), hashlib.sha256).hexdigest()
+
+
+def test_signatures_are_accepted_by_the_exchange(exchange):
+    exchange.api_secret = 'test-secret'
+
+    async def scenario():
+        async with connected() as client:
+            placed = await client.place_order(**order('signed'))
+        async with connected(secret='wrong-secret') as client:
+            with pytest.raises(BinanceAPIException) as error:
+                await client.place_order(**order('forged'))
+        return placed, error.value
+
+    placed, error = asyncio.run(scenario())
+    assert placed['clientOrderId'] == 'signed'
+    assert error.code == -1022
+    assert len(exchange.orders) == 1
+
+
+def test_responses_are_matched_to_requests_by_id(exchange):
+    # With jitter the mock answers out of order
+    exchange.latency_ms, exchange.jitter_ms = 30, 20
+
+    async def scenario():
+        async with connected() as client:
+            return await asyncio.gather(*(client.place_order(**order(f"order-{i}")) for i in range(20)))
+
+    responses = asyncio.run(scenario())
+    assert [response['clientOrderId'] for response in responses] == [f"order-{i}" for i in range(20)]
+    order_ids = [response['orderId'] for response in responses]
+    assert order_ids != sorted(order_ids)
+
+
+def test_pending_requests_fail_when_the_connection_drops(mock_server, exchange):
+    exchange.latency_ms = 2000
+
+    async def scenario():
+        async with connected() as client:
+            request = asyncio.create_task(client.place_order(**order('in-flight')))
+            await asyncio.sleep(0.2)
+            await asyncio.to_thread(mock_server.call, exchange.drop_connections())
+            with pytest.raises(ConnectionError, match='connection closed'):
+                await asyncio.wait_for(request, 1)
+            assert client._pending == {}
+
+    asyncio.run(scenario())
+
+
+def test_requests_fail_fast_while_disconnected():
+    async def scenario():
+        client = WebSocketAPIClient('test-key', 'test-secret', f"ws://127.0.0.1:{free_port()}/ws-api/v3")
+        with pytest.raises(ConnectionError, match='not connected'):
+            await client.place_order(**order('offline'))
+
+    asyncio.run(scenario())
+
+
+def test_client_sends_orders_over_the_websocket_when_connected(exchange, connect_client):
+    async def scenario():
+        async with connect_client() as client:
+            client.ws_api = WebSocketAPIClient('test-key', 'test-secret', WS_API_URL)
+            client.ws_api.start()
+            await client.ws_api.wait_connected(5)
+            response = await client.place_order('BTCUSDT', 0.001, 'LIMIT', 'BUY', price=29000)
+            await client.ws_api.close()
+            return response
+
+    response = asyncio.run(scenario())
+    assert exchange.requests['WS order.place'] == 1 and 'POST /api/v3/order' not in exchange.requests
+    assert response['status'] == 'NEW'
+
+
+def test_client_falls_back_to_rest_while_the_websocket_is_down(exchange, connect_client):
+    async def scenario():
+        async with connect_client() as client:
+            # Nothing listens here, so the WebSocket API never connects
+            client.ws_api = WebSocketAPIClient('test-key', 'test-secret', f"ws://127.0.0.1:{free_port()}/ws-api/v3")
+            client.ws_api.start()
+            response = await client.place_order('BTCUSDT', 0.001, 'LIMIT', 'BUY', price=29000)
+            await client.ws_api.close()
+            return response
+
+    response = asyncio.run(scenario())
+    assert exchange.requests['POST /api/v3/order'] == 1 and 'WS order.place' not in exchange.requests
+    assert response['status'] == 'NEW'